@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+
+class BatchScheduler:
+    """Eşzamanlı istekleri toplayıp tek bir batch çağrısında işler.
+
+    Requests are collected until either ``max_batch_size`` items are
+    pending or ``max_wait_ms`` has passed since the first one arrived,
+    then ``run_batch`` is awaited once for the whole group and each
+    result is handed back to the coroutine that submitted it. Up to
+    ``max_concurrency`` batches may be running at the same time; while
+    all of them are busy new requests keep accumulating into the next
+    batch.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[List[Any]], Awaitable[List[Any]]],
+        max_batch_size: int = 8,
+        max_wait_ms: float = 20.0,
+        max_concurrency: int = 1,
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0.0, max_wait_ms) / 1000.0
+        self.max_concurrency = max(1, max_concurrency)
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._running: set = set()
+
+        # Metrics
+        self.batches_run = 0
+        self.items_processed = 0
+        self.max_batch_seen = 0
+
+    async def start(self):
+        """Batch toplayıcı görevi başlat"""
+        if self._worker is None:
+            self._queue = asyncio.Queue()
+            self._slots = asyncio.Semaphore(self.max_concurrency)
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Görevi durdur, bekleyen istekleri iptal et"""
+        if self._worker is None:
+            return
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        # Let batches that already reached the model finish
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+        while not self._queue.empty():
+            _, future = self._queue.get_nowait()
+            if not future.done():
+                future.set_exception(RuntimeError("Batch scheduler stopped"))
+
+    async def submit(self, item: Any) -> Any:
+        """Bir isteği kuyruğa ekle ve batch sonucunu bekle"""
+        if self._worker is None:
+            raise RuntimeError("Batch scheduler not started")
+
+        future = asyncio.get_running_loop().create_future()
+        self._queue.put_nowait((item, future))
+        return await future
+
+    async def _collect(self) -> List[Tuple[Any, asyncio.Future]]:
+        """İlk istekten sonra max_wait süresince batch'i doldur"""
+        loop = asyncio.get_running_loop()
+        batch = [await self._queue.get()]
+        deadline = loop.time() + self.max_wait
+
+        try:
+            while len(batch) < self.max_batch_size:
+                # Drain whatever is already queued without waiting
+                if not self._queue.empty():
+                    batch.append(self._queue.get_nowait())
+                    continue
+
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+        except asyncio.CancelledError:
+            # stop() during collection: these items are off the queue, so
+            # nothing else would ever resolve their futures
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(RuntimeError("Batch scheduler stopped"))
+            raise
+
+        return batch
+
+    async def _run(self):
+        while True:
+            # Only start collecting once a batch slot is free, so the batch
+            # keeps growing while every slot is busy
+            await self._slots.acquire()
+            try:
+                batch = await self._collect()
+            except BaseException:
+                self._slots.release()
+                raise
+
+            task = asyncio.create_task(self._dispatch(batch))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    async def _dispatch(self, batch: List[Tuple[Any, asyncio.Future]]):
+        try:
+            # Callers that gave up while waiting do not need a model slot
+            batch = [(item, future) for item, future in batch if not future.done()]
+            if not batch:
+                return
+
+            start_time = time.time()
+            try:
+                results = await self.run_batch([item for item, _ in batch])
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for (_, future), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+
+            self.batches_run += 1
+            self.items_processed += len(batch)
+            self.max_batch_seen = max(self.max_batch_seen, len(batch))
+            logging.debug(f"📦 Batch of {len(batch)} processed in {int((time.time() - start_time) * 1000)}ms")
+        finally:
+            self._slots.release()
+
+    def stats(self) -> Dict:
+        """Batch metrikleri"""
+        return {
+            "batches_run": self.batches_run,
+            "items_processed": self.items_processed,
+            "avg_batch_size": round(self.items_processed / self.batches_run, 2) if self.batches_run else 0,
+            "max_batch_size_seen": self.max_batch_seen,
+            "pending": self._queue.qsize() if self._queue else 0,
+            "running_batches": len(self._running),
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "max_concurrency": self.max_concurrency,
+        }
@@ -0,0 +1,90 @@
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+# (left, top, right, bottom) in image pixels
+Box = Tuple[int, int, int, int]
+
+CROP_SOURCES = {"center", "person", "motion"}
+
+
+def center_boxes(width: int, height: int) -> List[Box]:
+    """Sabit öneriler: tam kare, kare merkez kırpım ve %80 merkez kırpım"""
+    m = min(width, height)
+    l = (width - m) // 2
+    t = (height - m) // 2
+    s = int(m * 0.8)
+    l2 = max(0, (width - s) // 2)
+    t2 = max(0, (height - s) // 2)
+    return [(0, 0, width, height), (l, t, l + m, t + m), (l2, t2, l2 + s, t2 + s)]
+
+
+def _expand(box: Box, margin: float, min_side: int, width: int, height: int) -> Box:
+    """Kutuyu her yönde margin oranında büyüt, en az min_side yap, görüntüye sığdır"""
+    l, t, r, b = box
+    grow_w = max((r - l) * (1 + 2 * margin), min_side) - (r - l)
+    grow_h = max((b - t) * (1 + 2 * margin), min_side) - (b - t)
+    l, r = l - grow_w / 2, r + grow_w / 2
+    t, b = t - grow_h / 2, b + grow_h / 2
+
+    # Shift back inside the frame before clipping so the box keeps its size
+    if l < 0:
+        l, r = 0, r - l
+    if r > width:
+        l, r = l - (r - width), width
+    if t < 0:
+        t, b = 0, b - t
+    if b > height:
+        t, b = t - (b - height), height
+    return (max(0, int(l)), max(0, int(t)), min(width, int(r)), min(height, int(b)))
+
+
+def region_boxes(
+    width: int,
+    height: int,
+    regions: Sequence[Box],
+    tight_margin: float = 0.15,
+    context_margin: float = 0.5,
+    min_side: int = 96,
+    max_coverage: float = 0.6,
+) -> Optional[List[Box]]:
+    """Kişi/hareket bölgelerinden kırpım kutuları (bölge yoksa None).
+
+    Keeps the three-crop layout the vote expects - the full frame first,
+    then a context crop and a tight crop - but centres the two crops on
+    the union of the regions instead of the middle of the frame. When
+    the context crop would cover most of the frame anyway, only the full
+    frame is returned.
+    """
+    regions = [box for box in regions if box[2] > box[0] and box[3] > box[1]]
+    if not regions:
+        return None
+
+    union = (
+        min(box[0] for box in regions),
+        min(box[1] for box in regions),
+        max(box[2] for box in regions),
+        max(box[3] for box in regions),
+    )
+    full = (0, 0, width, height)
+    context = _expand(union, context_margin, min_side, width, height)
+    if (context[2] - context[0]) * (context[3] - context[1]) >= max_coverage * width * height:
+        return [full]
+    return [full, context, _expand(union, tight_margin, min_side, width, height)]
+
+
+def make_crops(image: Image.Image, boxes: Sequence[Box], max_side: int = 0) -> List[Image.Image]:
+    """Kutuları kırp; max_side verildiyse uzun kenarı ona küçült"""
+    full = (0, 0) + image.size
+    crops = []
+    for box in boxes:
+        crop = image if tuple(box) == full else image.crop(box)
+        if max_side and max(crop.size) > max_side:
+            # Fewer pixels means fewer image tiles, so fewer image tokens per question
+            scale = max_side / max(crop.size)
+            crop = crop.resize(
+                (max(1, round(crop.width * scale)), max(1, round(crop.height * scale))),
+                Image.Resampling.BILINEAR,
+            )
+        crops.append(crop)
+    return crops
@@ -1,11 +1,31 @@
+import asyncio
 import asyncpg
-import hashlib
 import json
 import os
+import re
+import time
+from contextlib import asynccontextmanager
 from datetime import datetime
-from typing import Optional, List, Dict
+from typing import List, Dict, Tuple
 import logging
 
+from perceptual_hash import to_signed, to_unsigned
+from latency_stats import LatencySketch
+# The shared configs are re-exported for the benchmarks
+from result_store import (
+    ResultStore,
+    RESULT_CACHE_CONFIG,
+    PHASH_CONFIG,
+    WRITE_BEHIND_CONFIG,
+    TIMESERIES_CONFIG,
+    hash_to_bytes,
+    parse_image_size,
+    format_image_size,
+)
+
+# Result store backend: "postgres" (default) or "sqlite" (embedded, single node)
+RESULT_STORE = os.getenv("RESULT_STORE", "postgres").lower()
+
 # Database configuration
 DATABASE_CONFIG = {
     "host": os.getenv("DB_HOST", "localhost"),
@@ -15,102 +35,522 @@ DATABASE_CONFIG = {
     "database": os.getenv("DB_NAME", "fall_detection")
 }
 
-class DatabaseManager:
+# asyncpg pool tuning. statement_cache_size keeps each connection's prepared
+# statements for reuse (0 disables caching, e.g. behind pgbouncer).
+# Timeouts of 0 mean no timeout.
+POOL_CONFIG = {
+    "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+    "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+    "statement_cache_size": int(os.getenv("DB_STATEMENT_CACHE_SIZE", "100")),
+    "command_timeout": float(os.getenv("DB_COMMAND_TIMEOUT", "30")) or None,
+    "max_inactive_connection_lifetime": float(os.getenv("DB_MAX_INACTIVE_LIFETIME", "300")),
+    "acquire_timeout": float(os.getenv("DB_POOL_ACQUIRE_TIMEOUT", "10")) or None,
+}
+
+# Range partitioning of fall_detections by created_at. Partitions are
+# interval_days wide and premake future ones are kept ready; partitions
+# older than retention_days are dropped (0 keeps everything). Hash lookups
+# and the dedupe trigger probe every partition, so the defaults keep the
+# count bounded (~13 weekly partitions plus premake and the default one).
+PARTITION_CONFIG = {
+    "interval_days": max(1, int(os.getenv("PARTITION_INTERVAL_DAYS", "7"))),
+    "premake": int(os.getenv("PARTITION_PREMAKE", "3")),
+    "retention_days": int(os.getenv("PARTITION_RETENTION_DAYS", "90")),
+    "check_interval_s": float(os.getenv("PARTITION_CHECK_INTERVAL_S", "3600")),
+}
+
+# image_hash is stored as 32 raw bytes; lookups go through an index on its
+# first HASH_PREFIX_BYTES bytes, which is a quarter of the size of a full-key index
+HASH_PREFIX_BYTES = 8
+
+# Partition helpers for fall_detections (also in init.sql). A partitioned table
+# cannot have a unique index on image_hash alone, so a BEFORE INSERT trigger
+# serialises inserts per hash and skips rows whose hash is already stored.
+PARTITIONED_SCHEMA = """
+CREATE TABLE IF NOT EXISTS fall_detections_default PARTITION OF fall_detections DEFAULT;
+
+CREATE INDEX IF NOT EXISTS idx_image_hash_prefix ON fall_detections ((substring(image_hash from 1 for 8)));
+
+CREATE OR REPLACE FUNCTION ensure_fall_detection_partitions(
+    interval_days INT, premake INT, from_day DATE DEFAULT CURRENT_DATE
+) RETURNS INT AS $$
+DECLARE
+    start_day DATE := from_day - ((from_day - DATE '1970-01-01') % interval_days);
+    last_day DATE := CURRENT_DATE + premake * interval_days;
+    partition_name TEXT;
+    created INT := 0;
+    moved BIGINT;
+BEGIN
+    WHILE start_day <= last_day LOOP
+        partition_name := 'fall_detections_p' || to_char(start_day, 'YYYYMMDD');
+        IF to_regclass(partition_name) IS NULL THEN
+            -- Rows of this range already in the default partition would make
+            -- CREATE ... PARTITION OF fail: move them out and back in through
+            -- the parent, so the rollup triggers subtract and re-add them
+            moved := 0;
+            IF EXISTS (
+                SELECT 1 FROM fall_detections_default
+                WHERE created_at >= start_day AND created_at < start_day + interval_days
+            ) THEN
+                CREATE TEMP TABLE IF NOT EXISTS fall_detections_moving (LIKE fall_detections) ON COMMIT DROP;
+                WITH rows_out AS (
+                    DELETE FROM fall_detections
+                    WHERE created_at >= start_day AND created_at < start_day + interval_days
+                    RETURNING *
+                )
+                INSERT INTO fall_detections_moving SELECT * FROM rows_out;
+                GET DIAGNOSTICS moved = ROW_COUNT;
+            END IF;
+            
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF fall_detections FOR VALUES FROM (%L) TO (%L)',
+                partition_name, start_day, start_day + interval_days
+            );
+            created := created + 1;
+            
+            IF moved > 0 THEN
+                INSERT INTO fall_detections SELECT * FROM fall_detections_moving;
+                TRUNCATE fall_detections_moving;
+            END IF;
+        END IF;
+        start_day := start_day + interval_days;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE OR REPLACE FUNCTION skip_duplicate_image_hash() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext(encode(NEW.image_hash, 'hex')));
+    IF EXISTS (
+        SELECT 1 FROM fall_detections
+        WHERE substring(image_hash from 1 for 8) = substring(NEW.image_hash from 1 for 8)
+          AND image_hash = NEW.image_hash
+    ) THEN
+        RETURN NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS skip_duplicate_image_hash ON fall_detections;
+CREATE TRIGGER skip_duplicate_image_hash
+    BEFORE INSERT ON fall_detections
+    FOR EACH ROW
+    EXECUTE FUNCTION skip_duplicate_image_hash();
+"""
+
+# Per-day statistics rollup kept by the database itself (also in init.sql):
+# statement-level triggers fold each statement's inserted/deleted rows into
+# fall_detection_daily_stats, so every writer (this service, the backend,
+# manual SQL) keeps the counters right. Transition tables are only allowed
+# on single-event triggers, hence one trigger per event. DML aimed directly
+# at a partition bypasses the parent's statement triggers.
+STATS_ROLLUP_SCHEMA = """
+CREATE OR REPLACE FUNCTION fall_detection_daily_stats_apply() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE fall_detection_daily_stats AS s SET
+            total_processed = s.total_processed - r.total_processed,
+            fall_detected = s.fall_detected - r.fall_detected,
+            no_fall = s.no_fall - r.no_fall,
+            processing_time_sum = s.processing_time_sum - r.processing_time_sum,
+            processing_time_count = s.processing_time_count - r.processing_time_count
+        FROM (
+            SELECT
+                created_at::date AS day,
+                COUNT(*) AS total_processed,
+                COUNT(*) FILTER (WHERE result = 'Yes') AS fall_detected,
+                COUNT(*) FILTER (WHERE result = 'No') AS no_fall,
+                COALESCE(SUM(processing_time_ms), 0) AS processing_time_sum,
+                COUNT(processing_time_ms) AS processing_time_count
+            FROM old_rows
+            GROUP BY 1
+        ) r
+        WHERE s.day = r.day;
+        
+        DELETE FROM fall_detection_daily_stats WHERE total_processed <= 0;
+    END IF;
+    
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO fall_detection_daily_stats AS s
+            (day, total_processed, fall_detected, no_fall, processing_time_sum, processing_time_count)
+        SELECT
+            created_at::date,
+            COUNT(*),
+            COUNT(*) FILTER (WHERE result = 'Yes'),
+            COUNT(*) FILTER (WHERE result = 'No'),
+            COALESCE(SUM(processing_time_ms), 0),
+            COUNT(processing_time_ms)
+        FROM new_rows
+        GROUP BY 1
+        ON CONFLICT (day) DO UPDATE SET
+            total_processed = s.total_processed + EXCLUDED.total_processed,
+            fall_detected = s.fall_detected + EXCLUDED.fall_detected,
+            no_fall = s.no_fall + EXCLUDED.no_fall,
+            processing_time_sum = s.processing_time_sum + EXCLUDED.processing_time_sum,
+            processing_time_count = s.processing_time_count + EXCLUDED.processing_time_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+DROP TRIGGER IF EXISTS fall_detection_daily_stats_insert ON fall_detections;
+CREATE TRIGGER fall_detection_daily_stats_insert
+    AFTER INSERT ON fall_detections
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION fall_detection_daily_stats_apply();
+
+DROP TRIGGER IF EXISTS fall_detection_daily_stats_delete ON fall_detections;
+CREATE TRIGGER fall_detection_daily_stats_delete
+    AFTER DELETE ON fall_detections
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION fall_detection_daily_stats_apply();
+
+DROP TRIGGER IF EXISTS fall_detection_daily_stats_update ON fall_detections;
+CREATE TRIGGER fall_detection_daily_stats_update
+    AFTER UPDATE ON fall_detections
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION fall_detection_daily_stats_apply();
+
+-- Rebuilds the rollup for [from_day, to_day) from the rows left in
+-- fall_detections; dropping a partition removes rows without firing the
+-- DELETE trigger
+CREATE OR REPLACE FUNCTION recompute_fall_detection_daily_stats(from_day DATE, to_day DATE) RETURNS VOID AS $$
+BEGIN
+    DELETE FROM fall_detection_daily_stats WHERE day >= from_day AND day < to_day;
+    INSERT INTO fall_detection_daily_stats
+        (day, total_processed, fall_detected, no_fall, processing_time_sum, processing_time_count)
+    SELECT
+        created_at::date,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE result = 'Yes'),
+        COUNT(*) FILTER (WHERE result = 'No'),
+        COALESCE(SUM(processing_time_ms), 0),
+        COUNT(processing_time_ms)
+    FROM fall_detections
+    WHERE created_at >= from_day AND created_at < to_day
+    GROUP BY 1;
+END;
+$$ LANGUAGE plpgsql;
+"""
+
+# One-time backfill when the rollup is introduced on an existing table. Runs
+# after the triggers exist, under the schema lock, so no row is missed or
+# counted twice
+STATS_BACKFILL_QUERY = """
+INSERT INTO fall_detection_daily_stats
+    (day, total_processed, fall_detected, no_fall, processing_time_sum, processing_time_count)
+SELECT
+    created_at::date,
+    COUNT(*),
+    COUNT(*) FILTER (WHERE result = 'Yes'),
+    COUNT(*) FILTER (WHERE result = 'No'),
+    COALESCE(SUM(processing_time_ms), 0),
+    COUNT(processing_time_ms)
+FROM fall_detections
+WHERE NOT EXISTS (SELECT 1 FROM fall_detection_daily_stats)
+GROUP BY 1
+ON CONFLICT (day) DO NOTHING
+"""
+
+# Hot queries: each connection prepares them on first use and keeps them in
+# its statement cache
+
+LOOKUP_QUERY = """
+SELECT image_hash, result, confidence, created_at, image_width, image_height, processing_time_ms
+FROM fall_detections
+WHERE substring(image_hash from 1 for 8) = ANY($2::bytea[])
+  AND image_hash = ANY($1::bytea[])
+"""
+
+# One statement for the whole batch: the columns travel as arrays and the
+# rows that were actually inserted come back so the caller can cache them
+# (the rollup triggers update the statistics)
+INSERT_QUERY = """
+INSERT INTO fall_detections
+    (image_hash, result, confidence, image_width, image_height, processing_time_ms, phash, created_at)
+SELECT image_hash, result, confidence, image_width, image_height, processing_time_ms, phash,
+    COALESCE(created_at, LOCALTIMESTAMP)
+FROM unnest(
+    $1::bytea[], $2::varchar[], $3::float8[], $4::smallint[], $5::smallint[], $6::int[], $7::bigint[],
+    $8::timestamp[]
+) AS r(image_hash, result, confidence, image_width, image_height, processing_time_ms, phash, created_at)
+ON CONFLICT DO NOTHING
+RETURNING image_hash, created_at
+"""
+
+# Reads the per-day rollup (one row per day) instead of scanning fall_detections
+STATISTICS_QUERY = """
+SELECT
+    COALESCE(SUM(total_processed), 0)::bigint as total_processed,
+    COALESCE(SUM(fall_detected), 0)::bigint as fall_detected,
+    COALESCE(SUM(no_fall), 0)::bigint as no_fall,
+    SUM(processing_time_sum)::float8 / NULLIF(SUM(processing_time_count), 0) as avg_processing_time,
+    COUNT(*) as days_active
+FROM fall_detection_daily_stats
+"""
+
+class DatabaseManager(ResultStore):
+    backend = "postgres"
+
     def __init__(self):
+        super().__init__()
         self.pool = None
+        self.partitioned = False
+        self._partition_task = None
         
-    async def connect(self):
+        # Pool metrics
+        self.acquires = 0
+        self.acquire_timeouts = 0
+        self.acquire_waiting = 0
+        self.acquire_wait = LatencySketch()
+        self.acquire_wait_max_ms = 0.0
+        
+    async def _open(self):
         """PostgreSQL bağlantı havuzu oluştur"""
-        try:
-            self.pool = await asyncpg.create_pool(**DATABASE_CONFIG)
-            await self.create_tables()
-            logging.info("✅ Database connected successfully")
-        except Exception as e:
-            logging.error(f"❌ Database connection failed: {e}")
-            raise
+        self.pool = await asyncpg.create_pool(
+            **DATABASE_CONFIG,
+            min_size=POOL_CONFIG["min_size"],
+            max_size=POOL_CONFIG["max_size"],
+            statement_cache_size=POOL_CONFIG["statement_cache_size"],
+            command_timeout=POOL_CONFIG["command_timeout"],
+            max_inactive_connection_lifetime=POOL_CONFIG["max_inactive_connection_lifetime"],
+        )
+        await self.create_tables()
             
-    async def disconnect(self):
+    async def _close(self):
         """Bağlantı havuzunu kapat"""
+        if self._partition_task:
+            self._partition_task.cancel()
         if self.pool:
             await self.pool.close()
             
+    @asynccontextmanager
+    async def _acquire(self):
+        """Havuzdan bağlantı al, bekleme süresini ölç"""
+        start_time = time.perf_counter()
+        self.acquire_waiting += 1
+        try:
+            conn = await self.pool.acquire(timeout=POOL_CONFIG["acquire_timeout"])
+        except asyncio.TimeoutError:
+            self.acquire_timeouts += 1
+            logging.warning("⏳ Timed out waiting for a database connection")
+            raise
+        finally:
+            self.acquire_waiting -= 1
+        
+        wait_ms = (time.perf_counter() - start_time) * 1000
+        self.acquires += 1
+        self.acquire_wait.add(wait_ms)
+        self.acquire_wait_max_ms = max(self.acquire_wait_max_ms, wait_ms)
+        try:
+            yield conn
+        finally:
+            await self.pool.release(conn)
+    
+    def backend_stats(self) -> Dict:
+        """Depolama motoru metrikleri"""
+        return {"backend": self.backend, "partitioned": self.partitioned, "pool": self.pool_stats()}
+    
+    def pool_stats(self) -> Dict:
+        """Bağlantı havuzu metrikleri"""
+        size = self.pool.get_size() if self.pool else 0
+        idle = self.pool.get_idle_size() if self.pool else 0
+        p50, p99 = self.acquire_wait.quantile(0.50), self.acquire_wait.quantile(0.99)
+        return {
+            "size": size,
+            "in_use": size - idle,
+            "idle": idle,
+            "min_size": POOL_CONFIG["min_size"],
+            "max_size": POOL_CONFIG["max_size"],
+            "waiting": self.acquire_waiting,
+            "acquires": self.acquires,
+            "acquire_timeouts": self.acquire_timeouts,
+            "acquire_wait_p50_ms": round(p50, 2) if p50 is not None else 0,
+            "acquire_wait_p99_ms": round(p99, 2) if p99 is not None else 0,
+            "acquire_wait_max_ms": round(self.acquire_wait_max_ms, 2),
+        }
+    
     async def create_tables(self):
         """Gerekli tabloları oluştur"""
         create_table_query = """
         CREATE TABLE IF NOT EXISTS fall_detections (
-            id SERIAL PRIMARY KEY,
-            image_hash VARCHAR(64) UNIQUE NOT NULL,
+            id BIGSERIAL,
+            image_hash BYTEA NOT NULL CHECK (octet_length(image_hash) = 32),
             result VARCHAR(10) NOT NULL,
             confidence FLOAT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            image_size VARCHAR(20),
-            processing_time_ms INTEGER
-        );
+            created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            image_width SMALLINT,
+            image_height SMALLINT,
+            processing_time_ms INTEGER,
+            phash BIGINT,
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at);
+        
+        ALTER TABLE fall_detections ADD COLUMN IF NOT EXISTS phash BIGINT;
         
-        CREATE INDEX IF NOT EXISTS idx_image_hash ON fall_detections(image_hash);
         CREATE INDEX IF NOT EXISTS idx_created_at ON fall_detections(created_at);
+        
+        CREATE TABLE IF NOT EXISTS fall_detection_daily_stats (
+            day DATE PRIMARY KEY,
+            total_processed BIGINT NOT NULL DEFAULT 0,
+            fall_detected BIGINT NOT NULL DEFAULT 0,
+            no_fall BIGINT NOT NULL DEFAULT 0,
+            processing_time_sum BIGINT NOT NULL DEFAULT 0,
+            processing_time_count BIGINT NOT NULL DEFAULT 0
+        );
         """
         
-        async with self.pool.acquire() as conn:
-            await conn.execute(create_table_query)
+        async with self._acquire() as conn:
+            hash_type = await conn.fetchval("""
+            SELECT data_type FROM information_schema.columns
+            WHERE table_schema = current_schema() AND table_name = 'fall_detections' AND column_name = 'image_hash'
+            """)
+            if hash_type is not None and hash_type != "bytea":
+                raise RuntimeError(
+                    "fall_detections.image_hash is still hex text; run migrations/002_binary_image_hash.sql"
+                )
+            
+            async with conn.transaction():
+                # Instances starting together must not replace each other's
+                # triggers or both backfill the rollup
+                await conn.execute("SELECT pg_advisory_xact_lock(hashtext('fall_detections_schema'))")
+                await conn.execute(create_table_query)
+                
+                partitioned = await conn.fetchval(
+                    "SELECT relkind = 'p' FROM pg_class WHERE oid = 'fall_detections'::regclass"
+                )
+                if partitioned:
+                    await conn.execute(PARTITIONED_SCHEMA)
+                else:
+                    # The unique constraint's index already covers hash lookups
+                    await conn.execute("DROP INDEX IF EXISTS idx_image_hash")
+                
+                await conn.execute(STATS_ROLLUP_SCHEMA)
+                await conn.execute(STATS_BACKFILL_QUERY)
             
-    def calculate_image_hash(self, image_bytes: bytes) -> str:
-        """Görsel için SHA256 hash hesapla"""
-        return hashlib.sha256(image_bytes).hexdigest()
+            if not partitioned:
+                logging.warning(
+                    "⚠️ fall_detections is not partitioned; run migrations/001_partition_fall_detections.sql "
+                    "to enable partition management and retention"
+                )
         
-    async def check_existing_result(self, image_hash: str) -> Optional[Dict]:
-        """Varolan sonucu kontrol et"""
-        query = """
-        SELECT image_hash, result, confidence, created_at, image_size, processing_time_ms
-        FROM fall_detections 
-        WHERE image_hash = $1
-        """
+        self.partitioned = bool(partitioned)
+        if self.partitioned:
+            await self.maintain_partitions()
+            self._partition_task = asyncio.create_task(self._partition_loop())
+    
+    async def maintain_partitions(self):
+        """Gelecek partition'ları oluştur, saklama süresi dolanları sil"""
+        try:
+            async with self._acquire() as conn:
+                created = await conn.fetchval(
+                    "SELECT ensure_fall_detection_partitions($1, $2)",
+                    PARTITION_CONFIG["interval_days"], PARTITION_CONFIG["premake"]
+                )
+                if created:
+                    logging.info(f"🗂️ Created {created} fall_detections partitions")
+                
+                if PARTITION_CONFIG["retention_days"] <= 0:
+                    return
+                
+                cutoff = await conn.fetchval(
+                    "SELECT CURRENT_DATE - $1::int", PARTITION_CONFIG["retention_days"]
+                )
+                partitions = await conn.fetch("""
+                SELECT c.relname, pg_get_expr(c.relpartbound, c.oid) AS bound
+                FROM pg_inherits i
+                JOIN pg_class c ON c.oid = i.inhrelid
+                WHERE i.inhparent = 'fall_detections'::regclass
+                """)
+                for partition in partitions:
+                    # Only whole partitions are dropped: the upper bound must be past the cutoff
+                    bounds = re.search(r"FROM \('([^']+)'\) TO \('([^']+)'\)", partition["bound"])
+                    if not bounds:
+                        continue  # The default partition
+                    lower, upper = (datetime.fromisoformat(bound).date() for bound in bounds.groups())
+                    if upper <= cutoff:
+                        async with conn.transaction():
+                            await conn.execute(f'DROP TABLE IF EXISTS "{partition["relname"]}"')
+                            # The dropped rows never reach the DELETE trigger
+                            await conn.execute("SELECT recompute_fall_detection_daily_stats($1, $2)", lower, upper)
+                        logging.info(f"🗑️ Dropped expired partition {partition['relname']}")
+        except Exception as e:
+            logging.error(f"❌ Partition maintenance failed: {e}")
+    
+    async def _partition_loop(self):
+        while True:
+            await asyncio.sleep(PARTITION_CONFIG["check_interval_s"])
+            await self.maintain_partitions()
+            
+    def _from_record(self, record) -> Dict:
+        """Veritabanı kaydını hex hash ve "WxH" boyutlu satıra çevir"""
+        return {
+            "image_hash": bytes(record["image_hash"]).hex(),
+            "result": record["result"],
+            "confidence": record["confidence"],
+            "created_at": record["created_at"],
+            "image_size": format_image_size(record["image_width"], record["image_height"]),
+            "processing_time_ms": record["processing_time_ms"],
+        }
         
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(query, image_hash)
-            if row:
-                return {
-                    "image_hash": row["image_hash"],
-                    "result": row["result"],
-                    "confidence": row["confidence"],
-                    "created_at": row["created_at"].isoformat(),
-                    "image_size": row["image_size"],
-                    "processing_time_ms": row["processing_time_ms"],
-                    "cached": True
-                }
-        return None
+    async def _fetch_results(self, keys: List[bytes]) -> List[Dict]:
+        """Hash'lere ait kayıtları prefix indeksi üzerinden tek sorguda getir"""
+        async with self._acquire() as conn:
+            records = await conn.fetch(LOOKUP_QUERY, keys, [raw[:HASH_PREFIX_BYTES] for raw in keys])
+        return [self._from_record(record) for record in records]
         
-    async def save_result(self, image_hash: str, result: str, confidence: float = None, 
-                         image_size: str = None, processing_time_ms: int = None) -> bool:
-        """Sonucu veritabanına kaydet"""
+    async def _fetch_phashes(self, limit: int) -> List[Tuple[str, int]]:
+        """En yeni kayıtların perceptual hash'lerini getir"""
         query = """
-        INSERT INTO fall_detections (image_hash, result, confidence, image_size, processing_time_ms)
-        VALUES ($1, $2, $3, $4, $5)
-        ON CONFLICT (image_hash) DO NOTHING
+        SELECT image_hash, phash
+        FROM fall_detections
+        WHERE phash IS NOT NULL
+        ORDER BY created_at DESC
+        LIMIT $1
         """
         
-        try:
-            async with self.pool.acquire() as conn:
-                await conn.execute(query, image_hash, result, confidence, image_size, processing_time_ms)
-            return True
-        except Exception as e:
-            logging.error(f"Database save error: {e}")
-            return False
+        async with self._acquire() as conn:
+            rows = await conn.fetch(query, limit)
+        return [(bytes(row["image_hash"]).hex(), to_unsigned(row["phash"])) for row in rows]
+    
+    async def _iter_recent(self, start: datetime, until: datetime):
+        """Aralıktaki kayıtları cursor ile akıt"""
+        async with self._acquire() as conn:
+            query = """
+            SELECT result, processing_time_ms, created_at
+            FROM fall_detections
+            WHERE created_at >= $1 AND created_at < $2
+            """
+            async with conn.transaction():
+                async for row in conn.cursor(query, start, until, prefetch=10000):
+                    yield row["created_at"], row["result"], row["processing_time_ms"]
+    
+    async def _insert_results(self, rows: List[Dict]) -> Dict[str, datetime]:
+        """Satırları tek INSERT ile yaz, eklenenlerin created_at'ini döndür"""
+        sizes = [parse_image_size(row.get("image_size")) for row in rows]
+        async with self._acquire() as conn:
+            inserted = await conn.fetch(
+                INSERT_QUERY,
+                [bytes.fromhex(row["image_hash"]) for row in rows],
+                [row["result"] for row in rows],
+                [row.get("confidence") for row in rows],
+                [width for width, _ in sizes],
+                [height for _, height in sizes],
+                [row.get("processing_time_ms") for row in rows],
+                [to_signed(row["phash"]) if row.get("phash") is not None else None for row in rows],
+                [row.get("created_at") for row in rows],
+            )
+        return {bytes(record["image_hash"]).hex(): record["created_at"] for record in inserted}
             
     async def get_statistics(self) -> Dict:
         """Genel istatistikleri getir"""
-        query = """
-        SELECT 
-            COUNT(*) as total_processed,
-            COUNT(CASE WHEN result = 'Yes' THEN 1 END) as fall_detected,
-            COUNT(CASE WHEN result = 'No' THEN 1 END) as no_fall,
-            AVG(processing_time_ms) as avg_processing_time,
-            COUNT(DISTINCT DATE(created_at)) as days_active
-        FROM fall_detections
-        """
-        
-        async with self.pool.acquire() as conn:
-            row = await conn.fetchrow(query)
+        async with self._acquire() as conn:
+            row = await conn.fetchrow(STATISTICS_QUERY)
             return {
                 "total_processed": row["total_processed"],
                 "fall_detected": row["fall_detected"],
@@ -119,5 +559,15 @@ class DatabaseManager:
                 "days_active": row["days_active"]
             }
 
-# Global database manager instance
-db_manager = DatabaseManager()
+def create_result_store() -> ResultStore:
+    """RESULT_STORE ayarına göre sonuç deposunu oluştur"""
+    if RESULT_STORE == "sqlite":
+        # Imported lazily so a Postgres deployment never touches it
+        from sqlite_store import SQLiteResultStore
+        return SQLiteResultStore()
+    if RESULT_STORE != "postgres":
+        raise ValueError(f"Unknown RESULT_STORE: {RESULT_STORE} (expected postgres or sqlite)")
+    return DatabaseManager()
+
+# Global result store instance
+db_manager = create_result_store()
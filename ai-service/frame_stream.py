@@ -0,0 +1,188 @@
+import asyncio
+import json
+import logging
+import struct
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from starlette.websockets import WebSocket
+
+# Every binary frame starts with the client's sequence id (unsigned 64-bit, big-endian)
+FRAME_HEADER = struct.Struct(">Q")
+
+
+class FrameStreamStats:
+    """Tüm akış bağlantılarının ortak metrikleri"""
+
+    def __init__(self):
+        self.connections_open = 0
+        self.connections_total = 0
+        self.frames_received = 0
+        self.frames_rejected = 0
+        self.results_sent = 0
+        self.errors_sent = 0
+        self.batches = 0
+
+    def stats(self) -> Dict:
+        """Akış metrikleri"""
+        return {
+            "connections_open": self.connections_open,
+            "connections_total": self.connections_total,
+            "frames_received": self.frames_received,
+            "frames_rejected": self.frames_rejected,
+            "results_sent": self.results_sent,
+            "errors_sent": self.errors_sent,
+            "avg_batch_size": round(self.frames_received / self.batches, 2) if self.batches else 0,
+        }
+
+
+class FrameStream:
+    """Tek WebSocket bağlantısı üzerinden sıra numaralı kare akışı.
+
+    The client pushes binary messages (an 8-byte sequence id followed by
+    the encoded image) and gets one JSON message back per frame, tagged
+    with that sequence id, in whatever order the frames finish. At most
+    ``credits`` frames may be unanswered at once; each reply returns one
+    credit and frames sent beyond the limit are rejected straight away.
+
+    Frames are handed to ``handle_batch`` in groups: the dispatcher takes
+    everything queued (up to ``max_batch``) and waits for the handler's
+    first stage (e.g. the cache lookup) before taking the next group, so
+    batches grow on their own while that stage is slow. If the handler
+    returns an awaitable, that second stage (e.g. inference) runs as a
+    separate task and later groups are not held up behind it.
+    """
+
+    def __init__(
+        self,
+        websocket: WebSocket,
+        handle_batch: Callable[["FrameStream", List[Dict]], Awaitable[Optional[Awaitable[Any]]]],
+        credits: int = 8,
+        max_batch: int = 8,
+        max_frame_bytes: int = 10 * 1024 * 1024,
+        metrics: Optional[FrameStreamStats] = None,
+    ):
+        self.websocket = websocket
+        self.handle_batch = handle_batch
+        self.credits = max(1, credits)
+        self.max_batch = max(1, max_batch)
+        self.max_frame_bytes = max_frame_bytes
+        self.metrics = metrics or FrameStreamStats()
+        self._frames: asyncio.Queue = asyncio.Queue()
+        self._outstanding = 0
+        self._send_lock = asyncio.Lock()
+        self._tasks = set()
+        self._closed = False
+
+    async def run(self):
+        """Bağlantıyı kabul et ve kapanana kadar kareleri işle"""
+        await self.websocket.accept()
+        self.metrics.connections_open += 1
+        self.metrics.connections_total += 1
+        dispatcher = asyncio.create_task(self._dispatch())
+        try:
+            await self._send({
+                "type": "ready",
+                "credits": self.credits,
+                "max_frame_bytes": self.max_frame_bytes,
+            })
+            await self._receive()
+        finally:
+            # Frames already handed to the model still finish and are saved;
+            # only their replies have nowhere to go
+            self._closed = True
+            dispatcher.cancel()
+            self.metrics.connections_open -= 1
+
+    async def reply(self, frame: Dict, result: Dict):
+        """Kare için sonucu gönder ve krediyi geri ver"""
+        if self._answer(frame):
+            self.metrics.results_sent += 1
+            await self._send(dict(result, type="result", seq=frame["seq"]))
+
+    async def fail(self, frame: Dict, error: str, retry: bool = False):
+        """Kare için hata gönder ve krediyi geri ver"""
+        if self._answer(frame):
+            self.metrics.errors_sent += 1
+            await self._send({"type": "error", "seq": frame["seq"], "error": error, "retry": retry})
+
+    def _answer(self, frame: Dict) -> bool:
+        if frame["answered"]:
+            return False
+        frame["answered"] = True
+        self._outstanding -= 1
+        return True
+
+    async def _reject(self, seq: Optional[int], error: str, retry: bool = False):
+        """Kabul edilmeyen kare için hata (kredi harcanmaz)"""
+        self.metrics.frames_rejected += 1
+        await self._send({"type": "error", "seq": seq, "error": error, "retry": retry})
+
+    async def _send(self, message: Dict):
+        if self._closed:
+            return
+        # Replies come from several tasks; one frame on the wire at a time
+        async with self._send_lock:
+            try:
+                await self.websocket.send_text(json.dumps(message))
+            except Exception:
+                self._closed = True
+
+    async def _receive(self):
+        while True:
+            message = await self.websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                return
+
+            data = message.get("bytes")
+            if data is None:
+                await self._reject(None, "Frames must be binary: 8-byte sequence id + image")
+                continue
+            if len(data) < FRAME_HEADER.size:
+                await self._reject(None, "Frame must start with an 8-byte sequence id")
+                continue
+
+            (seq,) = FRAME_HEADER.unpack_from(data)
+            if len(data) - FRAME_HEADER.size > self.max_frame_bytes:
+                await self._reject(seq, f"Frame larger than {self.max_frame_bytes} bytes")
+                continue
+            if self._outstanding >= self.credits:
+                await self._reject(seq, "No credits left, wait for a result", retry=True)
+                continue
+
+            self._outstanding += 1
+            self.metrics.frames_received += 1
+            self._frames.put_nowait({
+                "seq": seq,
+                # A view, not a copy of the image
+                "data": memoryview(data)[FRAME_HEADER.size:],
+                "answered": False,
+            })
+
+    async def _dispatch(self):
+        while True:
+            batch = [await self._frames.get()]
+            while len(batch) < self.max_batch and not self._frames.empty():
+                batch.append(self._frames.get_nowait())
+            self.metrics.batches += 1
+
+            try:
+                rest = await self.handle_batch(self, batch)
+            except Exception as e:
+                await self._fail_unanswered(batch, e)
+                continue
+
+            if rest is not None:
+                task = asyncio.ensure_future(self._finish(batch, rest))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+
+    async def _finish(self, batch: List[Dict], rest: Awaitable[Any]):
+        try:
+            await rest
+        except Exception as e:
+            await self._fail_unanswered(batch, e)
+
+    async def _fail_unanswered(self, batch: List[Dict], error: Exception):
+        logging.error(f"❌ Stream batch failed: {error}")
+        for frame in batch:
+            await self.fail(frame, f"Processing failed: {error}")
@@ -0,0 +1,91 @@
+import io
+import math
+from typing import BinaryIO, Tuple, Union
+
+from PIL import Image
+
+
+# Encoded image: bytes, a view into a received message (WebSocket frames) or
+# an open binary file (the spooled upload of an HTTP request)
+ImageSource = Union[bytes, bytearray, memoryview, BinaryIO]
+
+
+class ImageTooLargeError(ValueError):
+    """Görsel izin verilen piksel sayısını aşıyor"""
+
+
+class _ViewReader(io.RawIOBase):
+    """Bir buffer'ı kopyalamadan dosya gibi okutur.
+
+    io.BytesIO shares a bytes object but copies any other buffer, so a
+    memoryview handed to it would be duplicated in full. This reader
+    serves Pillow's chunked reads straight out of the view.
+    """
+
+    def __init__(self, data: Union[bytearray, memoryview]):
+        self._view = memoryview(data).cast("B")
+        self._pos = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def readinto(self, b) -> int:
+        n = max(0, min(len(b), len(self._view) - self._pos))
+        b[:n] = self._view[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        base = {io.SEEK_SET: 0, io.SEEK_CUR: self._pos, io.SEEK_END: len(self._view)}[whence]
+        self._pos = max(0, base + offset)
+        return self._pos
+
+    def tell(self) -> int:
+        return self._pos
+
+
+def _open(image_bytes: ImageSource) -> Image.Image:
+    """Görseli kopyasız aç (yalnızca başlık okunur)"""
+    if isinstance(image_bytes, bytes):
+        fp = io.BytesIO(image_bytes)
+    elif isinstance(image_bytes, (bytearray, memoryview)):
+        fp = _ViewReader(image_bytes)
+    else:
+        # Files are read again from the start for every header check or decode
+        fp = image_bytes
+        fp.seek(0)
+    return Image.open(fp)
+
+
+def image_dimensions(image_bytes: ImageSource) -> Tuple[int, int]:
+    """Görselin boyutunu yalnızca başlığını okuyarak bul"""
+    return _open(image_bytes).size
+
+
+def decode_image(image_bytes: ImageSource, max_side: int = 0, max_pixels: int = 0) -> Tuple[Image.Image, Tuple[int, int]]:
+    """Görseli RGB olarak çöz; (görüntü, orijinal boyut) döndür.
+
+    The header is read first, so images above max_pixels are refused
+    before any pixel data is decoded. JPEGs larger than max_side are
+    decoded in draft mode: libjpeg scales the DCT blocks by 1/2, 1/4 or
+    1/8 while decoding, which is several times faster and smaller than a
+    full decode followed by a resize. Draft mode never goes below the
+    requested size, so the result is still at least max_side on its long
+    side; other formats are decoded at full size.
+    """
+    image = _open(image_bytes)
+    width, height = image.size
+    if max_pixels and width * height > max_pixels:
+        raise ImageTooLargeError(
+            f"Image is {width}x{height} ({width * height / 1e6:.1f} MP), limit is {max_pixels / 1e6:.1f} MP"
+        )
+
+    if max_side and max(width, height) > max_side:
+        scale = max_side / max(width, height)
+        # No-op for formats other than JPEG
+        image.draft("RGB", (math.ceil(width * scale), math.ceil(height * scale)))
+
+    return image.convert("RGB"), (width, height)
@@ -0,0 +1,72 @@
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Callable, Dict
+
+
+class InferenceQueueFullError(RuntimeError):
+    """Raised when the in-flight inference limit is reached"""
+
+
+class InferenceExecutor:
+    """Bloklayan model çağrılarını event loop dışında çalıştırır.
+
+    Inference runs on a dedicated thread pool so ``torch`` never blocks
+    the uvicorn event loop. ``admit`` bounds how many images may be
+    queued or running at once; callers beyond that limit are rejected
+    immediately instead of piling up behind the model.
+    """
+
+    def __init__(self, max_workers: int = 1, max_in_flight: int = 32):
+        self.max_workers = max(1, max_workers)
+        self.max_in_flight = max(1, max_in_flight)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="inference")
+        self.in_flight = 0
+
+        # Metrics
+        self.rejected = 0
+        self.completed = 0
+        self.busy_time_ms = 0.0
+
+    @contextmanager
+    def admit(self, count: int = 1):
+        """İstekleri kapasite varsa kabul et, yoksa hemen reddet"""
+        if self.in_flight + count > self.max_in_flight:
+            self.rejected += count
+            raise InferenceQueueFullError(
+                f"Inference queue full ({self.in_flight}/{self.max_in_flight} in flight)"
+            )
+
+        self.in_flight += count
+        try:
+            yield
+        finally:
+            self.in_flight -= count
+
+    async def run(self, fn: Callable, *args) -> Any:
+        """Fonksiyonu worker thread'inde çalıştır ve sonucunu bekle"""
+        loop = asyncio.get_running_loop()
+        start_time = time.time()
+        try:
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.completed += 1
+            self.busy_time_ms += (time.time() - start_time) * 1000
+
+    def shutdown(self):
+        """Worker thread'lerini kapat"""
+        logging.info("🧵 Shutting down inference executor...")
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def stats(self) -> Dict:
+        """Executor metrikleri"""
+        return {
+            "workers": self.max_workers,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight,
+            "rejected": self.rejected,
+            "completed_calls": self.completed,
+            "busy_time_ms": round(self.busy_time_ms, 1),
+        }
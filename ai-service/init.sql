@@ -3,26 +3,205 @@
 -- Create database if not exists (for manual setup)
 -- CREATE DATABASE IF NOT EXISTS fall_detection;
 
--- Create main table for fall detection results
+-- Create main table for fall detection results, range-partitioned by created_at.
+-- The service creates the dated partitions (see ensure_fall_detection_partitions)
+-- and drops expired ones; rows outside every partition land in the default one.
 CREATE TABLE IF NOT EXISTS fall_detections (
-    id SERIAL PRIMARY KEY,
-    image_hash VARCHAR(64) UNIQUE NOT NULL,
+    id BIGSERIAL,
+    image_hash BYTEA NOT NULL CHECK (octet_length(image_hash) = 32),  -- raw SHA256
     result VARCHAR(10) NOT NULL CHECK (result IN ('Yes', 'No')),
     confidence FLOAT CHECK (confidence >= 0.0 AND confidence <= 1.0),
-    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-    image_size VARCHAR(20),
+    image_width SMALLINT,
+    image_height SMALLINT,
     processing_time_ms INTEGER CHECK (processing_time_ms >= 0),
     votes_yes INTEGER DEFAULT 0,
     votes_no INTEGER DEFAULT 0,
-    total_crops INTEGER DEFAULT 1
+    total_crops INTEGER DEFAULT 1,
+    phash BIGINT,  -- 64-bit dHash (signed) for near-duplicate lookups
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE IF NOT EXISTS fall_detections_default PARTITION OF fall_detections DEFAULT;
+
+-- Create one partition per interval_days from from_day up to premake intervals ahead
+CREATE OR REPLACE FUNCTION ensure_fall_detection_partitions(
+    interval_days INT, premake INT, from_day DATE DEFAULT CURRENT_DATE
+) RETURNS INT AS $$
+DECLARE
+    start_day DATE := from_day - ((from_day - DATE '1970-01-01') % interval_days);
+    last_day DATE := CURRENT_DATE + premake * interval_days;
+    partition_name TEXT;
+    created INT := 0;
+    moved BIGINT;
+BEGIN
+    WHILE start_day <= last_day LOOP
+        partition_name := 'fall_detections_p' || to_char(start_day, 'YYYYMMDD');
+        IF to_regclass(partition_name) IS NULL THEN
+            -- Rows of this range already in the default partition would make
+            -- CREATE ... PARTITION OF fail: move them out and back in through
+            -- the parent, so the rollup triggers subtract and re-add them
+            moved := 0;
+            IF EXISTS (
+                SELECT 1 FROM fall_detections_default
+                WHERE created_at >= start_day AND created_at < start_day + interval_days
+            ) THEN
+                CREATE TEMP TABLE IF NOT EXISTS fall_detections_moving (LIKE fall_detections) ON COMMIT DROP;
+                WITH rows_out AS (
+                    DELETE FROM fall_detections
+                    WHERE created_at >= start_day AND created_at < start_day + interval_days
+                    RETURNING *
+                )
+                INSERT INTO fall_detections_moving SELECT * FROM rows_out;
+                GET DIAGNOSTICS moved = ROW_COUNT;
+            END IF;
+            
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF fall_detections FOR VALUES FROM (%L) TO (%L)',
+                partition_name, start_day, start_day + interval_days
+            );
+            created := created + 1;
+            
+            IF moved > 0 THEN
+                INSERT INTO fall_detections SELECT * FROM fall_detections_moving;
+                TRUNCATE fall_detections_moving;
+            END IF;
+        END IF;
+        start_day := start_day + interval_days;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+SELECT ensure_fall_detection_partitions(7, 3);
+
+-- A partitioned table cannot have a unique index on image_hash alone:
+-- serialise inserts per hash and skip rows whose hash is already stored
+CREATE OR REPLACE FUNCTION skip_duplicate_image_hash() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext(encode(NEW.image_hash, 'hex')));
+    IF EXISTS (
+        SELECT 1 FROM fall_detections
+        WHERE substring(image_hash from 1 for 8) = substring(NEW.image_hash from 1 for 8)
+          AND image_hash = NEW.image_hash
+    ) THEN
+        RETURN NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER skip_duplicate_image_hash
+    BEFORE INSERT ON fall_detections
+    FOR EACH ROW
+    EXECUTE FUNCTION skip_duplicate_image_hash();
+
+-- Per-day counters, so statistics do not need to scan fall_detections
+CREATE TABLE IF NOT EXISTS fall_detection_daily_stats (
+    day DATE PRIMARY KEY,
+    total_processed BIGINT NOT NULL DEFAULT 0,
+    fall_detected BIGINT NOT NULL DEFAULT 0,
+    no_fall BIGINT NOT NULL DEFAULT 0,
+    processing_time_sum BIGINT NOT NULL DEFAULT 0,
+    processing_time_count BIGINT NOT NULL DEFAULT 0
 );
 
--- Create indexes for better performance
-CREATE INDEX IF NOT EXISTS idx_image_hash ON fall_detections(image_hash);
+-- Statement-level triggers keep the counters in step with every insert,
+-- delete and update on fall_detections, whoever runs it (transition tables
+-- are only allowed on single-event triggers, hence one trigger per event)
+CREATE OR REPLACE FUNCTION fall_detection_daily_stats_apply() RETURNS TRIGGER AS $$
+BEGIN
+    IF TG_OP IN ('DELETE', 'UPDATE') THEN
+        UPDATE fall_detection_daily_stats AS s SET
+            total_processed = s.total_processed - r.total_processed,
+            fall_detected = s.fall_detected - r.fall_detected,
+            no_fall = s.no_fall - r.no_fall,
+            processing_time_sum = s.processing_time_sum - r.processing_time_sum,
+            processing_time_count = s.processing_time_count - r.processing_time_count
+        FROM (
+            SELECT
+                created_at::date AS day,
+                COUNT(*) AS total_processed,
+                COUNT(*) FILTER (WHERE result = 'Yes') AS fall_detected,
+                COUNT(*) FILTER (WHERE result = 'No') AS no_fall,
+                COALESCE(SUM(processing_time_ms), 0) AS processing_time_sum,
+                COUNT(processing_time_ms) AS processing_time_count
+            FROM old_rows
+            GROUP BY 1
+        ) r
+        WHERE s.day = r.day;
+        
+        DELETE FROM fall_detection_daily_stats WHERE total_processed <= 0;
+    END IF;
+    
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        INSERT INTO fall_detection_daily_stats AS s
+            (day, total_processed, fall_detected, no_fall, processing_time_sum, processing_time_count)
+        SELECT
+            created_at::date,
+            COUNT(*),
+            COUNT(*) FILTER (WHERE result = 'Yes'),
+            COUNT(*) FILTER (WHERE result = 'No'),
+            COALESCE(SUM(processing_time_ms), 0),
+            COUNT(processing_time_ms)
+        FROM new_rows
+        GROUP BY 1
+        ON CONFLICT (day) DO UPDATE SET
+            total_processed = s.total_processed + EXCLUDED.total_processed,
+            fall_detected = s.fall_detected + EXCLUDED.fall_detected,
+            no_fall = s.no_fall + EXCLUDED.no_fall,
+            processing_time_sum = s.processing_time_sum + EXCLUDED.processing_time_sum,
+            processing_time_count = s.processing_time_count + EXCLUDED.processing_time_count;
+    END IF;
+    RETURN NULL;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER fall_detection_daily_stats_insert
+    AFTER INSERT ON fall_detections
+    REFERENCING NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION fall_detection_daily_stats_apply();
+
+CREATE TRIGGER fall_detection_daily_stats_delete
+    AFTER DELETE ON fall_detections
+    REFERENCING OLD TABLE AS old_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION fall_detection_daily_stats_apply();
+
+CREATE TRIGGER fall_detection_daily_stats_update
+    AFTER UPDATE ON fall_detections
+    REFERENCING OLD TABLE AS old_rows NEW TABLE AS new_rows
+    FOR EACH STATEMENT
+    EXECUTE FUNCTION fall_detection_daily_stats_apply();
+
+-- Rebuilds the rollup for [from_day, to_day) from the rows left in
+-- fall_detections; dropping a partition removes rows without firing the
+-- DELETE trigger
+CREATE OR REPLACE FUNCTION recompute_fall_detection_daily_stats(from_day DATE, to_day DATE) RETURNS VOID AS $$
+BEGIN
+    DELETE FROM fall_detection_daily_stats WHERE day >= from_day AND day < to_day;
+    INSERT INTO fall_detection_daily_stats
+        (day, total_processed, fall_detected, no_fall, processing_time_sum, processing_time_count)
+    SELECT
+        created_at::date,
+        COUNT(*),
+        COUNT(*) FILTER (WHERE result = 'Yes'),
+        COUNT(*) FILTER (WHERE result = 'No'),
+        COALESCE(SUM(processing_time_ms), 0),
+        COUNT(processing_time_ms)
+    FROM fall_detections
+    WHERE created_at >= from_day AND created_at < to_day
+    GROUP BY 1;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Create indexes for better performance (only what lookups use: every extra
+-- index is paid for on each insert)
+-- Hash lookups match on the first 8 bytes, then compare the full hash
+CREATE INDEX IF NOT EXISTS idx_image_hash_prefix ON fall_detections ((substring(image_hash from 1 for 8)));
 CREATE INDEX IF NOT EXISTS idx_created_at ON fall_detections(created_at);
-CREATE INDEX IF NOT EXISTS idx_result ON fall_detections(result);
-CREATE INDEX IF NOT EXISTS idx_processing_time ON fall_detections(processing_time_ms);
 
 -- Create function to update updated_at timestamp
 CREATE OR REPLACE FUNCTION update_updated_at_column()
@@ -40,11 +219,10 @@ CREATE TRIGGER update_fall_detections_updated_at
     EXECUTE FUNCTION update_updated_at_column();
 
 -- Insert some sample data for testing (optional)
-INSERT INTO fall_detections (image_hash, result, confidence, image_size, processing_time_ms, votes_yes, votes_no, total_crops) 
+INSERT INTO fall_detections (image_hash, result, confidence, image_width, image_height, processing_time_ms, votes_yes, votes_no, total_crops) 
 VALUES 
-    ('sample_hash_1', 'Yes', 0.85, '640x480', 1250, 2, 1, 3),
-    ('sample_hash_2', 'No', 0.92, '1920x1080', 890, 0, 3, 3)
-ON CONFLICT (image_hash) DO NOTHING;
+    (sha256('sample_hash_1'), 'Yes', 0.85, 640, 480, 1250, 2, 1, 3),
+    (sha256('sample_hash_2'), 'No', 0.92, 1920, 1080, 890, 0, 3, 3);
 
 -- Create view for statistics
 CREATE OR REPLACE VIEW fall_detection_stats AS
@@ -0,0 +1,132 @@
+import math
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+# Bucket width in seconds per granularity
+GRANULARITIES = {
+    "minute": 60,
+    "hour": 3600,
+    "day": 86400,
+}
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+class LatencySketch:
+    """Sabit göreli hatalı gecikme dağılımı (DDSketch).
+
+    Values are counted in logarithmic bins whose width grows with the
+    value, so any quantile is returned within ``relative_accuracy`` of the
+    true one while a whole day of latencies fits in a few hundred bins.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01):
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self._gamma)
+        self._bins: Dict[int, int] = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def add(self, value: float):
+        """Bir ölçümü ekle"""
+        self.count += 1
+        if value <= 0:
+            self.zero_count += 1
+            return
+        key = math.ceil(math.log(value) / self._log_gamma)
+        self._bins[key] = self._bins.get(key, 0) + 1
+
+    def quantile(self, q: float) -> Optional[float]:
+        """q (0-1) yüzdelik değerini tahmin et (boşsa None)"""
+        if self.count == 0:
+            return None
+
+        rank = q * (self.count - 1)
+        seen = self.zero_count
+        if rank < seen:
+            return 0.0
+        for key in sorted(self._bins):
+            seen += self._bins[key]
+            if rank < seen:
+                # Midpoint of the bin in relative terms
+                return 2 * self._gamma ** key / (self._gamma + 1)
+        return 2 * self._gamma ** max(self._bins) / (self._gamma + 1)
+
+
+class TimeBucketedStats:
+    """Dakika/saat/gün kovalarında sayaç ve gecikme dağılımları tutar.
+
+    Every recorded result lands in one bucket per granularity; each
+    bucket keeps the count, the number of falls and a LatencySketch of
+    processing times. Only the newest ``retention[granularity]`` buckets
+    are kept, so memory stays bounded however long the service runs.
+    """
+
+    def __init__(self, retention: Dict[str, int], relative_accuracy: float = 0.01):
+        self.retention = {name: max(1, retention.get(name, 1)) for name in GRANULARITIES}
+        self.relative_accuracy = relative_accuracy
+        self._buckets: Dict[str, Dict[int, Dict]] = {name: {} for name in GRANULARITIES}
+
+        # Metrics
+        self.recorded = 0
+
+    def record(self, created_at: datetime, result: str, processing_time_ms: Optional[int]):
+        """Bir sonucu her granülaritedeki kovasına ekle"""
+        seconds = int((created_at - _EPOCH).total_seconds())
+        for name, width in GRANULARITIES.items():
+            buckets = self._buckets[name]
+            start = seconds - seconds % width
+            bucket = buckets.get(start)
+            if bucket is None:
+                if len(buckets) >= self.retention[name] and start < min(buckets):
+                    continue  # Older than everything we keep
+                bucket = buckets[start] = {
+                    "count": 0,
+                    "fall_detected": 0,
+                    "latency": LatencySketch(self.relative_accuracy),
+                }
+                while len(buckets) > self.retention[name]:
+                    del buckets[min(buckets)]
+
+            bucket["count"] += 1
+            if result == "Yes":
+                bucket["fall_detected"] += 1
+            if processing_time_ms is not None:
+                bucket["latency"].add(processing_time_ms)
+        self.recorded += 1
+
+    def series(self, granularity: str, limit: Optional[int] = None) -> List[Dict]:
+        """Granülaritedeki kovaları eskiden yeniye döndür"""
+        buckets = self._buckets[granularity]
+        starts = sorted(buckets)
+        if limit is not None:
+            starts = starts[-limit:] if limit > 0 else []
+
+        series = []
+        for start in starts:
+            bucket = buckets[start]
+            latency = bucket["latency"]
+            series.append({
+                "start": (_EPOCH + timedelta(seconds=start)).isoformat(),
+                "count": bucket["count"],
+                "fall_detected": bucket["fall_detected"],
+                "fall_rate": round(bucket["fall_detected"] / bucket["count"], 4),
+                "p50_ms": _round(latency.quantile(0.50)),
+                "p95_ms": _round(latency.quantile(0.95)),
+                "p99_ms": _round(latency.quantile(0.99)),
+            })
+        return series
+
+    def stats(self) -> Dict:
+        """Kova metrikleri"""
+        return {
+            "recorded": self.recorded,
+            "buckets": {name: len(buckets) for name, buckets in self._buckets.items()},
+            "retention": dict(self.retention),
+            "relative_accuracy": self.relative_accuracy,
+        }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 1) if value is not None else None
@@ -1,18 +1,25 @@
-from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks
+from fastapi import FastAPI, File, UploadFile, HTTPException, BackgroundTasks, WebSocket
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import torch
 from PIL import Image
-import io
 import time
 import logging
 import asyncio
-from typing import List, Optional
+import os
+from typing import BinaryIO, Dict, List, Optional, Tuple
 from contextlib import asynccontextmanager
 import uvloop
 
 from database import db_manager
+from latency_stats import GRANULARITIES
 from model_service import ModelService
+from inference_executor import InferenceQueueFullError
+from single_flight import SingleFlight
+from frame_stream import FrameStream, FrameStreamStats
+from motion_gate import MotionGate
+from image_decode import ImageSource, ImageTooLargeError, decode_image, image_dimensions
+from upload_stream import MULTIPART_OVERHEAD_BYTES, UploadLimitMiddleware, UploadTooLargeError, read_upload, take_upload
 
 # Setup logging
 logging.basicConfig(
@@ -20,9 +27,64 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
+# Batch endpoint limits
+BATCH_CONFIG = {
+    "max_files": int(os.getenv("BATCH_MAX_FILES", "10")),
+    # Decoded RGB images of one batch held in memory at once (~3 bytes per pixel)
+    "max_megapixels": float(os.getenv("BATCH_MAX_MEGAPIXELS", "40")),
+}
+
+# WebSocket frame streaming: unanswered frames allowed per connection, frames
+# looked up together, and the largest accepted image
+STREAM_CONFIG = {
+    "credits": int(os.getenv("STREAM_CREDITS", "8")),
+    "max_batch": int(os.getenv("STREAM_MAX_BATCH", "8")),
+    "max_frame_bytes": int(os.getenv("STREAM_MAX_FRAME_BYTES", str(10 * 1024 * 1024))),
+}
+
+# Per-camera motion gating (requests that pass camera_id): frames where fewer
+# than threshold of the pixels changed by more than pixel_delta, at size px on
+# the long side, reuse the camera's last result for up to max_static_s
+MOTION_GATE_CONFIG = {
+    "enabled": os.getenv("MOTION_GATE_ENABLED", "true").lower() == "true",
+    "threshold": float(os.getenv("MOTION_GATE_THRESHOLD", "0.01")),
+    "pixel_delta": int(os.getenv("MOTION_GATE_PIXEL_DELTA", "12")),
+    "size": int(os.getenv("MOTION_GATE_SIZE", "64")),
+    "max_static_s": float(os.getenv("MOTION_GATE_MAX_STATIC_S", "60")),
+    "max_cameras": int(os.getenv("MOTION_GATE_MAX_CAMERAS", "1000")),
+}
+
+# Image decoding: JPEGs are decoded straight at about max_side px on the long
+# side (the model's input size, 0 = full resolution); uploads above
+# max_megapixels are refused before their pixels are decoded
+DECODE_CONFIG = {
+    "max_side": int(os.getenv("DECODE_MAX_SIDE", "1536")),
+    "max_megapixels": float(os.getenv("DECODE_MAX_MEGAPIXELS", "24")),
+}
+
+# Uploads are read and hashed in chunk_bytes pieces; larger than max_bytes is refused (413)
+UPLOAD_CONFIG = {
+    "max_bytes": int(os.getenv("UPLOAD_MAX_BYTES", str(20 * 1024 * 1024))),
+    "chunk_bytes": int(os.getenv("UPLOAD_CHUNK_BYTES", str(64 * 1024))),
+}
+
 # Global model service instance
 model_service = None
 
+# Concurrent requests for the same image hash share one inference
+in_flight = SingleFlight()
+
+# Metrics shared by all streaming connections
+stream_stats = FrameStreamStats()
+
+motion_gate = MotionGate(
+    threshold=MOTION_GATE_CONFIG["threshold"],
+    pixel_delta=MOTION_GATE_CONFIG["pixel_delta"],
+    size=MOTION_GATE_CONFIG["size"],
+    max_static_s=MOTION_GATE_CONFIG["max_static_s"],
+    max_cameras=MOTION_GATE_CONFIG["max_cameras"],
+) if MOTION_GATE_CONFIG["enabled"] else None
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Application lifespan management"""
@@ -46,6 +108,7 @@ async def lifespan(app: FastAPI):
     logging.info("🛑 Shutting down...")
     if model_service:
         await model_service.cleanup()
+    # Flushes the write-behind buffer before the store closes
     await db_manager.disconnect()
 
 # Create FastAPI app
@@ -56,6 +119,16 @@ app = FastAPI(
     lifespan=lifespan
 )
 
+# Upload bodies are cut off while they are received, not after the
+# multipart parser has spooled them (added first so CORS wraps its 413)
+app.add_middleware(
+    UploadLimitMiddleware,
+    limits={
+        "/detect-fall/": UPLOAD_CONFIG["max_bytes"] + MULTIPART_OVERHEAD_BYTES,
+        "/detect-fall-batch/": BATCH_CONFIG["max_files"] * (UPLOAD_CONFIG["max_bytes"] + MULTIPART_OVERHEAD_BYTES),
+    },
+)
+
 # Add CORS middleware
 app.add_middleware(
     CORSMiddleware,
@@ -99,8 +172,284 @@ async def health_check():
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Health check failed: {str(e)}")
 
+def _decode_image(image_bytes: ImageSource, camera_id: Optional[str] = None) -> Dict:
+    """Görseli model boyutunda çöz ve perceptual hash'ini hesapla (worker thread'de çalışır).
+    
+    Returns the RGB image, its uploaded size as "WxH", the upload-to-decoded
+    scale and its dHash, plus the motion gate's reduced frame for requests
+    with a camera_id, so the per-pixel work never runs on the event loop.
+    """
+    image, (width, height) = decode_image(
+        image_bytes,
+        max_side=DECODE_CONFIG["max_side"],
+        max_pixels=int(DECODE_CONFIG["max_megapixels"] * 1e6),
+    )
+    return {
+        "image": image,
+        "image_size": f"{width}x{height}",
+        "scale": (width / image.width, height / image.height),
+        "phash": db_manager.calculate_perceptual_hash(image),
+        "frame": motion_gate.frame(image) if camera_id and motion_gate else None,
+    }
+
+def _image_pixels(image_bytes: ImageSource) -> int:
+    """Görselin piksel sayısını yalnızca başlığını okuyarak bul"""
+    width, height = image_dimensions(image_bytes)
+    return width * height
+
+def _image_pixels_many(images: Dict[str, ImageSource]) -> Dict[str, object]:
+    """Her görselin piksel sayısı ya da başlık okuma hatası (worker thread'de çalışır)"""
+    measured = {}
+    for image_hash, image_bytes in images.items():
+        try:
+            measured[image_hash] = _image_pixels(image_bytes)
+        except Exception as e:
+            measured[image_hash] = e
+    return measured
+
+def _scale_crops(crops: Dict, scale: Tuple[float, float]) -> Dict:
+    """Çözülmüş görseldeki crop kutularını yüklenen görselin koordinatlarına çevir"""
+    scale_x, scale_y = scale
+    return {
+        "source": crops["source"],
+        "boxes": [
+            [round(left * scale_x), round(top * scale_y), round(right * scale_x), round(bottom * scale_y)]
+            for left, top, right, bottom in crops["boxes"]
+        ],
+    }
+
+def _build_response(image_hash: str, result: Dict, image_size: str, processing_time: int,
+                    scale: Tuple[float, float] = (1.0, 1.0)) -> Dict:
+    """Yeni işlenmiş bir görsel için API cevabı"""
+    response = {
+        "image_hash": image_hash,
+        "result": result["result"],
+        "confidence": result.get("confidence"),
+        "image_size": image_size,
+        "processing_time_ms": processing_time,
+        "cached": False
+    }
+    if result.get("prefilter"):
+        response["prefilter"] = result["prefilter"]
+    if result.get("crops"):
+        # Reported in the uploaded image's coordinates, like image_size
+        response["crops"] = _scale_crops(result["crops"], scale)
+    return response
+
+def _motion_seq(camera_id: Optional[str]) -> Optional[int]:
+    """Kameralı isteğe geliş sırası numarası ver"""
+    return motion_gate.next_seq() if camera_id and motion_gate else None
+
+def _motion_check(camera_id: Optional[str], frame, image: Image.Image, image_hash: str):
+    """Kameranın sahnesi durağansa son sonucunu döndür; (kare, sonuç, hareket bölgeleri)"""
+    if frame is None:
+        return None, None, None
+    
+    gated = motion_gate.check(camera_id, frame)
+    if gated:
+        gated.update({
+            "image_hash": image_hash,
+            "matched_hash": gated["image_hash"],
+            "cached": "motion",
+        })
+        logging.info(f"🧊 Static scene on camera {camera_id}, reusing last result for {image_hash[:8]}...")
+        return frame, gated, None
+    
+    # Where it moved: crop proposals for MODEL_CROPS=motion
+    region = motion_gate.region(camera_id, frame, image.size)
+    return frame, None, [region] if region else None
+
+def _motion_update(camera_id: Optional[str], frame, response: Dict, seq: Optional[int]):
+    """Analiz edilen kareyi kameranın yeni referansı yap (daha yeni bir kare gelmediyse)"""
+    if frame is not None:
+        motion_gate.update(camera_id, frame, response, seq)
+
+async def _process_new_image(image_bytes: ImageSource, image_hash: str, camera_id: Optional[str] = None,
+                             seq: Optional[int] = None) -> Dict:
+    """Cache'te olmayan bir görseli işler ve sonucu kaydeder"""
+    start_time = time.time()
+    
+    # Decode and hash off the event loop; image_size stays the uploaded resolution
+    decoded = await asyncio.to_thread(_decode_image, image_bytes, camera_id)
+    image, image_size, phash = decoded["image"], decoded["image_size"], decoded["phash"]
+    
+    # Nothing moved since this camera's last analysed frame? Not saved: the
+    # result belongs to that frame, not to this hash
+    frame, gated, regions = _motion_check(camera_id, decoded["frame"], image, image_hash)
+    if gated:
+        return gated
+    
+    # Near-duplicate of a frame we already processed?
+    near_result = await db_manager.find_near_duplicate(image_hash, phash)
+    if near_result:
+        logging.info(f"🔁 Near-duplicate hit for {image_hash[:8]}... (distance {near_result['hash_distance']})")
+        _motion_update(camera_id, frame, near_result, seq)
+        return near_result
+    
+    # Run fall detection
+    result = await model_service.detect_fall(image, regions)
+    
+    processing_time = int((time.time() - start_time) * 1000)
+    
+    # Save to database (queued when write-behind is on)
+    await db_manager.save_result(
+        image_hash=image_hash,
+        result=result["result"],
+        confidence=result.get("confidence"),
+        image_size=image_size,
+        processing_time_ms=processing_time,
+        phash=phash
+    )
+    
+    response = _build_response(image_hash, result, image_size, processing_time, decoded["scale"])
+    _motion_update(camera_id, frame, response, seq)
+    logging.info(f"✅ Processed image {image_hash[:8]}... -> {result['result']} ({processing_time}ms)")
+    return response
+
+async def _process_owned_image(image_file: BinaryIO, image_hash: str, camera_id: Optional[str] = None,
+                               seq: Optional[int] = None) -> Dict:
+    """Devralınmış bir yükleme dosyasını işler, bitince kapatır"""
+    try:
+        return await _process_new_image(image_file, image_hash, camera_id, seq)
+    finally:
+        image_file.close()
+
+async def _detect_uncached(file: UploadFile, image_hash: str, camera_id: Optional[str] = None,
+                           seq: Optional[int] = None) -> Dict:
+    """Aynı hash için eşzamanlı istekleri tek bir inference'a bağlar"""
+    # The shared task takes the leader's spooled file over: followers wait on
+    # it, so it must not depend on the leader's request staying alive
+    response, shared = await in_flight.do(
+        image_hash, lambda: _process_owned_image(take_upload(file), image_hash, camera_id, seq)
+    )
+    
+    # Every caller gets its own copy to annotate
+    response = dict(response)
+    if shared:
+        response["coalesced"] = True
+        logging.info(f"🤝 Coalesced duplicate request for {image_hash[:8]}...")
+    return response
+
+async def _detect_uncached_many(items: List[Dict], start_time: float) -> Dict[str, object]:
+    """Birden fazla yeni görseli tek batch'li model çağrısında işler ve kaydeder.
+    
+    Hashes another request is already processing are joined through the
+    single-flight map; the rest go to the model together and are saved in
+    one insert before their single-flight tasks finish, as in
+    _process_new_image. Returns a response (or the exception) per hash.
+    """
+    # Decide who leads each hash without yielding to the event loop, so no
+    # other request can claim one of these hashes in between
+    tasks = {}
+    led = []
+    for item in items:
+        task = in_flight.join(item["image_hash"])
+        if task is not None:
+            tasks[item["image_hash"]] = task
+        else:
+            led.append(item)
+    
+    async def detect_and_save() -> List[Dict]:
+        results = await model_service.detect_fall_batch(
+            [item["image"] for item in led], [item.get("regions") for item in led]
+        )
+        processing_time = int((time.time() - start_time) * 1000)
+        responses = [
+            _build_response(item["image_hash"], result, item["image_size"], processing_time, item["scale"])
+            for item, result in zip(led, results)
+        ]
+        
+        # Save to database (queued when write-behind is on)
+        await db_manager.save_results([
+            dict(response, phash=item["phash"]) for item, response in zip(led, responses)
+        ])
+        return responses
+    
+    batch_task = asyncio.ensure_future(detect_and_save()) if led else None
+    
+    async def finish(index: int, item: Dict) -> Dict:
+        return (await batch_task)[index]
+    
+    for index, item in enumerate(led):
+        tasks[item["image_hash"]], _ = in_flight.start(
+            item["image_hash"], lambda index=index, item=item: finish(index, item)
+        )
+    
+    outcomes = await asyncio.gather(*(asyncio.shield(task) for task in tasks.values()), return_exceptions=True)
+    responses = dict(zip(tasks.keys(), outcomes))
+    
+    # Every caller gets its own copy to annotate
+    led_hashes = {item["image_hash"] for item in led}
+    for image_hash, outcome in responses.items():
+        if isinstance(outcome, dict):
+            responses[image_hash] = dict(outcome)
+            if image_hash not in led_hashes:
+                responses[image_hash]["coalesced"] = True
+    
+    return responses
+
+async def _detect_misses(misses: Dict[str, ImageSource], found: Dict[str, Dict],
+                         errors: Dict[str, Exception], start_time: float,
+                         camera_id: Optional[str] = None, seq: Optional[int] = None):
+    """Cache'te olmayan görselleri çözer, tek batch'te işler ve tek seferde kaydeder.
+    
+    Decoding runs on worker threads; with a camera_id, frames of a static
+    scene get the camera's last result, near-duplicates are answered from
+    the perceptual index and the rest go through one batched model call.
+    Responses land in found and failures in errors, both keyed by hash.
+    seq is the request's arrival number: the camera's motion reference
+    only moves forward, whichever request finishes first.
+    """
+    decoded = await asyncio.gather(
+        *(asyncio.to_thread(_decode_image, image_bytes, camera_id) for image_bytes in misses.values()),
+        return_exceptions=True
+    )
+    
+    candidates = []
+    analysed = []
+    for image_hash, outcome in zip(misses.keys(), decoded):
+        if isinstance(outcome, Exception):
+            errors[image_hash] = outcome
+            continue
+        image = outcome["image"]
+        frame, gated, regions = _motion_check(camera_id, outcome["frame"], image, image_hash)
+        if gated:
+            found[image_hash] = gated
+            continue
+        if frame is not None:
+            analysed.append((image_hash, frame))
+        candidates.append({
+            "image_hash": image_hash,
+            "image": image,
+            "image_size": outcome["image_size"],
+            "scale": outcome["scale"],
+            "phash": outcome["phash"],
+            "regions": regions,
+        })
+    
+    # Near-duplicates of frames we already processed, resolved in one lookup
+    near_results = await db_manager.find_near_duplicates(
+        {item["image_hash"]: item["phash"] for item in candidates}
+    )
+    found.update(near_results)
+    to_infer = [item for item in candidates if item["image_hash"] not in near_results]
+    
+    if to_infer:
+        responses = await _detect_uncached_many(to_infer, start_time)
+        for image_hash, outcome in responses.items():
+            if isinstance(outcome, Exception):
+                errors[image_hash] = outcome
+            else:
+                found[image_hash] = outcome
+    
+    # The newest analysed frame becomes the camera's reference
+    for image_hash, frame in reversed(analysed):
+        if image_hash in found:
+            _motion_update(camera_id, frame, found[image_hash], seq)
+            break
+
 @app.post("/detect-fall/")
-async def detect_fall_single(file: UploadFile = File(...)):
+async def detect_fall_single(file: UploadFile = File(...), camera_id: Optional[str] = None):
     """Tek görsel için düşme tespiti"""
     if not model_service or not getattr(model_service, "is_initialized", False):
         raise HTTPException(status_code=503, detail="Model loading, try again shortly")
@@ -109,10 +458,12 @@ async def detect_fall_single(file: UploadFile = File(...)):
     if not file.content_type.startswith('image/'):
         raise HTTPException(status_code=400, detail="File must be an image")
     
+    # Numbered before any await, in arrival order
+    seq = _motion_seq(camera_id)
+    
     try:
-        # Read image bytes
-        image_bytes = await file.read()
-        image_hash = db_manager.calculate_image_hash(image_bytes)
+        # Read and hash the upload chunk by chunk
+        _, image_hash = await read_upload(file, UPLOAD_CONFIG["max_bytes"], UPLOAD_CONFIG["chunk_bytes"])
         
         # Check if result already exists
         existing_result = await db_manager.check_existing_result(image_hash)
@@ -120,111 +471,150 @@ async def detect_fall_single(file: UploadFile = File(...)):
             logging.info(f"🔄 Cache hit for image hash: {image_hash[:8]}...")
             return existing_result
         
-        # Process new image
+        return await _detect_uncached(file, image_hash, camera_id, seq)
+        
+    except (UploadTooLargeError, ImageTooLargeError) as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except InferenceQueueFullError as e:
+        logging.warning(f"⏳ {e}")
+        raise HTTPException(status_code=503, detail="Inference queue full, try again shortly",
+                            headers={"Retry-After": "1"})
+    except Exception as e:
+        logging.error(f"❌ Error processing image: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
+
+@app.post("/detect-fall-batch/")
+async def detect_fall_batch(files: List[UploadFile] = File(...), camera_id: Optional[str] = None):
+    """Birden fazla görsel için düşme tespiti"""
+    if not model_service or not getattr(model_service, "is_initialized", False):
+        raise HTTPException(status_code=503, detail="Model loading, try again shortly")
+    
+    if len(files) > BATCH_CONFIG["max_files"]:  # Limit batch size
+        raise HTTPException(status_code=400, detail=f"Maximum {BATCH_CONFIG['max_files']} images per batch")
+    
+    try:
         start_time = time.time()
+        seq = _motion_seq(camera_id)
+        results: List[Optional[Dict]] = [None] * len(files)
+        entries = []
         
-        # Convert to PIL Image
-        image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-        image_size = f"{image.size[0]}x{image.size[1]}"
+        # 1) Read and hash every upload
+        for index, file in enumerate(files):
+            if not file.content_type.startswith('image/'):
+                results[index] = {
+                    "filename": file.filename,
+                    "error": "File must be an image"
+                }
+                continue
+            try:
+                image_bytes, image_hash = await read_upload(file, UPLOAD_CONFIG["max_bytes"], UPLOAD_CONFIG["chunk_bytes"])
+            except UploadTooLargeError as e:
+                results[index] = {"filename": file.filename, "error": str(e)}
+                continue
+            entries.append((index, file.filename, image_bytes, image_hash))
         
-        # Run fall detection
-        result = await model_service.detect_fall(image)
+        # 2) Look every hash up in one query
+        found = await db_manager.check_existing_results([image_hash for _, _, _, image_hash in entries])
         
-        processing_time = int((time.time() - start_time) * 1000)
+        misses = {}
+        for _, _, image_bytes, image_hash in entries:
+            if image_hash not in found:
+                misses.setdefault(image_hash, image_bytes)
+        
+        # 3) Check the per-image and decoded-memory limits from the headers
+        #    (read on a worker thread), then decode in parallel
+        errors = {}
+        pixels = {}
+        max_pixels = DECODE_CONFIG["max_megapixels"] * 1e6
+        measured = await asyncio.to_thread(_image_pixels_many, misses)
+        for image_hash, image_pixels in measured.items():
+            if isinstance(image_pixels, Exception):
+                errors[image_hash] = image_pixels
+                continue
+            if image_pixels > max_pixels:
+                errors[image_hash] = ImageTooLargeError(
+                    f"Image is {image_pixels / 1e6:.1f} MP, limit is {DECODE_CONFIG['max_megapixels']} MP"
+                )
+                continue
+            pixels[image_hash] = image_pixels
+        megapixels = sum(pixels.values()) / 1e6
+        if megapixels > BATCH_CONFIG["max_megapixels"]:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Batch needs {megapixels:.1f} MP decoded, limit is {BATCH_CONFIG['max_megapixels']} MP"
+            )
         
-        # Save to database
-        await db_manager.save_result(
-            image_hash=image_hash,
-            result=result["result"],
-            confidence=result.get("confidence"),
-            image_size=image_size,
-            processing_time_ms=processing_time
+        # 4) Decode, batched inference and one insert for the new results
+        await _detect_misses(
+            {image_hash: misses[image_hash] for image_hash in pixels}, found, errors, start_time, camera_id, seq
         )
         
-        response = {
-            "image_hash": image_hash,
-            "result": result["result"],
-            "confidence": result.get("confidence"),
-            "image_size": image_size,
-            "processing_time_ms": processing_time,
-            "cached": False
-        }
+        for index, filename, _, image_hash in entries:
+            if image_hash in errors:
+                results[index] = {"filename": filename, "error": str(errors[image_hash])}
+            else:
+                results[index] = dict(found[image_hash], filename=filename)
         
-        logging.info(f"✅ Processed image {image_hash[:8]}... -> {result['result']} ({processing_time}ms)")
-        return response
+        return {"results": results}
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logging.error(f"❌ Error processing image: {str(e)}")
+        logging.error(f"❌ Error processing batch: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Processing failed: {str(e)}")
 
-@app.post("/detect-fall-batch/")
-async def detect_fall_batch(files: List[UploadFile] = File(...)):
-    """Birden fazla görsel için düşme tespiti"""
+async def _stream_batch(stream: FrameStream, frames: List[Dict], camera_id: Optional[str] = None):
+    """Akıştan gelen kareleri tek sorguda arar, kalanlar için inference işini döndürür"""
     if not model_service or not getattr(model_service, "is_initialized", False):
-        raise HTTPException(status_code=503, detail="Model loading, try again shortly")
+        for frame in frames:
+            await stream.fail(frame, "Model loading, try again shortly", retry=True)
+        return None
     
-    if len(files) > 10:  # Limit batch size
-        raise HTTPException(status_code=400, detail="Maximum 10 images per batch")
+    start_time = time.time()
+    seq = _motion_seq(camera_id)
+    by_hash: Dict[str, List[Dict]] = {}
+    for frame in frames:
+        by_hash.setdefault(db_manager.calculate_image_hash(frame["data"]), []).append(frame)
     
-    results = []
+    # Cache hits are answered right away, ahead of earlier frames still in inference
+    found = await db_manager.check_existing_results(list(by_hash))
+    misses = {}
+    for image_hash, group in by_hash.items():
+        if image_hash in found:
+            for frame in group:
+                await stream.reply(frame, found[image_hash])
+        else:
+            misses[image_hash] = group[0]["data"]
     
-    for file in files:
-        if not file.content_type.startswith('image/'):
-            results.append({
-                "filename": file.filename,
-                "error": "File must be an image"
-            })
-            continue
-            
-        try:
-            # Read image bytes
-            image_bytes = await file.read()
-            image_hash = db_manager.calculate_image_hash(image_bytes)
-            
-            # Check cache first
-            existing_result = await db_manager.check_existing_result(image_hash)
-            if existing_result:
-                existing_result["filename"] = file.filename
-                results.append(existing_result)
-                continue
-            
-            # Process new image
-            start_time = time.time()
-            
-            image = Image.open(io.BytesIO(image_bytes)).convert("RGB")
-            image_size = f"{image.size[0]}x{image.size[1]}"
-            
-            result = await model_service.detect_fall(image)
-            processing_time = int((time.time() - start_time) * 1000)
-            
-            # Save to database
-            await db_manager.save_result(
-                image_hash=image_hash,
-                result=result["result"],
-                confidence=result.get("confidence"),
-                image_size=image_size,
-                processing_time_ms=processing_time
-            )
-            
-            response = {
-                "filename": file.filename,
-                "image_hash": image_hash,
-                "result": result["result"],
-                "confidence": result.get("confidence"),
-                "image_size": image_size,
-                "processing_time_ms": processing_time,
-                "cached": False
-            }
-            
-            results.append(response)
-            
-        except Exception as e:
-            results.append({
-                "filename": file.filename,
-                "error": str(e)
-            })
+    if not misses:
+        return None
+    
+    async def detect():
+        found, errors = {}, {}
+        await _detect_misses(misses, found, errors, start_time, camera_id, seq)
+        for image_hash in misses:
+            for frame in by_hash[image_hash]:
+                if image_hash in found:
+                    await stream.reply(frame, found[image_hash])
+                else:
+                    error = errors[image_hash]
+                    await stream.fail(frame, str(error), retry=isinstance(error, InferenceQueueFullError))
     
-    return {"results": results}
+    return detect()
+
+@app.websocket("/ws/detect-fall")
+async def detect_fall_stream(websocket: WebSocket):
+    """Tek bağlantı üzerinden sıra numaralı kare akışı"""
+    camera_id = websocket.query_params.get("camera_id")
+    stream = FrameStream(
+        websocket,
+        lambda stream, frames: _stream_batch(stream, frames, camera_id),
+        credits=STREAM_CONFIG["credits"],
+        max_batch=STREAM_CONFIG["max_batch"],
+        max_frame_bytes=STREAM_CONFIG["max_frame_bytes"],
+        metrics=stream_stats,
+    )
+    await stream.run()
 
 @app.get("/result/{image_hash}")
 async def get_result(image_hash: str):
@@ -239,10 +629,38 @@ async def get_statistics():
     """Sistem istatistikleri"""
     try:
         stats = await db_manager.get_statistics()
+        stats["result_store"] = db_manager.backend_stats()
+        stats["result_cache"] = db_manager.result_cache.stats()
+        stats["near_duplicate_index"] = db_manager.phash_index.stats()
+        stats["single_flight"] = in_flight.stats()
+        stats["stream"] = stream_stats.stats()
+        if motion_gate:
+            stats["motion_gate"] = motion_gate.stats()
+        if db_manager.write_buffer:
+            stats["write_behind"] = db_manager.write_buffer.stats()
+        stats["timeseries"] = db_manager.timeseries.stats()
+        if model_service:
+            stats["model"] = model_service.stats()
         return stats
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get statistics: {str(e)}")
 
+@app.get("/statistics/timeseries")
+async def get_statistics_timeseries(granularity: str = "minute", limit: Optional[int] = None):
+    """Dakika/saat/gün kovalarında sayı, düşme oranı ve gecikme yüzdelikleri"""
+    if granularity not in GRANULARITIES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"granularity must be one of: {', '.join(GRANULARITIES)}"
+        )
+    if limit is not None and limit < 1:
+        raise HTTPException(status_code=400, detail="limit must be at least 1")
+    
+    return {
+        "granularity": granularity,
+        "buckets": db_manager.timeseries.series(granularity, limit)
+    }
+
 if __name__ == "__main__":
     import uvicorn
     
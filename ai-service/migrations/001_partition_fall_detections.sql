@@ -0,0 +1,120 @@
+-- Convert an existing unpartitioned fall_detections table to the
+-- created_at range-partitioned layout used by init.sql / create_tables.
+--
+-- Run once with the service stopped:
+--     psql -U postgres -d fall_detection -f migrations/001_partition_fall_detections.sql
+--
+-- The old table is kept as fall_detections_unpartitioned; drop it once the
+-- new one has been checked.
+
+BEGIN;
+
+-- Move the old table and its index/constraint names out of the way
+ALTER TABLE fall_detections RENAME TO fall_detections_unpartitioned;
+ALTER TABLE fall_detections_unpartitioned RENAME CONSTRAINT fall_detections_pkey TO fall_detections_unpartitioned_pkey;
+DROP INDEX IF EXISTS idx_image_hash;
+DROP INDEX IF EXISTS idx_created_at;
+DROP INDEX IF EXISTS idx_result;
+DROP INDEX IF EXISTS idx_processing_time;
+DROP TRIGGER IF EXISTS update_fall_detections_updated_at ON fall_detections_unpartitioned;
+
+CREATE TABLE fall_detections (
+    id BIGSERIAL,
+    image_hash VARCHAR(64) NOT NULL,
+    result VARCHAR(10) NOT NULL CHECK (result IN ('Yes', 'No')),
+    confidence FLOAT CHECK (confidence >= 0.0 AND confidence <= 1.0),
+    created_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    image_size VARCHAR(20),
+    processing_time_ms INTEGER CHECK (processing_time_ms >= 0),
+    votes_yes INTEGER DEFAULT 0,
+    votes_no INTEGER DEFAULT 0,
+    total_crops INTEGER DEFAULT 1,
+    phash BIGINT,
+    PRIMARY KEY (id, created_at)
+) PARTITION BY RANGE (created_at);
+
+CREATE TABLE fall_detections_default PARTITION OF fall_detections DEFAULT;
+
+CREATE OR REPLACE FUNCTION ensure_fall_detection_partitions(
+    interval_days INT, premake INT, from_day DATE DEFAULT CURRENT_DATE
+) RETURNS INT AS $$
+DECLARE
+    start_day DATE := from_day - ((from_day - DATE '1970-01-01') % interval_days);
+    last_day DATE := CURRENT_DATE + premake * interval_days;
+    partition_name TEXT;
+    created INT := 0;
+BEGIN
+    WHILE start_day <= last_day LOOP
+        partition_name := 'fall_detections_p' || to_char(start_day, 'YYYYMMDD');
+        IF to_regclass(partition_name) IS NULL THEN
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF fall_detections FOR VALUES FROM (%L) TO (%L)',
+                partition_name, start_day, start_day + interval_days
+            );
+            created := created + 1;
+        END IF;
+        start_day := start_day + interval_days;
+    END LOOP;
+    RETURN created;
+END;
+$$ LANGUAGE plpgsql;
+
+-- Weekly partitions covering every existing row (match PARTITION_INTERVAL_DAYS)
+SELECT ensure_fall_detection_partitions(
+    7, 3, COALESCE((SELECT MIN(created_at)::date FROM fall_detections_unpartitioned), CURRENT_DATE)
+);
+
+-- Copy before the dedupe trigger exists: the old rows are already unique
+INSERT INTO fall_detections (id, image_hash, result, confidence, created_at, image_size, processing_time_ms, phash)
+SELECT id, image_hash, result, confidence, COALESCE(created_at, CURRENT_TIMESTAMP), image_size, processing_time_ms, phash
+FROM fall_detections_unpartitioned;
+
+SELECT setval(pg_get_serial_sequence('fall_detections', 'id'), COALESCE(MAX(id), 1)) FROM fall_detections;
+
+CREATE INDEX idx_image_hash ON fall_detections(image_hash);
+CREATE INDEX idx_created_at ON fall_detections(created_at);
+
+CREATE OR REPLACE FUNCTION skip_duplicate_image_hash() RETURNS TRIGGER AS $$
+BEGIN
+    PERFORM pg_advisory_xact_lock(hashtext(NEW.image_hash));
+    IF EXISTS (SELECT 1 FROM fall_detections WHERE image_hash = NEW.image_hash) THEN
+        RETURN NULL;
+    END IF;
+    RETURN NEW;
+END;
+$$ LANGUAGE plpgsql;
+
+CREATE TRIGGER skip_duplicate_image_hash
+    BEFORE INSERT ON fall_detections
+    FOR EACH ROW
+    EXECUTE FUNCTION skip_duplicate_image_hash();
+
+-- Only databases created from init.sql have the updated_at trigger function
+DO $$
+BEGIN
+    IF to_regproc('update_updated_at_column') IS NOT NULL THEN
+        CREATE TRIGGER update_fall_detections_updated_at
+            BEFORE UPDATE ON fall_detections
+            FOR EACH ROW
+            EXECUTE FUNCTION update_updated_at_column();
+    END IF;
+END;
+$$;
+
+-- Views bind to the table they were created on; point the statistics view at the new one
+CREATE OR REPLACE VIEW fall_detection_stats AS
+SELECT
+    COUNT(*) as total_processed,
+    COUNT(CASE WHEN result = 'Yes' THEN 1 END) as fall_detected,
+    COUNT(CASE WHEN result = 'No' THEN 1 END) as no_fall,
+    ROUND(AVG(processing_time_ms)::numeric, 2) as avg_processing_time_ms,
+    ROUND(AVG(confidence)::numeric, 3) as avg_confidence,
+    COUNT(DISTINCT DATE(created_at)) as days_active,
+    MIN(created_at) as first_detection,
+    MAX(created_at) as last_detection
+FROM fall_detections;
+
+COMMIT;
+
+-- DROP TABLE fall_detections_unpartitioned;
@@ -0,0 +1,64 @@
+-- Store image_hash as 32 raw bytes and image_size as two SMALLINT columns.
+--
+-- Run once with the service stopped, after 001_partition_fall_detections.sql
+-- (it also works on a table that was never partitioned):
+--     psql -U postgres -d fall_detection -f migrations/002_binary_image_hash.sql
+--
+-- Rows whose hash is not 64 hex characters (e.g. the old sample rows) cannot
+-- be converted and are deleted. The API keeps returning hex hashes and
+-- "640x480" sizes; only the storage changes.
+
+BEGIN;
+
+DELETE FROM fall_detections WHERE image_hash !~ '^[0-9a-fA-F]{64}$';
+
+DROP INDEX IF EXISTS idx_image_hash;
+
+-- The old dedupe trigger compares varchar hashes; recreated below for bytea
+DROP TRIGGER IF EXISTS skip_duplicate_image_hash ON fall_detections;
+
+ALTER TABLE fall_detections
+    ALTER COLUMN image_hash TYPE BYTEA USING decode(image_hash, 'hex'),
+    ADD CONSTRAINT fall_detections_image_hash_length CHECK (octet_length(image_hash) = 32),
+    ADD COLUMN image_width SMALLINT,
+    ADD COLUMN image_height SMALLINT;
+
+UPDATE fall_detections
+SET image_width = split_part(image_size, 'x', 1)::int,
+    image_height = split_part(image_size, 'x', 2)::int
+WHERE image_size ~ '^[0-9]{1,5}x[0-9]{1,5}$'
+  AND split_part(image_size, 'x', 1)::int BETWEEN 1 AND 32767
+  AND split_part(image_size, 'x', 2)::int BETWEEN 1 AND 32767;
+
+ALTER TABLE fall_detections DROP COLUMN image_size;
+
+DO $$
+BEGIN
+    -- Unpartitioned tables keep their unique index; partitioned ones get the
+    -- prefix index and the bytea dedupe trigger
+    IF (SELECT relkind FROM pg_class WHERE oid = 'fall_detections'::regclass) = 'p' THEN
+        CREATE INDEX idx_image_hash_prefix ON fall_detections ((substring(image_hash from 1 for 8)));
+
+        CREATE OR REPLACE FUNCTION skip_duplicate_image_hash() RETURNS TRIGGER AS $fn$
+        BEGIN
+            PERFORM pg_advisory_xact_lock(hashtext(encode(NEW.image_hash, 'hex')));
+            IF EXISTS (
+                SELECT 1 FROM fall_detections
+                WHERE substring(image_hash from 1 for 8) = substring(NEW.image_hash from 1 for 8)
+                  AND image_hash = NEW.image_hash
+            ) THEN
+                RETURN NULL;
+            END IF;
+            RETURN NEW;
+        END;
+        $fn$ LANGUAGE plpgsql;
+
+        CREATE TRIGGER skip_duplicate_image_hash
+            BEFORE INSERT ON fall_detections
+            FOR EACH ROW
+            EXECUTE FUNCTION skip_duplicate_image_hash();
+    END IF;
+END;
+$$;
+
+COMMIT;
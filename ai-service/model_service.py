@@ -1,17 +1,145 @@
 import torch
 from PIL import Image
 import asyncio
+import inspect
 import logging
-from transformers import AutoProcessor, AutoModelForImageTextToText
-from typing import Dict, Optional
+import transformers
+from transformers import AutoProcessor, AutoModelForImageTextToText, DynamicCache
+from typing import Dict, Generator, List, Optional, Tuple
+import os
 import time
+from concurrent.futures import ThreadPoolExecutor
+
+from batch_scheduler import BatchScheduler
+from inference_executor import InferenceExecutor
+from prefilter import create_prefilter
+from crop_proposals import CROP_SOURCES, center_boxes, region_boxes, make_crops
+
+CASCADE_STAGES = {"full_frame", "person_gate", "majority"}
+
+def _parse_cascade(value: str) -> frozenset:
+    """MODEL_CASCADE değerini aşama kümesine çevirir"""
+    stages = frozenset(s.strip() for s in value.split(",") if s.strip() and s.strip() != "none")
+    unknown = stages - CASCADE_STAGES
+    if unknown:
+        raise ValueError(f"Unknown MODEL_CASCADE stage(s): {', '.join(sorted(unknown))}")
+    return stages
+
+_batched_inference = os.getenv("MODEL_BATCHED_INFERENCE", "true").lower() == "true"
+
+# Model configuration
+MODEL_CONFIG = {
+    # All (crop, question) pairs of a stage go through one padded generate() call
+    "batched_inference": _batched_inference,
+    # Early-exit cascade: comma-separated subset of CASCADE_STAGES
+    #   full_frame  - ask person presence on the full frame first, stop on No
+    #   person_gate - ask the fall question only on crops where a person is seen
+    #   majority    - evaluate crops one by one, stop once the vote is decided
+    "cascade": _parse_cascade(os.getenv("MODEL_CASCADE", "" if _batched_inference else "person_gate")),
+    # How answers are read: "generate" decodes text, "logits" compares the
+    # Yes/No next-token logits from a single forward pass
+    "scoring": os.getenv("MODEL_SCORING", "generate").lower(),
+    # Temperature applied to the Yes/No logit gap before the sigmoid (calibration)
+    "logit_temperature": float(os.getenv("MODEL_LOGIT_TEMPERATURE", "1.0")),
+    # Logit scoring only: encode template + image tokens of a crop once and
+    # reuse that KV cache for every question asked about the crop
+    "prefix_cache": os.getenv("MODEL_PREFIX_CACHE", "true").lower() == "true",
+    # Run the vision encoder once per crop and pass its embeddings to every
+    # question about that crop (paths that do not use the prefix cache)
+    "vision_cache": os.getenv("MODEL_VISION_CACHE", "true").lower() == "true",
+    # Cheap CPU person detector run before the VLM ("none" or a name from
+    # prefilter.PREFILTERS); frames whose person score is below
+    # prefilter_reject_below are answered "No" without asking the VLM
+    "prefilter": os.getenv("MODEL_PREFILTER", "none").lower(),
+    "prefilter_reject_below": float(os.getenv("MODEL_PREFILTER_REJECT_BELOW", "0.05")),
+    # Where the vote's crops come from: "center" (fixed center crops),
+    # "person" (around the person detector's boxes) or "motion" (around the
+    # regions the caller passes, e.g. the motion gate's); the last two fall
+    # back to center crops when there is nothing to centre on
+    "crops": os.getenv("MODEL_CROPS", "center").lower(),
+    "person_box_min_score": float(os.getenv("MODEL_PERSON_BOX_MIN_SCORE", "0.3")),
+    # Downscale every crop so its long side is at most this (0 = full resolution)
+    "crop_max_side": int(os.getenv("MODEL_CROP_MAX_SIDE", "0")),
+    # Cross-request micro-batching
+    "batch_max_size": int(os.getenv("MODEL_BATCH_MAX_SIZE", "4")),
+    "batch_max_wait_ms": float(os.getenv("MODEL_BATCH_MAX_WAIT_MS", "20")),
+    # In-flight limit of the inference thread (backpressure)
+    "max_in_flight": int(os.getenv("INFERENCE_MAX_IN_FLIGHT", "32")),
+}
+
+if MODEL_CONFIG["scoring"] not in ("generate", "logits"):
+    raise ValueError(f"Unknown MODEL_SCORING: {MODEL_CONFIG['scoring']}")
+if MODEL_CONFIG["crops"] not in CROP_SOURCES:
+    raise ValueError(f"Unknown MODEL_CROPS: {MODEL_CONFIG['crops']}")
+
+# The vision cache calls the model's own get_image_features when it has one.
+# Otherwise _encode_vision mirrors the image branch of the Idefics3-style
+# forward of the pinned transformers 4.49 SmolVLM branch, which is only
+# trusted for these inner model classes on that version
+VISION_CACHE_MODELS = {"SmolVLMModel", "Idefics3Model"}
+VISION_CACHE_TRANSFORMERS = "4.49."
+
+# P(fallen) assumed for crops whose fall question was skipped by the cascade
+UNASKED_FALL_PRIOR = 0.5
+
+Q_PERSON = "Is there a person visible in this image? Answer Yes or No."
+Q_FALL = "Is any person lying on the ground or floor (appears fallen)? Answer Yes or No."
+
+class _RequestContext:
+    """Tek bir _detect_batch çağrısı boyunca paylaşılan ara durum"""
+    
+    def __init__(self):
+        # Prefix KV caches: (cache, attention_mask) per prefill, crop id -> (group, row)
+        self.prefix_groups = []
+        self.prefix_rows = {}
+        # Vision embeddings: crop id -> connector output for the crop's sub-images
+        self.vision = {}
 
 class ModelService:
     def __init__(self):
         self.processor = None
         self.model = None
-        self.model_lock = asyncio.Lock()
+        self.yes_token_ids = []
+        self.no_token_ids = []
         self.is_initialized = False
+        # How _encode_vision gets image embeddings: "model", "mirror" or None (cache off)
+        self.vision_features = None
+        
+        # Metrics
+        self.model_calls = 0
+        self.questions_asked = 0
+        self.early_exits = 0
+        self.crops_encoded = 0
+        self.vision_cache_hits = 0
+        self.stage_timings = {}
+        self.prefilter_checked = 0
+        self.prefilter_rejected = 0
+        
+        self._prompt_parts = {}
+        # The pre-filter's detector also localizes people for MODEL_CROPS=person
+        self.prefilter = create_prefilter(
+            "ssdlite" if MODEL_CONFIG["prefilter"] == "none" and MODEL_CONFIG["crops"] == "person"
+            else MODEL_CONFIG["prefilter"]
+        )
+        # The pre-filter runs on its own CPU thread before admission, so
+        # rejected frames never queue behind the model
+        self.prefilter_executor = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefilter") if self.prefilter else None
+        )
+        self.crop_sources = {}
+        
+        # One worker: the model, processor and metric counters are shared and
+        # not thread-safe, so batches must never run concurrently
+        self.executor = InferenceExecutor(
+            max_workers=1,
+            max_in_flight=MODEL_CONFIG["max_in_flight"],
+        )
+        self.scheduler = BatchScheduler(
+            self._run_batch,
+            max_batch_size=MODEL_CONFIG["batch_max_size"],
+            max_wait_ms=MODEL_CONFIG["batch_max_wait_ms"],
+            max_concurrency=self.executor.max_workers,
+        )
         
     async def initialize(self):
         """Model ve processor'u yükle"""
@@ -30,6 +158,10 @@ class ModelService:
             
             # Load processor
             self.processor = AutoProcessor.from_pretrained(model_path)
+            # Batched generation needs the prompts aligned on the right
+            self.processor.tokenizer.padding_side = "left"
+            self.yes_token_ids = self._answer_token_ids("Yes")
+            self.no_token_ids = self._answer_token_ids("No")
             logging.info("✅ Processor loaded")
             
             # Load model
@@ -45,6 +177,13 @@ class ModelService:
             else:
                 logging.info("✅ Model loaded to CPU")
             
+            if MODEL_CONFIG["vision_cache"]:
+                self.vision_features = self._vision_feature_source()
+            
+            if self.prefilter:
+                self.prefilter.load()
+            
+            await self.scheduler.start()
             self.is_initialized = True
             logging.info("🎉 Model service initialized successfully!")
             
@@ -56,26 +195,124 @@ class ModelService:
         """Model sağlık kontrolü"""
         return self.is_initialized and self.processor is not None and self.model is not None
     
-    def _ask_yes_no(self, image: Image.Image, question: str) -> str:
-        """Tek bir görüntü ve soru için deterministik Yes/No üretir"""
-        messages = [
-            {
-                "role": "user",
-                "content": [
-                    {"type": "image", "image": image},
-                    {"type": "text", "text": question},
-                ],
-            }
+    def _build_inputs(self, pairs: List[Tuple[Image.Image, str]], ctx: Optional[_RequestContext] = None) -> Dict:
+        """(görüntü, soru) çiftlerini tek bir padding'li batch'e çevirir"""
+        conversations = [
+            [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "image", "image": image},
+                        {"type": "text", "text": question},
+                    ],
+                }
+            ]
+            for image, question in pairs
         ]
         
         inputs = self.processor.apply_chat_template(
-            messages,
+            conversations,
             add_generation_prompt=True,
             tokenize=True,
             return_dict=True,
             return_tensors="pt",
+            padding=True,
         )
+        inputs = self._to_device(inputs)
+        
+        if ctx is not None and self.vision_features:
+            inputs = self._attach_vision_features(pairs, inputs, ctx)
+        
+        return inputs
+    
+    def _vision_feature_source(self) -> Optional[str]:
+        """Görüntü gömme önbelleğinin bu modelde nasıl çalışacağı (desteklenmiyorsa None)"""
+        inner = getattr(self.model, "model", None)
+        if "image_hidden_states" not in inspect.signature(self.model.forward).parameters:
+            reason = f"{type(self.model).__name__}.forward takes no image_hidden_states"
+        elif callable(getattr(inner, "get_image_features", None)):
+            return "model"
+        elif type(inner).__name__ not in VISION_CACHE_MODELS or not all(
+            hasattr(inner, name) for name in ("vision_model", "connector")
+        ):
+            reason = f"unknown model {type(inner).__name__}"
+        elif not transformers.__version__.startswith(VISION_CACHE_TRANSFORMERS):
+            reason = f"transformers {transformers.__version__} is not {VISION_CACHE_TRANSFORMERS}x"
+        else:
+            return "mirror"
+        
+        logging.warning(f"⚠️ Vision cache disabled ({reason}), images go through the normal path")
+        return None
+    
+    def _encode_vision(self, pixel_values: torch.Tensor, pixel_attention_mask: torch.Tensor) -> List[torch.Tensor]:
+        """Satır başına görüntü gömmelerini (vision encoder + connector) hesaplar.
+        
+        The result is passed back as ``image_hidden_states``. It comes from
+        the model's own get_image_features when available; otherwise the
+        image branch of the pinned model's forward is mirrored here (see
+        _vision_feature_source for when that is allowed).
+        """
+        model = self.model.model
+        batch_size, num_images = pixel_values.shape[:2]
+        pixel_values = pixel_values.to(dtype=model.dtype)
+        
+        # Padding sub-images are all zeros
+        nb_values_per_image = pixel_values.shape[2:].numel()
+        real_images = (pixel_values == 0.0).sum(dim=(-1, -2, -3)) != nb_values_per_image
+        counts = real_images.sum(dim=1).tolist()
+        
+        if self.vision_features == "model":
+            hidden_states = model.get_image_features(
+                pixel_values=pixel_values, pixel_attention_mask=pixel_attention_mask
+            )
+            return list(torch.split(hidden_states, counts))
+        
+        pixel_values = pixel_values.view(batch_size * num_images, *pixel_values.shape[2:])
+        pixel_attention_mask = pixel_attention_mask.view(batch_size * num_images, *pixel_attention_mask.shape[2:])
+        real_images = real_images.view(batch_size * num_images)
+        
+        patch_size = model.config.vision_config.patch_size
+        patches_subgrid = pixel_attention_mask[real_images].unfold(1, patch_size, patch_size)
+        patches_subgrid = patches_subgrid.unfold(2, patch_size, patch_size)
+        patch_attention_mask = (patches_subgrid.sum(dim=(-1, -2)) > 0).bool()
+        
+        hidden_states = model.vision_model(
+            pixel_values=pixel_values[real_images].contiguous(),
+            patch_attention_mask=patch_attention_mask,
+        ).last_hidden_state
+        hidden_states = model.connector(hidden_states)
+        
+        return list(torch.split(hidden_states, counts))
+    
+    def _attach_vision_features(self, pairs: List[Tuple[Image.Image, str]], inputs: Dict, ctx: _RequestContext) -> Dict:
+        """pixel_values yerine kırpım başına önbelleklenmiş görüntü gömmelerini koyar"""
+        # First row of every crop the encoder has not seen yet in this request
+        new_rows = {}
+        for row, (crop, _) in enumerate(pairs):
+            if id(crop) not in ctx.vision and id(crop) not in new_rows:
+                new_rows[id(crop)] = row
+        
+        if new_rows:
+            index = torch.tensor(list(new_rows.values()), device=inputs["pixel_values"].device)
+            start_time = time.time()
+            with torch.no_grad():
+                features = self._encode_vision(
+                    inputs["pixel_values"].index_select(0, index),
+                    inputs["pixel_attention_mask"].index_select(0, index),
+                )
+            self._record_timing("vision", start_time)
+            ctx.vision.update(zip(new_rows.keys(), features))
+            self.crops_encoded += len(new_rows)
+        
+        self.vision_cache_hits += len(pairs) - len(new_rows)
         
+        inputs.pop("pixel_values")
+        inputs.pop("pixel_attention_mask", None)
+        inputs["image_hidden_states"] = torch.cat([ctx.vision[id(crop)] for crop, _ in pairs])
+        return inputs
+    
+    def _to_device(self, inputs) -> Dict:
+        """Tensörleri model cihazına taşır, görüntü tensörünü GPU'da float16 yapar"""
         # Move to device and convert image tensors to float16 if using GPU
         device = next(self.model.parameters()).device
         inputs = {k: (v.to(device) if isinstance(v, torch.Tensor) else v) for k, v in inputs.items()}
@@ -83,6 +320,45 @@ class ModelService:
         if "pixel_values" in inputs and torch.cuda.is_available():
             inputs["pixel_values"] = inputs["pixel_values"].to(dtype=torch.float16)
         
+        return inputs
+    
+    @staticmethod
+    def _position_ids(attention_mask: torch.Tensor) -> torch.Tensor:
+        """Left padding'i atlayan pozisyon id'leri"""
+        return (attention_mask.long().cumsum(-1) - 1).clamp(min=0)
+    
+    def _record_timing(self, stage: str, start_time: float):
+        """Aşama süresini metriklere ekler"""
+        total, count = self.stage_timings.get(stage, (0.0, 0))
+        self.stage_timings[stage] = (total + (time.time() - start_time) * 1000, count + 1)
+    
+    @staticmethod
+    def _parse_yes_no(text: str) -> str:
+        """Üretilen metni Yes/No cevabına çevirir"""
+        text = text.strip().lower()
+        
+        if text.startswith("yes"): 
+            return "Yes"
+        if text.startswith("no"): 
+            return "No"
+        if "yes" in text and "no" not in text: 
+            return "Yes"
+        if "no" in text: 
+            return "No"
+        
+        return text.capitalize() if text else "No"
+    
+    def _ask_yes_no_batch(self, pairs: List[Tuple[Image.Image, str]], ctx: Optional[_RequestContext] = None) -> List[str]:
+        """Tüm (görüntü, soru) çiftleri için tek generate çağrısıyla Yes/No üretir"""
+        if not pairs:
+            return []
+        
+        inputs = self._build_inputs(pairs, ctx)
+        
+        self.model_calls += 1
+        self.questions_asked += len(pairs)
+        
+        start_time = time.time()
         with torch.no_grad():
             ids = self.model.generate(
                 **inputs,
@@ -93,98 +369,514 @@ class ModelService:
                 eos_token_id=self.processor.tokenizer.eos_token_id,
             )
         
+        self._record_timing("generate", start_time)
+        
+        # Left padding: every row's prompt ends at the same column
         input_len = inputs["input_ids"].shape[1]
         new_tokens = ids[:, input_len:]
-        text = self.processor.tokenizer.decode(new_tokens[0], skip_special_tokens=True).strip().lower()
+        texts = self.processor.tokenizer.batch_decode(new_tokens, skip_special_tokens=True)
         
-        # Interpret result
-        if text.startswith("yes"): 
-            return "Yes"
-        if text.startswith("no"): 
-            return "No"
-        if "yes" in text and "no" not in text: 
-            return "Yes"
-        if "no" in text: 
-            return "No"
+        return [self._parse_yes_no(text) for text in texts]
+    
+    def _score_yes_no_batch(self, pairs: List[Tuple[Image.Image, str]], ctx: Optional[_RequestContext] = None) -> List[float]:
+        """Tek forward pass ile Yes/No token logit'lerinden P(Yes) hesaplar"""
+        if not pairs:
+            return []
         
-        return text.capitalize() if text else "No"
+        inputs = self._build_inputs(pairs, ctx)
+        
+        self.model_calls += 1
+        self.questions_asked += len(pairs)
+        
+        start_time = time.time()
+        with torch.no_grad():
+            outputs = self.model(
+                **inputs,
+                position_ids=self._position_ids(inputs["attention_mask"]),
+                use_cache=False,
+            )
+        self._record_timing("forward", start_time)
+        
+        # Left padding: the last column is the next-token position of every row
+        return self._yes_probabilities(outputs.logits[:, -1, :])
+    
+    def _split_prompt(self, question: str) -> Tuple[str, torch.Tensor]:
+        """Sohbet şablonunu soru metninin başladığı yerden ikiye böler.
+        
+        The prefix (template + image placeholder) is the same for every
+        question; the suffix (question + generation prompt) is the same
+        for every crop, so it is tokenized once and cached.
+        """
+        if question not in self._prompt_parts:
+            conversation = [
+                {
+                    "role": "user",
+                    "content": [
+                        {"type": "image"},
+                        {"type": "text", "text": question},
+                    ],
+                }
+            ]
+            prompt = self.processor.apply_chat_template(conversation, add_generation_prompt=True, tokenize=False)
+            split = prompt.index(question)
+            suffix_ids = self.processor.tokenizer(
+                prompt[split:], add_special_tokens=False, return_tensors="pt"
+            )["input_ids"]
+            self._prompt_parts[question] = (prompt[:split], suffix_ids)
+        
+        return self._prompt_parts[question]
     
-    def _make_crops(self, image: Image.Image) -> list:
-        """Görüntüden birkaç merkez odaklı kırpım üretir"""
-        imgs = [image]
+    def _encode_prefixes(self, crops: list, ctx: _RequestContext):
+        """Kırpımların şablon + görüntü token'larını tek prefill'de KV cache'e alır"""
+        prefix_text, _ = self._split_prompt(Q_PERSON)
+        inputs = self.processor(
+            text=[prefix_text] * len(crops),
+            images=[[crop] for crop in crops],
+            padding=True,
+            add_special_tokens=False,
+            return_tensors="pt",
+        )
+        inputs = self._to_device(inputs)
+        
+        self.model_calls += 1
+        
+        start_time = time.time()
+        with torch.no_grad():
+            outputs = self.model(
+                **inputs,
+                position_ids=self._position_ids(inputs["attention_mask"]),
+                use_cache=True,
+            )
+        self._record_timing("prefix", start_time)
+        
+        group = len(ctx.prefix_groups)
+        ctx.prefix_groups.append((outputs.past_key_values, inputs["attention_mask"]))
+        for row, crop in enumerate(crops):
+            ctx.prefix_rows[id(crop)] = (group, row)
+    
+    def _score_suffix(self, ctx: _RequestContext, group: int, rows: List[int], question: str) -> List[float]:
+        """Önbellekteki prefix'in üzerine yalnızca soru token'larını çalıştırır"""
+        cache, prefix_mask = ctx.prefix_groups[group]
+        _, suffix_ids = self._split_prompt(question)
+        prefix_len = prefix_mask.shape[1]
+        
+        shared = rows == list(range(prefix_mask.shape[0]))
+        if shared:
+            past_key_values = cache
+            mask = prefix_mask
+        else:
+            # Copy out only the rows this question needs
+            index = torch.tensor(rows, device=prefix_mask.device)
+            past_key_values = DynamicCache()
+            for layer, (keys, values) in enumerate(zip(cache.key_cache, cache.value_cache)):
+                past_key_values.update(keys.index_select(0, index), values.index_select(0, index), layer)
+            mask = prefix_mask.index_select(0, index)
+        
+        input_ids = suffix_ids.to(mask.device).expand(len(rows), -1)
+        attention_mask = torch.cat([mask, torch.ones_like(input_ids, dtype=mask.dtype)], dim=1)
+        
+        self.model_calls += 1
+        
+        start_time = time.time()
+        with torch.no_grad():
+            outputs = self.model(
+                input_ids=input_ids,
+                attention_mask=attention_mask,
+                position_ids=self._position_ids(attention_mask)[:, prefix_len:],
+                past_key_values=past_key_values,
+                use_cache=True,
+            )
+        self._record_timing("question", start_time)
+        
+        if shared:
+            # Drop the question tokens so the next question starts from the prefix again
+            cache.crop(prefix_len)
+        
+        return self._yes_probabilities(outputs.logits[:, -1, :])
+    
+    def _score_with_prefix_cache(self, pairs: List[Tuple[Image.Image, str]], ctx: _RequestContext) -> List[float]:
+        """P(Yes) skorlarını kırpım başına bir prefill ve soru başına kısa bir pass ile hesaplar"""
+        if not pairs:
+            return []
+        
+        new_crops = list({id(crop): crop for crop, _ in pairs if id(crop) not in ctx.prefix_rows}.values())
+        if new_crops:
+            self._encode_prefixes(new_crops, ctx)
+        
+        # One suffix pass per (question, prefill group)
+        jobs = {}
+        for idx, (crop, question) in enumerate(pairs):
+            group, row = ctx.prefix_rows[id(crop)]
+            jobs.setdefault((question, group), []).append((row, idx))
+        
+        probs = [0.0] * len(pairs)
+        for (question, group), members in jobs.items():
+            members.sort()
+            scores = self._score_suffix(ctx, group, [row for row, _ in members], question)
+            for (_, idx), p in zip(members, scores):
+                probs[idx] = p
+        
+        self.questions_asked += len(pairs)
+        return probs
+    
+    def _yes_probabilities(self, next_token_logits: torch.Tensor) -> List[float]:
+        """Yes/No logit farkını sıcaklık ile ölçekleyip olasılığa çevirir"""
+        logits = next_token_logits.float()
+        yes = torch.logsumexp(logits[:, self.yes_token_ids], dim=-1)
+        no = torch.logsumexp(logits[:, self.no_token_ids], dim=-1)
+        probs = torch.sigmoid((yes - no) / MODEL_CONFIG["logit_temperature"])
+        return probs.tolist()
+    
+    def _answer_token_ids(self, word: str) -> List[int]:
+        """Bir cevap kelimesinin tek-token varyantlarının id'leri"""
+        ids = set()
+        for variant in (word, " " + word, word.lower(), " " + word.lower()):
+            encoded = self.processor.tokenizer.encode(variant, add_special_tokens=False)
+            if len(encoded) == 1:
+                ids.add(encoded[0])
+        if not ids:
+            raise RuntimeError(f"No single-token encoding for answer '{word}'")
+        return sorted(ids)
+    
+    def _make_crops(self, image: Image.Image, regions: Optional[list] = None) -> Tuple[list, Dict]:
+        """Görüntüden kırpımları üretir; kaynağı ve kutuları da döndürür.
+        
+        The first crop is always the full frame (the full_frame cascade
+        stage relies on it). With person or motion regions the other crops
+        are centred on them; otherwise they are fixed center crops.
+        """
         w, h = image.size
-        m = min(w, h)
+        source = MODEL_CONFIG["crops"]
+        boxes = region_boxes(w, h, regions) if regions and source != "center" else None
+        if boxes is None:
+            source = "center"
+            boxes = center_boxes(w, h)
+        
+        self.crop_sources[source] = self.crop_sources.get(source, 0) + 1
+        return make_crops(image, boxes, MODEL_CONFIG["crop_max_side"]), {
+            "source": source,
+            "boxes": [list(box) for box in boxes],
+        }
+    
+    def _answer(self, pairs: List[Tuple[Image.Image, str]], ctx: _RequestContext) -> List[float]:
+        """Bir aşamadaki tüm soruları cevaplar, her biri için P(Yes) döndürür"""
+        if MODEL_CONFIG["scoring"] == "logits":
+            if MODEL_CONFIG["prefix_cache"]:
+                return self._score_with_prefix_cache(pairs, ctx)
+            if MODEL_CONFIG["batched_inference"]:
+                return self._score_yes_no_batch(pairs, ctx)
+            return [p for pair in pairs for p in self._score_yes_no_batch([pair], ctx)]
+        
+        if MODEL_CONFIG["batched_inference"]:
+            answers = self._ask_yes_no_batch(pairs, ctx)
+        else:
+            answers = [a for pair in pairs for a in self._ask_yes_no_batch([pair], ctx)]
+        return [1.0 if answer == "Yes" else 0.0 for answer in answers]
+    
+    def _plan_votes(self, crops: list, cascade: frozenset) -> Generator[List[Tuple[Image.Image, str]], List[float], Dict]:
+        """Tek bir görüntünün oylamasını aşama aşama yürütür.
+        
+        Yields the (crop, question) pairs the next stage needs, receives
+        their P(Yes) answers, and finally returns the vote summary. Stages
+        of all images in a batch are answered together by ``_run_plans``.
+        """
+        n = len(crops)
+        person = [None] * n
+        crop_probs = []
+        yes_votes = 0
+        no_votes = 0
+        
+        if "full_frame" in cascade:
+            # Crops are sub-regions of the full frame: no person there, no person anywhere
+            (person[0],) = yield [(crops[0], Q_PERSON)]
+            if person[0] < 0.5:
+                return {
+                    "yes": 0, "no": 1, "total_crops": n, "evaluated": 1, "early_exit": True,
+                    "fall_probability": person[0] * UNASKED_FALL_PRIOR,
+                }
+        
+        groups = [[i] for i in range(n)] if "majority" in cascade else [list(range(n))]
+        evaluated = 0
+        
+        for group in groups:
+            need_person = [i for i in group if person[i] is None]
+            
+            if "person_gate" in cascade:
+                # Only ask the fall question where a person was seen
+                if need_person:
+                    answers = yield [(crops[i], Q_PERSON) for i in need_person]
+                    for i, answer in zip(need_person, answers):
+                        person[i] = answer
+                ask_fall = [i for i in group if person[i] >= 0.5]
+                fallen = (yield [(crops[i], Q_FALL) for i in ask_fall]) if ask_fall else []
+            else:
+                ask_fall = list(group)
+                answers = yield [(crops[i], Q_PERSON) for i in need_person] + [(crops[i], Q_FALL) for i in ask_fall]
+                for i, answer in zip(need_person, answers):
+                    person[i] = answer
+                fallen = answers[len(need_person):]
+            
+            # A crop only votes Yes when a person is visible and that person is fallen
+            fallen_by_crop = dict(zip(ask_fall, fallen))
+            for i in group:
+                p_fallen = fallen_by_crop.get(i)
+                if person[i] >= 0.5 and p_fallen is not None and p_fallen >= 0.5:
+                    yes_votes += 1
+                else:
+                    no_votes += 1
+                crop_probs.append(person[i] * (p_fallen if p_fallen is not None else UNASKED_FALL_PRIOR))
+            evaluated += len(group)
+            
+            remaining = n - evaluated
+            if "majority" in cascade and (yes_votes > no_votes + remaining or no_votes >= yes_votes + remaining):
+                break
+        
+        return {
+            "yes": yes_votes,
+            "no": no_votes,
+            "total_crops": n,
+            "evaluated": evaluated,
+            "early_exit": evaluated < n,
+            "fall_probability": sum(crop_probs) / len(crop_probs),
+        }
+    
+    def _run_plans(self, plans: list, ctx: _RequestContext) -> List[Dict]:
+        """Tüm görüntülerin aşamalarını birlikte, aşama başına tek model çağrısıyla yürütür"""
+        results = [None] * len(plans)
+        pending = {}
         
-        # Square center crop
-        l = (w - m) // 2
-        t = (h - m) // 2
-        imgs.append(image.crop((l, t, l + m, t + m)))
+        for idx, plan in enumerate(plans):
+            try:
+                pending[idx] = next(plan)
+            except StopIteration as e:
+                results[idx] = e.value
+        
+        while pending:
+            pairs = [pair for request in pending.values() for pair in request]
+            answers = self._answer(pairs, ctx)
+            
+            next_pending = {}
+            offset = 0
+            for idx, request in pending.items():
+                try:
+                    next_pending[idx] = plans[idx].send(answers[offset:offset + len(request)])
+                except StopIteration as e:
+                    results[idx] = e.value
+                offset += len(request)
+            pending = next_pending
+        
+        return results
+    
+    def _run_prefilter(self, images: List[Image.Image]) -> Tuple[List[Optional[Dict]], List[Optional[list]]]:
+        """Ön filtrenin her görüntü için kararı ve kişi kutuları (filtre yoksa None)"""
+        if not self.prefilter:
+            return [None] * len(images), [None] * len(images)
+        
+        start_time = time.time()
+        detections = self.prefilter.detect(images)
+        self._record_timing("prefilter", start_time)
+        latency_ms = round((time.time() - start_time) * 1000 / len(images), 1)
+        
+        people = [
+            [box for box, score in found if score >= MODEL_CONFIG["person_box_min_score"]]
+            for found in detections
+        ]
+        if MODEL_CONFIG["prefilter"] == "none":
+            # Only here to localize people for the crops
+            return [None] * len(images), people
+        
+        verdicts = []
+        for found in detections:
+            score = max((score for _, score in found), default=0.0)
+            passed = score >= MODEL_CONFIG["prefilter_reject_below"]
+            self.prefilter_checked += 1
+            if not passed:
+                self.prefilter_rejected += 1
+            verdicts.append({
+                "name": self.prefilter.name,
+                "person_score": round(score, 4),
+                "passed": passed,
+                "latency_ms": latency_ms,
+            })
+        return verdicts, people
+    
+    async def _prefilter(self, images: List[Image.Image]) -> Tuple[List[Optional[Dict]], List[Optional[list]]]:
+        """Ön filtreyi kendi CPU thread'inde çalıştırır (filtre yoksa beklemeden döner)"""
+        if not self.prefilter:
+            return [None] * len(images), [None] * len(images)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.prefilter_executor, self._run_prefilter, images)
+    
+    def _rejected_result(self, verdict: Dict) -> Dict:
+        """Ön filtrenin kimse görmediği kare için VLM'siz "No" cevabı"""
+        return {
+            "result": "No",
+            "confidence": round(1.0 - verdict["person_score"], 3),
+            "fall_probability": 0.0,
+            "votes": None,
+            "prefilter": verdict,
+        }
+    
+    def _crop_regions(self, regions: Optional[list], people: Optional[list]) -> Optional[list]:
+        """Kırpımların merkezleneceği kutular: kişi kutuları ya da hareket bölgeleri"""
+        return people if MODEL_CONFIG["crops"] == "person" else regions
+    
+    def _detect_batch(self, images: List[Image.Image], cascade: Optional[frozenset] = None,
+                      regions: Optional[List[Optional[list]]] = None) -> List[Dict]:
+        """Ön filtreyi geçmiş bir grup görüntü için çok-kırpım oylamasını çalıştırır"""
+        if cascade is None:
+            cascade = MODEL_CONFIG["cascade"]
+        
+        regions = regions or [None] * len(images)
+        proposals = [self._make_crops(image, region) for image, region in zip(images, regions)]
+        
+        # Multi-crop voting approach
+        votes = self._run_plans(
+            [self._plan_votes(crops, cascade) for crops, _ in proposals],
+            _RequestContext(),
+        )
+        
+        results = []
+        for vote, (_, crop_info) in zip(votes, proposals):
+            if vote["early_exit"]:
+                self.early_exits += 1
+            
+            # Determine final result
+            fall_probability = vote.pop("fall_probability")
+            if MODEL_CONFIG["scoring"] == "logits":
+                # Label and confidence both come from the probabilities, so the
+                # confidence of the returned label is never below 0.5
+                final_result = "Yes" if fall_probability >= 0.5 else "No"
+            else:
+                final_result = "Yes" if vote["yes"] > vote["no"] else "No"
+            # With generate() scoring every answer is 0/1 and this reduces to the vote fraction
+            confidence = fall_probability if final_result == "Yes" else 1.0 - fall_probability
+            
+            result = {
+                "result": final_result,
+                "confidence": round(confidence, 3),
+                "fall_probability": round(fall_probability, 4),
+                "votes": vote,
+                "crops": crop_info,
+            }
+            results.append(result)
         
-        # 80% center crop
-        s = int(m * 0.8)
-        l2 = max(0, (w - s) // 2)
-        t2 = max(0, (h - s) // 2)
-        imgs.append(image.crop((l2, t2, l2 + s, t2 + s)))
+        # Clear GPU cache if available
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
         
-        return imgs
+        return results
+    
+    async def _run_batch(self, items: List[Tuple[Image.Image, Optional[list]]]) -> List[Dict]:
+        """Scheduler'ın topladığı (görüntü, bölgeler) batch'ini inference thread'inde çalıştırır"""
+        try:
+            # Blocking torch work stays off the event loop
+            return await self.executor.run(
+                self._detect_batch,
+                [image for image, _ in items],
+                None,
+                [regions for _, regions in items],
+            )
+        except Exception as e:
+            logging.error(f"❌ Fall detection error: {e}")
+            raise
     
-    async def detect_fall(self, image: Image.Image) -> Dict:
-        """Düşme tespiti ana fonksiyonu"""
+    async def detect_fall(self, image: Image.Image, regions: Optional[list] = None) -> Dict:
+        """Düşme tespiti ana fonksiyonu (regions: MODEL_CROPS=motion için bölge kutuları)"""
         if not self.is_initialized:
             raise RuntimeError("Model not initialized")
         
-        # Thread-safe model usage
-        async with self.model_lock:
-            try:
-                # Multi-crop voting approach
-                crops = self._make_crops(image)
-                yes_votes = 0
-                no_votes = 0
-                
-                for idx, img in enumerate(crops):
-                    # Check if person is visible
-                    q_person = "Is there a person visible in this image? Answer Yes or No."
-                    seen = self._ask_yes_no(img, q_person)
-                    
-                    if seen == "Yes":
-                        # Check if person is fallen
-                        q_fall = "Is any person lying on the ground or floor (appears fallen)? Answer Yes or No."
-                        fallen = self._ask_yes_no(img, q_fall)
-                        
-                        if fallen == "Yes":
-                            yes_votes += 1
-                        else:
-                            no_votes += 1
-                    else:
-                        no_votes += 1
-                
-                # Determine final result
-                final_result = "Yes" if yes_votes > no_votes else "No"
-                confidence = max(yes_votes, no_votes) / len(crops)
-                
-                # Clear GPU cache if available
-                if torch.cuda.is_available():
-                    torch.cuda.empty_cache()
-                
-                return {
-                    "result": final_result,
-                    "confidence": round(confidence, 3),
-                    "votes": {"yes": yes_votes, "no": no_votes, "total_crops": len(crops)}
-                }
-                
-            except Exception as e:
-                logging.error(f"❌ Fall detection error: {e}")
-                raise
+        # Frames the pre-filter is sure contain nobody never reach the VLM
+        (verdict,), (people,) = await self._prefilter([image])
+        if verdict is not None and not verdict["passed"]:
+            return self._rejected_result(verdict)
+        
+        # Concurrent requests are merged into one model call by the scheduler
+        with self.executor.admit():
+            result = await self.scheduler.submit((image, self._crop_regions(regions, people)))
+        if verdict is not None:
+            result["prefilter"] = verdict
+        return result
+    
+    async def detect_fall_batch(self, images: List[Image.Image],
+                                regions: Optional[List[Optional[list]]] = None) -> List[Dict]:
+        """Birden fazla görüntü için düşme tespiti (tek batch'li model çağrısı)"""
+        if not self.is_initialized:
+            raise RuntimeError("Model not initialized")
+        if not images:
+            return []
+        
+        regions = regions or [None] * len(images)
+        verdicts, people = await self._prefilter(images)
+        results = [
+            self._rejected_result(verdict) if verdict is not None and not verdict["passed"] else None
+            for verdict in verdicts
+        ]
+        passed = [i for i, result in enumerate(results) if result is None]
+        if not passed:
+            return results
+        
+        # Already a batch: skip the scheduler's collection window
+        with self.executor.admit(len(passed)):
+            answered = await self._run_batch([
+                (images[i], self._crop_regions(regions[i], people[i])) for i in passed
+            ])
+        for i, result in zip(passed, answered):
+            if verdicts[i] is not None:
+                result["prefilter"] = verdicts[i]
+            results[i] = result
+        return results
+    
+    def stats(self) -> Dict:
+        """Model servisi metrikleri"""
+        return {
+            "cascade": sorted(MODEL_CONFIG["cascade"]),
+            "scoring": MODEL_CONFIG["scoring"],
+            "model_calls": self.model_calls,
+            "questions_asked": self.questions_asked,
+            "early_exits": self.early_exits,
+            "prefix_cache": MODEL_CONFIG["scoring"] == "logits" and MODEL_CONFIG["prefix_cache"],
+            "vision_cache": {
+                "enabled": self.vision_features is not None,
+                "source": self.vision_features,
+                "crops_encoded": self.crops_encoded,
+                "hits": self.vision_cache_hits,
+            },
+            "prefilter": {
+                "name": self.prefilter.name if self.prefilter else None,
+                "reject_below": MODEL_CONFIG["prefilter_reject_below"],
+                "checked": self.prefilter_checked,
+                "rejected": self.prefilter_rejected,
+            },
+            "crops": {
+                "source": MODEL_CONFIG["crops"],
+                "max_side": MODEL_CONFIG["crop_max_side"],
+                "used": dict(self.crop_sources),
+            },
+            "stage_latency_ms": {
+                stage: {"calls": count, "avg": round(total / count, 1)}
+                for stage, (total, count) in self.stage_timings.items()
+            },
+            "batching": self.scheduler.stats(),
+            "executor": self.executor.stats(),
+        }
     
     async def cleanup(self):
         """Cleanup resources"""
         logging.info("🧹 Cleaning up model service...")
         
+        await self.scheduler.stop()
+        self.executor.shutdown()
+        if self.prefilter_executor:
+            self.prefilter_executor.shutdown(wait=True, cancel_futures=True)
+        
         if torch.cuda.is_available():
             torch.cuda.empty_cache()
         
         self.processor = None
         self.model = None
+        self.yes_token_ids = []
+        self.no_token_ids = []
         self.is_initialized = False
         
         logging.info("✅ Model service cleanup completed")
@@ -0,0 +1,102 @@
+"""
+Cascade benchmark
+
+Runs ModelService over the labelled test set behind
+fall_detection_results.csv once per cascade policy and reports how many
+questions each policy saves against the accuracy it costs.
+
+Usage (from ai-service/):
+    python model_test/benchmark_cascade.py [--images-dir DIR] [--limit N]
+"""
+
+import argparse
+import asyncio
+import csv
+import os
+import sys
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from model_service import ModelService, _parse_cascade
+
+TEST_IMAGES_DIR = "/mnt/c/Users/duggy/OneDrive/Belgeler/Github/FallDetection/test-images"
+RESULTS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fall_detection_results.csv")
+
+# Baseline first: every other policy is compared against it
+POLICIES = ["none", "person_gate", "full_frame", "full_frame,person_gate", "full_frame,person_gate,majority"]
+
+
+def load_labels(csv_path):
+    """CSV'den görsel adı -> doğru etiket eşlemesini oku"""
+    labels = {}
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            labels[row["Image"]] = int(row["True Label"])
+    return labels
+
+
+def run_policy(service, images, policy):
+    """Bir politika ile tüm görselleri işle, tahminleri ve soru sayısını döndür"""
+    cascade = _parse_cascade(policy)
+    questions_before = service.questions_asked
+    calls_before = service.model_calls
+    predictions = {}
+
+    start_time = time.time()
+    for name, path in images:
+        image = Image.open(path).convert("RGB")
+        result = service._detect_batch([image], cascade=cascade)[0]
+        predictions[name] = 1 if result["result"] == "Yes" else 0
+    elapsed = time.time() - start_time
+
+    return {
+        "predictions": predictions,
+        "questions": service.questions_asked - questions_before,
+        "model_calls": service.model_calls - calls_before,
+        "seconds": elapsed,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cascade policy benchmark")
+    parser.add_argument("--images-dir", default=TEST_IMAGES_DIR)
+    parser.add_argument("--limit", type=int, default=0, help="Only use the first N labelled images")
+    args = parser.parse_args()
+
+    labels = load_labels(RESULTS_CSV)
+    images = [
+        (name, os.path.join(args.images_dir, name))
+        for name in sorted(labels)
+        if os.path.exists(os.path.join(args.images_dir, name))
+    ]
+    if args.limit:
+        images = images[:args.limit]
+    if not images:
+        print(f"❌ No labelled images found in {args.images_dir}")
+        return
+
+    print(f"📁 {len(images)} labelled images")
+
+    service = ModelService()
+    asyncio.run(service.initialize())
+
+    baseline = None
+    print(f"\n{'policy':<34}{'questions':>10}{'saved':>9}{'calls':>8}{'accuracy':>10}{'delta':>9}{'sec/img':>9}")
+    for policy in POLICIES:
+        run = run_policy(service, images, policy)
+        correct = sum(1 for name, _ in images if run["predictions"][name] == labels[name])
+        accuracy = correct / len(images)
+        if baseline is None:
+            baseline = (run["questions"], accuracy)
+        saved = 1 - run["questions"] / baseline[0] if baseline[0] else 0
+        print(
+            f"{policy:<34}{run['questions']:>10}{saved:>9.1%}{run['model_calls']:>8}"
+            f"{accuracy:>10.2%}{accuracy - baseline[1]:>+9.2%}{run['seconds'] / len(images):>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Image decode benchmark
+
+Encodes synthetic camera-like JPEGs at several resolutions and decodes
+each one two ways: a full-resolution decode (the old
+Image.open().convert("RGB") path) and the draft-mode decode used by the
+service, which lets libjpeg scale the DCT blocks down to about
+DECODE_MAX_SIDE while decoding. Prints the median decode time and the
+peak RSS growth of the decode; every memory measurement runs in a fresh
+process so earlier allocations do not hide it (Linux only: the peak is
+read from /proc/self/status).
+
+Usage (from ai-service/):
+    python model_test/benchmark_decode.py [--sizes 1280x720,1920x1080,3840x2160] [--max-side 1536] [--repeats N]
+"""
+
+import argparse
+import io
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+from PIL import Image, ImageDraw
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from image_decode import decode_image
+
+DEFAULT_SIZES = "640x480,1280x720,1920x1080,2560x1440,3840x2160"
+
+
+def make_jpeg(width, height, quality):
+    """Gradyan, hafif gürültü ve şekiller içeren sentetik bir JPEG üret"""
+    gradient = Image.radial_gradient("L").resize((width, height))
+    noise = Image.effect_noise((width, height), 12)
+    image = Image.merge("RGB", [gradient, Image.blend(gradient, noise, 0.3), noise])
+    draw = ImageDraw.Draw(image)
+    step = max(1, min(width, height) // 8)
+    for i in range(0, min(width, height), step):
+        draw.rectangle((i, i, i + step, i + step * 2), fill=(i % 256, 128, 255 - i % 256))
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=quality)
+    return buffer.getvalue()
+
+
+def time_decode(data, max_side, repeats):
+    """Medyan çözme süresi (ms) ve çıkan görüntü boyutu"""
+    timings = []
+    for _ in range(repeats):
+        start_time = time.perf_counter()
+        image, _ = decode_image(data, max_side=max_side)
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return statistics.median(timings), image.size
+
+
+def _status_kb(field):
+    """/proc/self/status alanını KB olarak oku (VmRSS, VmHWM)"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def _peak_rss_child(data, max_side, queue):
+    """Yeni süreçte bir kez çöz, tepe RSS artışını (KB) gönder"""
+    # Reset the peak (VmHWM) so it only covers the decode
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+    before = _status_kb("VmRSS")
+    image, _ = decode_image(data, max_side=max_side)
+    queue.put(_status_kb("VmHWM") - before)
+
+
+def peak_rss_kb(data, max_side):
+    """Çözmenin tepe RSS artışı (KB), ayrı bir süreçte ölçülür"""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_peak_rss_child, args=(data, max_side, queue))
+    process.start()
+    growth = queue.get()
+    process.join()
+    return growth
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Full vs draft-mode JPEG decode benchmark")
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Comma-separated WxH resolutions")
+    parser.add_argument("--max-side", type=int, default=1536, help="DECODE_MAX_SIDE to compare against")
+    parser.add_argument("--quality", type=int, default=90)
+    parser.add_argument("--repeats", type=int, default=20)
+    args = parser.parse_args()
+
+    print(f"🖼️ Full decode vs draft decode at max side {args.max_side}, median of {args.repeats}")
+    print(f"\n{'input':>11}{'KB':>7}{'decoded':>11}{'full ms':>9}{'draft ms':>10}{'speedup':>9}"
+          f"{'full MB':>9}{'draft MB':>10}")
+    for size in args.sizes.split(","):
+        width, height = (int(v) for v in size.lower().split("x"))
+        data = make_jpeg(width, height, args.quality)
+
+        full_ms, _ = time_decode(data, 0, args.repeats)
+        draft_ms, draft_size = time_decode(data, args.max_side, args.repeats)
+        full_mb = peak_rss_kb(data, 0) / 1024
+        draft_mb = peak_rss_kb(data, args.max_side) / 1024
+
+        print(
+            f"{size:>11}{len(data) // 1024:>7}{'%dx%d' % draft_size:>11}{full_ms:>9.1f}{draft_ms:>10.1f}"
+            f"{full_ms / draft_ms:>8.1f}x{full_mb:>9.1f}{draft_mb:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+"""
+Insert throughput benchmark
+
+Inserts the same synthetic results into the old schema (one unpartitioned
+table with a unique hex image_hash, a duplicate idx_image_hash and indexes
+on created_at, result and processing_time_ms) and into the current
+partitioned, binary-hash schema (through DatabaseManager, so including the dedupe
+trigger and the statistics rollup), in write-behind sized batches, and
+prints rows/s.
+With --partitions, instead times batch inserts and hash lookups on the
+partitioned schema with the prefill spread over each given number of
+partitions, to show how the dedupe trigger and lookups scale with it.
+Each schema lives in a scratch Postgres schema that is dropped afterwards.
+
+Usage (from ai-service/, with DB_* pointing at a local Postgres):
+    python model_test/benchmark_inserts.py [--rows N] [--batch-size N] [--prefill N]
+    python model_test/benchmark_inserts.py --partitions 1,17,100,365 [--rows N] [--prefill N]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+
+import asyncpg
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from database import DATABASE_CONFIG, PARTITION_CONFIG, PHASH_CONFIG, TIMESERIES_CONFIG, DatabaseManager
+
+LEGACY_SCHEMA = """
+CREATE TABLE fall_detections (
+    id SERIAL PRIMARY KEY,
+    image_hash VARCHAR(64) UNIQUE NOT NULL,
+    result VARCHAR(10) NOT NULL,
+    confidence FLOAT,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    image_size VARCHAR(20),
+    processing_time_ms INTEGER,
+    phash BIGINT
+);
+CREATE INDEX idx_image_hash ON fall_detections(image_hash);
+CREATE INDEX idx_created_at ON fall_detections(created_at);
+CREATE INDEX idx_result ON fall_detections(result);
+CREATE INDEX idx_processing_time ON fall_detections(processing_time_ms);
+"""
+
+LEGACY_INSERT = """
+INSERT INTO fall_detections (image_hash, result, confidence, image_size, processing_time_ms, phash)
+SELECT * FROM unnest($1::varchar[], $2::varchar[], $3::float8[], $4::varchar[], $5::int[], $6::bigint[])
+ON CONFLICT (image_hash) DO NOTHING
+RETURNING image_hash, created_at
+"""
+
+LEGACY_PREFILL = """
+INSERT INTO fall_detections (image_hash, result, confidence, image_size, processing_time_ms)
+SELECT encode(sha256(i::text::bytea), 'hex'), 'No', 0.9, '640x480', 1000
+FROM generate_series(1, $1::bigint) AS i
+"""
+
+PREFILL = """
+INSERT INTO fall_detections (image_hash, result, confidence, image_width, image_height, processing_time_ms)
+SELECT sha256(i::text::bytea), 'No', 0.9, 640, 480, 1000
+FROM generate_series(1, $1::bigint) AS i
+"""
+
+# Spreads the rows over $2 days back from today, one partition per day
+SPREAD_PREFILL = """
+INSERT INTO fall_detections (image_hash, result, confidence, created_at, image_width, image_height, processing_time_ms)
+SELECT sha256(i::text::bytea), 'No', 0.9, CURRENT_DATE - (i % $2::int), 640, 480, 1000
+FROM generate_series(1, $1::bigint) AS i
+"""
+
+
+def make_batches(n_rows, batch_size):
+    """Rastgele hash'li sentetik sonuç batch'leri üret"""
+    rows = [{
+        "image_hash": uuid.uuid4().hex + uuid.uuid4().hex,
+        "result": "Yes" if random.random() < 0.2 else "No",
+        "confidence": random.random(),
+        "image_size": "640x480",
+        "processing_time_ms": random.randint(500, 2000),
+        "phash": random.getrandbits(63),
+    } for _ in range(n_rows)]
+    return [rows[i:i + batch_size] for i in range(0, n_rows, batch_size)]
+
+
+async def reset_schema(name):
+    config = {k: v for k, v in DATABASE_CONFIG.items() if k != "server_settings"}
+    conn = await asyncpg.connect(**config)
+    await conn.execute(f"DROP SCHEMA IF EXISTS {name} CASCADE; CREATE SCHEMA {name}")
+    await conn.close()
+
+
+async def drop_schema(name):
+    config = {k: v for k, v in DATABASE_CONFIG.items() if k != "server_settings"}
+    conn = await asyncpg.connect(**config)
+    await conn.execute(f"DROP SCHEMA IF EXISTS {name} CASCADE")
+    await conn.close()
+
+
+async def run_legacy(batches, prefill):
+    """Eski şemaya ekleme süresi"""
+    await reset_schema("bench_inserts_legacy")
+    try:
+        conn = await asyncpg.connect(**DATABASE_CONFIG, server_settings={"search_path": "bench_inserts_legacy"})
+        await conn.execute(LEGACY_SCHEMA)
+        if prefill:
+            await conn.execute(LEGACY_PREFILL, prefill)
+
+        start_time = time.perf_counter()
+        for batch in batches:
+            await conn.fetch(
+                LEGACY_INSERT,
+                [row["image_hash"] for row in batch],
+                [row["result"] for row in batch],
+                [row["confidence"] for row in batch],
+                [row["image_size"] for row in batch],
+                [row["processing_time_ms"] for row in batch],
+                [row["phash"] for row in batch],
+            )
+        elapsed = time.perf_counter() - start_time
+        await conn.close()
+        return elapsed
+    finally:
+        await drop_schema("bench_inserts_legacy")
+
+
+async def run_partitioned(batches, prefill):
+    """Partition'lı şemaya DatabaseManager üzerinden ekleme süresi"""
+    await reset_schema("bench_inserts_partitioned")
+    DATABASE_CONFIG["server_settings"] = {"search_path": "bench_inserts_partitioned"}
+    db = DatabaseManager()
+    try:
+        await db.connect()
+        if prefill:
+            async with db.pool.acquire() as conn:
+                await conn.execute(PREFILL, prefill)
+
+        start_time = time.perf_counter()
+        for batch in batches:
+            await db._insert_results(batch)
+        return time.perf_counter() - start_time
+    finally:
+        await db.disconnect()
+        del DATABASE_CONFIG["server_settings"]
+        await drop_schema("bench_inserts_partitioned")
+
+
+async def run_partition_count(batches, prefill, partitions):
+    """Belirli sayıda partition varken batch ekleme ve hash sorgu gecikmesi"""
+    await reset_schema("bench_inserts_partitions")
+    DATABASE_CONFIG["server_settings"] = {"search_path": "bench_inserts_partitions"}
+    db = DatabaseManager()
+    try:
+        await db.connect()
+        async with db.pool.acquire() as conn:
+            await conn.fetchval(
+                "SELECT ensure_fall_detection_partitions(1, 0, CURRENT_DATE - $1::int)", partitions - 1
+            )
+            await conn.execute(SPREAD_PREFILL, prefill, partitions)
+            await conn.execute("ANALYZE fall_detections")
+
+        insert_times, lookup_times = [], []
+        for batch in batches:
+            start_time = time.perf_counter()
+            await db._insert_results(batch)
+            insert_times.append(time.perf_counter() - start_time)
+
+            keys = [bytes.fromhex(row["image_hash"]) for row in batch]
+            start_time = time.perf_counter()
+            await db._fetch_results(keys)
+            lookup_times.append(time.perf_counter() - start_time)
+        return insert_times, lookup_times
+    finally:
+        await db.disconnect()
+        del DATABASE_CONFIG["server_settings"]
+        await drop_schema("bench_inserts_partitions")
+
+
+def percentile_ms(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] * 1000
+
+
+async def run_partitions(n_rows, batch_size, prefill, counts):
+    PHASH_CONFIG["enabled"] = False
+    TIMESERIES_CONFIG["warmup_hours"] = 0
+    # Daily partitions so the count is exact; nothing is dropped while timing
+    PARTITION_CONFIG["interval_days"] = 1
+    PARTITION_CONFIG["premake"] = 0
+    PARTITION_CONFIG["retention_days"] = 0
+
+    print(f"📦 {n_rows:,} rows in batches of {batch_size}, {prefill:,} rows spread over the partitions")
+    print(f"   {'partitions':>10}  {'insert p50':>10}  {'insert p95':>10}  {'lookup p50':>10}  {'lookup p95':>10}")
+    for count in counts:
+        insert_times, lookup_times = await run_partition_count(make_batches(n_rows, batch_size), prefill, count)
+        print(f"   {count:>10}  "
+              f"{percentile_ms(insert_times, 0.5):>8.2f}ms  {percentile_ms(insert_times, 0.95):>8.2f}ms  "
+              f"{percentile_ms(lookup_times, 0.5):>8.2f}ms  {percentile_ms(lookup_times, 0.95):>8.2f}ms")
+
+
+async def run(n_rows, batch_size, prefill):
+    PHASH_CONFIG["enabled"] = False
+    TIMESERIES_CONFIG["warmup_hours"] = 0
+    batches = make_batches(n_rows, batch_size)
+
+    print(f"📦 {n_rows:,} rows in batches of {batch_size}, {prefill:,} rows already in the table")
+    for label, fn in [("unpartitioned (old)", run_legacy), ("partitioned", run_partitioned)]:
+        elapsed = await fn(batches, prefill)
+        print(f"   {label:<22} {n_rows / elapsed:>10,.0f} rows/s  ({elapsed:.2f}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Insert throughput benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--prefill", type=int, default=1000000,
+                        help="Rows inserted before timing so the indexes are not empty")
+    parser.add_argument("--partitions", default="",
+                        help="Comma-separated partition counts, e.g. 1,17,100,365")
+    args = parser.parse_args()
+
+    if args.partitions:
+        counts = [int(count) for count in args.partitions.split(",")]
+        asyncio.run(run_partitions(args.rows, args.batch_size, args.prefill, counts))
+    else:
+        asyncio.run(run(args.rows, args.batch_size, args.prefill))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+"""
+Pre-filter benchmark
+
+Runs a MODEL_PREFILTER person detector over the labelled test set behind
+fall_detection_results.csv (no VLM needed) and, for a range of reject
+thresholds, reports how many frames it would answer "No" on its own and
+the fall recall that costs. The baseline recall comes from the VLM
+predictions stored in the CSV; with the pre-filter a fall only counts as
+caught if the VLM caught it and the pre-filter let the frame through.
+
+Usage (from ai-service/):
+    python model_test/benchmark_prefilter.py [--images-dir DIR] [--prefilter ssdlite] [--limit N]
+"""
+
+import argparse
+import csv
+import os
+import statistics
+import sys
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from prefilter import PREFILTERS, create_prefilter
+
+TEST_IMAGES_DIR = "/mnt/c/Users/duggy/OneDrive/Belgeler/Github/FallDetection/test-images"
+RESULTS_CSV = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fall_detection_results.csv")
+
+THRESHOLDS = [0.01, 0.02, 0.05, 0.1, 0.2, 0.3, 0.5]
+
+
+def load_rows(csv_path):
+    """CSV'den görsel adı -> (doğru etiket, VLM tahmini) eşlemesini oku"""
+    rows = {}
+    with open(csv_path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            rows[row["Image"]] = (int(row["True Label"]), int(row["Predicted Label"]))
+    return rows
+
+
+def score_images(prefilter, images, batch_size):
+    """Tüm görseller için kişi skoru ve görsel başına süre (ms)"""
+    scores = {}
+    timings = []
+    for i in range(0, len(images), batch_size):
+        chunk = images[i:i + batch_size]
+        loaded = [Image.open(path).convert("RGB") for _, path in chunk]
+        start_time = time.perf_counter()
+        chunk_scores = prefilter.person_scores(loaded)
+        timings.append((time.perf_counter() - start_time) * 1000 / len(chunk))
+        for (name, _), score in zip(chunk, chunk_scores):
+            scores[name] = score
+    return scores, timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pre-filter recall benchmark")
+    parser.add_argument("--images-dir", default=TEST_IMAGES_DIR)
+    parser.add_argument("--prefilter", default="ssdlite", choices=sorted(PREFILTERS))
+    parser.add_argument("--batch-size", type=int, default=1)
+    parser.add_argument("--limit", type=int, default=0, help="Only use the first N labelled images")
+    args = parser.parse_args()
+
+    rows = load_rows(RESULTS_CSV)
+    images = [
+        (name, os.path.join(args.images_dir, name))
+        for name in sorted(rows)
+        if os.path.exists(os.path.join(args.images_dir, name))
+    ]
+    if args.limit:
+        images = images[:args.limit]
+    if not images:
+        print(f"❌ No labelled images found in {args.images_dir}")
+        return
+
+    falls = [name for name, _ in images if rows[name][0] == 1]
+    caught = [name for name in falls if rows[name][1] == 1]
+    baseline_recall = len(caught) / len(falls) if falls else 0
+    print(f"📁 {len(images)} labelled images, {len(falls)} falls, VLM recall {baseline_recall:.2%}")
+
+    prefilter = create_prefilter(args.prefilter)
+    prefilter.load()
+    scores, timings = score_images(prefilter, images, max(1, args.batch_size))
+    print(f"⏱️ {args.prefilter}: {statistics.median(timings):.1f} ms/img median, {max(timings):.1f} ms max")
+
+    print(f"\n{'reject <':>9}{'skipped':>9}{'falls skipped':>15}{'recall':>9}{'loss':>9}")
+    for threshold in THRESHOLDS:
+        rejected = {name for name, _ in images if scores[name] < threshold}
+        recall = sum(1 for name in caught if name not in rejected) / len(falls) if falls else 0
+        falls_rejected = sum(1 for name in falls if name in rejected)
+        print(
+            f"{threshold:>9.2f}{len(rejected) / len(images):>9.1%}{falls_rejected:>15}"
+            f"{recall:>9.2%}{recall - baseline_recall:>+9.2%}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Prefix KV cache benchmark
+
+Scores the same images with logit scoring twice: once re-encoding the
+full prompt for every question, once reusing each crop's template +
+image KV cache across questions. Prints per-stage latency for both.
+
+Usage (from ai-service/):
+    python model_test/benchmark_prefix_cache.py [--images-dir DIR] [--limit N]
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+from PIL import Image
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from model_service import MODEL_CONFIG, ModelService
+
+TEST_IMAGES_DIR = "/mnt/c/Users/duggy/OneDrive/Belgeler/Github/FallDetection/test-images"
+SUPPORTED_FORMATS = ('.jpg', '.jpeg', '.png', '.webp', '.bmp')
+
+
+def run(service, images, prefix_cache):
+    """Görselleri verilen ayarla işle, aşama sürelerini döndür"""
+    MODEL_CONFIG["prefix_cache"] = prefix_cache
+    service.stage_timings = {}
+
+    start_time = time.time()
+    for path in images:
+        image = Image.open(path).convert("RGB")
+        service._detect_batch([image])
+    per_image = (time.time() - start_time) * 1000 / len(images)
+
+    return per_image, dict(service.stage_timings)
+
+
+def print_run(label, per_image, timings, n_images):
+    print(f"\n{label}: {per_image:.0f} ms/image")
+    for stage, (total, count) in timings.items():
+        print(f"   {stage:<10} {count:>5} calls  {total / count:>8.1f} ms/call  {total / n_images:>8.1f} ms/image")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prefix KV cache benchmark")
+    parser.add_argument("--images-dir", default=TEST_IMAGES_DIR)
+    parser.add_argument("--limit", type=int, default=20)
+    args = parser.parse_args()
+
+    images = sorted(
+        os.path.join(args.images_dir, f)
+        for f in os.listdir(args.images_dir)
+        if f.lower().endswith(SUPPORTED_FORMATS)
+    )[:args.limit]
+    if not images:
+        print(f"❌ No images found in {args.images_dir}")
+        return
+
+    MODEL_CONFIG["scoring"] = "logits"
+    service = ModelService()
+    asyncio.run(service.initialize())
+
+    # Warm-up so the first run does not pay for lazy initialisation
+    service._detect_batch([Image.open(images[0]).convert("RGB")])
+
+    before = run(service, images, prefix_cache=False)
+    after = run(service, images, prefix_cache=True)
+
+    print(f"📁 {len(images)} images, cascade={sorted(MODEL_CONFIG['cascade']) or 'none'}")
+    print_run("Full prompt per question", *before, len(images))
+    print_run("Prefix KV cache", *after, len(images))
+    print(f"\n⚡ Speed-up: {before[0] / after[0]:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""
+Result store benchmark
+
+Inserts the same synthetic results into each result store backend in
+write-behind sized batches, then looks them up again in /detect-fall-batch
+sized batches, and prints insert rows/s and lookup hashes/s. The result
+cache is disabled so every lookup reaches the storage engine, and the
+write-behind buffer is bypassed so inserts are timed directly.
+Postgres runs in a scratch schema and SQLite in a temporary file; both
+are removed afterwards.
+
+Usage (from ai-service/; the postgres run needs DB_* pointing at a local Postgres):
+    python model_test/benchmark_result_store.py [--rows N] [--batch-size N] [--lookup-batch N] [--backends postgres,sqlite]
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from result_store import PHASH_CONFIG, RESULT_CACHE_CONFIG, TIMESERIES_CONFIG, WRITE_BEHIND_CONFIG
+
+SCHEMA = "bench_result_store"
+
+
+def make_rows(n_rows):
+    """Rastgele hash'li sentetik sonuçlar üret"""
+    return [{
+        "image_hash": uuid.uuid4().hex + uuid.uuid4().hex,
+        "result": "Yes" if random.random() < 0.2 else "No",
+        "confidence": random.random(),
+        "image_size": "640x480",
+        "processing_time_ms": random.randint(500, 2000),
+        "phash": random.getrandbits(63),
+    } for _ in range(n_rows)]
+
+
+async def open_postgres():
+    """Geçici şemada Postgres deposu"""
+    import asyncpg
+    from database import DATABASE_CONFIG, DatabaseManager
+
+    conn = await asyncpg.connect(**DATABASE_CONFIG)
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+    await conn.close()
+    DATABASE_CONFIG["server_settings"] = {"search_path": SCHEMA}
+
+    async def cleanup():
+        del DATABASE_CONFIG["server_settings"]
+        conn = await asyncpg.connect(**DATABASE_CONFIG)
+        await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await conn.close()
+
+    return DatabaseManager(), cleanup
+
+
+async def open_sqlite():
+    """Geçici dosyada SQLite deposu"""
+    from sqlite_store import SQLiteResultStore
+
+    directory = tempfile.TemporaryDirectory()
+
+    async def cleanup():
+        directory.cleanup()
+
+    return SQLiteResultStore(os.path.join(directory.name, "bench.db")), cleanup
+
+
+BACKENDS = {
+    "postgres": open_postgres,
+    "sqlite": open_sqlite,
+}
+
+
+async def run_backend(name, rows, batch_size, lookup_batch):
+    """Bir depoda ekleme ve sorgu sürelerini ölç"""
+    store, cleanup = await BACKENDS[name]()
+    try:
+        await store.connect()
+
+        start_time = time.perf_counter()
+        for i in range(0, len(rows), batch_size):
+            await store._insert_results(rows[i:i + batch_size])
+        insert_elapsed = time.perf_counter() - start_time
+
+        hashes = [row["image_hash"] for row in rows]
+        random.shuffle(hashes)
+        start_time = time.perf_counter()
+        found = 0
+        for i in range(0, len(hashes), lookup_batch):
+            found += len(await store.check_existing_results(hashes[i:i + lookup_batch]))
+        lookup_elapsed = time.perf_counter() - start_time
+        assert found == len(hashes), f"{name}: found {found} of {len(hashes)}"
+
+        return insert_elapsed, lookup_elapsed
+    finally:
+        await store.disconnect()
+        await cleanup()
+
+
+async def run(n_rows, batch_size, lookup_batch, backends):
+    PHASH_CONFIG["enabled"] = False
+    TIMESERIES_CONFIG["warmup_hours"] = 0
+    WRITE_BEHIND_CONFIG["enabled"] = False
+    RESULT_CACHE_CONFIG["max_size"] = 0
+    rows = make_rows(n_rows)
+
+    print(f"📦 {n_rows:,} rows, inserts in batches of {batch_size}, lookups in batches of {lookup_batch}")
+    print(f"   {'backend':<10}{'insert rows/s':>16}{'lookup hashes/s':>18}")
+    for name in backends:
+        try:
+            insert_elapsed, lookup_elapsed = await run_backend(name, rows, batch_size, lookup_batch)
+        except Exception as e:
+            print(f"   {name:<10} skipped: {e}")
+            continue
+        print(f"   {name:<10}{n_rows / insert_elapsed:>16,.0f}{n_rows / lookup_elapsed:>18,.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Result store benchmark")
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--lookup-batch", type=int, default=16)
+    parser.add_argument("--backends", default="postgres,sqlite",
+                        help=f"Comma-separated subset of {','.join(BACKENDS)}")
+    args = parser.parse_args()
+
+    backends = [name.strip() for name in args.backends.split(",")]
+    unknown = [name for name in backends if name not in BACKENDS]
+    if unknown:
+        parser.error(f"unknown backends: {','.join(unknown)}")
+
+    asyncio.run(run(args.rows, args.batch_size, args.lookup_batch, backends))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Statistics / health-probe benchmark
+
+Grows fall_detections in steps with synthetic rows and, at each size,
+times the old full-table aggregate against get_statistics(), which reads
+the per-day rollup. Runs in a scratch schema that is dropped afterwards,
+so it is safe to point at a development database.
+
+Usage (from ai-service/, with DB_* pointing at a local Postgres):
+    python model_test/benchmark_statistics.py [--sizes 100000,1000000,10000000] [--probes N]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import asyncpg
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from database import DATABASE_CONFIG, PHASH_CONFIG, DatabaseManager
+
+SCHEMA = "bench_statistics"
+CHUNK_ROWS = 1_000_000
+
+# The query get_statistics() ran before the rollup existed
+FULL_SCAN_QUERY = """
+SELECT
+    COUNT(*) as total_processed,
+    COUNT(CASE WHEN result = 'Yes' THEN 1 END) as fall_detected,
+    COUNT(CASE WHEN result = 'No' THEN 1 END) as no_fall,
+    AVG(processing_time_ms) as avg_processing_time,
+    COUNT(DISTINCT DATE(created_at)) as days_active
+FROM fall_detections
+"""
+
+# Synthetic rows spread over the last year (the rollup triggers update the
+# counters, as for the service's inserts)
+GROW_QUERY = """
+INSERT INTO fall_detections
+    (image_hash, result, confidence, image_width, image_height, processing_time_ms, created_at)
+SELECT
+    sha256(i::text::bytea),
+    CASE WHEN random() < 0.2 THEN 'Yes' ELSE 'No' END,
+    random(),
+    640,
+    480,
+    (500 + random() * 1500)::int,
+    now() - (i % 365) * interval '1 day'
+FROM generate_series($1::bigint, $2::bigint) AS i
+"""
+
+
+async def time_probes(fn, probes):
+    """fn'i probes kez çalıştır, ms cinsinden süreleri döndür"""
+    timings = []
+    for _ in range(probes):
+        start_time = time.perf_counter()
+        await fn()
+        timings.append((time.perf_counter() - start_time) * 1000)
+    return timings
+
+
+async def run(sizes, probes):
+    DATABASE_CONFIG["server_settings"] = {"search_path": SCHEMA}
+    PHASH_CONFIG["enabled"] = False
+
+    db = DatabaseManager()
+
+    # The schema has to exist before connect() creates the tables in it
+    bootstrap = {k: v for k, v in DATABASE_CONFIG.items() if k != "server_settings"}
+    conn = await asyncpg.connect(**bootstrap)
+    await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE; CREATE SCHEMA {SCHEMA}")
+    await conn.close()
+
+    await db.connect()
+    try:
+        print(f"{'rows':>12}{'full scan p50':>16}{'full scan p95':>16}{'rollup p50':>13}{'rollup p95':>13}")
+        rows = 0
+        for size in sizes:
+            async with db.pool.acquire() as conn:
+                while rows < size:
+                    upto = min(size, rows + CHUNK_ROWS)
+                    await conn.execute(GROW_QUERY, rows + 1, upto)
+                    rows = upto
+                await conn.execute("ANALYZE fall_detections")
+
+            async def full_scan():
+                async with db.pool.acquire() as conn:
+                    await conn.fetchrow(FULL_SCAN_QUERY)
+
+            full = await time_probes(full_scan, probes)
+            rollup = await time_probes(db.get_statistics, probes)
+            print(
+                f"{rows:>12,}{statistics.median(full):>14.2f}ms{statistics.quantiles(full, n=20)[-1]:>14.2f}ms"
+                f"{statistics.median(rollup):>11.2f}ms{statistics.quantiles(rollup, n=20)[-1]:>11.2f}ms"
+            )
+    finally:
+        async with db.pool.acquire() as conn:
+            await conn.execute(f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE")
+        await db.disconnect()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Statistics / health-probe benchmark")
+    parser.add_argument("--sizes", default="100000,1000000,10000000,30000000",
+                        help="Comma-separated table sizes to measure at")
+    parser.add_argument("--probes", type=int, default=20)
+    args = parser.parse_args()
+
+    sizes = sorted(int(size) for size in args.sizes.split(","))
+    asyncio.run(run(sizes, max(2, args.probes)))
+
+
+if __name__ == "__main__":
+    main()
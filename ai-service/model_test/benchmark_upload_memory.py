@@ -0,0 +1,117 @@
+"""
+Upload memory benchmark
+
+Simulates N concurrent uploads of the same large JPEG, each already
+spooled by the multipart parser the way Starlette does it (memory up to
+1 MB, disk beyond), and runs the service's upload handling on them:
+
+    read    old path: await file.read(), hash the bytes, decode from them
+    stream  read_upload(): hash the spool in chunks, decode from the spool
+
+Every mode runs in a fresh process and reports the peak RSS growth
+while the uploads are handled (Linux only: the peak is read from
+/proc/self/status). Decoding uses DECODE_MAX_SIDE as in the service.
+
+Usage (from ai-service/):
+    python model_test/benchmark_upload_memory.py [--uploads 32] [--size 4000x3000] [--quality 95] [--max-side 1536]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import multiprocessing
+import os
+import sys
+import tempfile
+
+from fastapi import UploadFile
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from benchmark_decode import make_jpeg
+from image_decode import decode_image
+from upload_stream import read_upload
+
+# Starlette's MultiPartParser spools files to disk beyond 1 MB
+SPOOL_MAX_SIZE = 1024 * 1024
+MODES = ("read", "stream")
+
+
+def _status_kb(field):
+    """/proc/self/status alanını KB olarak oku (VmRSS, VmHWM)"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith(field + ":"):
+                return int(line.split()[1])
+    return 0
+
+
+def make_upload(data):
+    """Çözümleyicinin bıraktığı gibi spool'lanmış bir UploadFile oluştur"""
+    spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+    spool.write(data)
+    spool.seek(0)
+    return UploadFile(spool, size=len(data), filename="frame.jpg")
+
+
+async def handle(mode, file, max_side):
+    """Bir yüklemeyi seçilen yolla hash'le ve çöz"""
+    if mode == "read":
+        image_bytes = await file.read()
+        image_hash = hashlib.sha256(image_bytes).hexdigest()
+    else:
+        image_bytes, image_hash = await read_upload(file, max_bytes=1 << 30)
+    # Lookup round trip, as between hashing and decoding in the service
+    await asyncio.sleep(0.01)
+    image, _ = await asyncio.to_thread(decode_image, image_bytes, max_side)
+    return image_hash, image.size
+
+
+def _run_child(mode, data, uploads, max_side, queue):
+    """Yeni süreçte eşzamanlı yüklemeleri işle, tepe RSS artışını (KB) gönder"""
+    files = [make_upload(data) for _ in range(uploads)]
+    # Reset the peak (VmHWM) so it only covers the request handling
+    with open("/proc/self/clear_refs", "w") as f:
+        f.write("5")
+    before = _status_kb("VmRSS")
+
+    async def run():
+        return await asyncio.gather(*(handle(mode, file, max_side) for file in files))
+
+    results = asyncio.run(run())
+    assert len({image_hash for image_hash, _ in results}) == 1
+    queue.put(_status_kb("VmHWM") - before)
+
+
+def peak_rss_kb(mode, data, uploads, max_side):
+    """Bir yolun tepe RSS artışı (KB), ayrı bir süreçte ölçülür"""
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_run_child, args=(mode, data, uploads, max_side, queue))
+    process.start()
+    growth = queue.get()
+    process.join()
+    return growth
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload handling peak RSS benchmark")
+    parser.add_argument("--uploads", type=int, default=32, help="Concurrent uploads")
+    parser.add_argument("--size", default="4000x3000", help="Image resolution WxH")
+    parser.add_argument("--quality", type=int, default=95)
+    parser.add_argument("--max-side", type=int, default=1536, help="DECODE_MAX_SIDE")
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    data = make_jpeg(width, height, args.quality)
+    print(f"📤 {args.uploads} concurrent uploads of a {args.size} JPEG ({len(data) / 1024 / 1024:.1f} MB)")
+
+    peaks = {mode: peak_rss_kb(mode, data, args.uploads, args.max_side) / 1024 for mode in MODES}
+    for mode in MODES:
+        print(f"   {mode:>7}: peak RSS +{peaks[mode]:.1f} MB")
+    print(f"💾 stream saves {peaks['read'] - peaks['stream']:.1f} MB "
+          f"({(peaks['read'] - peaks['stream']) / peaks['read']:.0%})")
+
+
+if __name__ == "__main__":
+    main()
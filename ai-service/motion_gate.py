@@ -0,0 +1,131 @@
+import itertools
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+
+class MotionGate:
+    """Kamera başına hareket kapısı: sahne değişmediyse son sonucu döndürür.
+
+    Each camera keeps a small grayscale copy of the last frame that was
+    actually analysed, together with its result. A new frame is reduced
+    the same way and compared pixel by pixel; if the share of pixels that
+    changed by more than ``pixel_delta`` stays below ``threshold``, the
+    camera's last result is returned and the model is not called.
+    Comparing against the last analysed frame (not the previous frame)
+    means slow drift still opens the gate once it adds up, and
+    ``max_static_s`` forces a fresh analysis every so often regardless.
+    Frames are numbered on arrival (``next_seq``); a result that comes back
+    for a frame older than the camera's current reference is ignored, so
+    a slow analysis cannot replace a newer one.
+    """
+
+    def __init__(
+        self,
+        threshold: float = 0.01,
+        pixel_delta: int = 12,
+        size: int = 64,
+        max_static_s: float = 60.0,
+        max_cameras: int = 1000,
+    ):
+        self.threshold = threshold
+        self.pixel_delta = pixel_delta
+        self.size = max(8, size)
+        self.max_static_s = max_static_s
+        self.max_cameras = max(1, max_cameras)
+        self._cameras: "OrderedDict[str, Dict]" = OrderedDict()
+        self._seq = itertools.count(1)
+
+        # Metrics
+        self.checks = 0
+        self.hits = 0
+        self.expired = 0
+        self.stale_updates = 0
+
+    def next_seq(self) -> int:
+        """Gelen kareye sıra numarası ver (geliş anında çağrılır)"""
+        return next(self._seq)
+
+    def frame(self, image: Image.Image) -> np.ndarray:
+        """Görüntüyü karşılaştırma için küçük gri tonlu diziye çevir (durumsuz, worker thread'de çalışabilir)"""
+        width, height = image.size
+        # Keep the aspect ratio; the long side becomes self.size pixels
+        scale = self.size / max(width, height)
+        small = image.convert("L").resize(
+            (max(1, round(width * scale)), max(1, round(height * scale))),
+            Image.Resampling.BILINEAR,
+        )
+        return np.asarray(small, dtype=np.int16)
+
+    def check(self, camera_id: str, frame: np.ndarray) -> Optional[Dict]:
+        """Sahne durağansa kameranın son sonucunu döndür (yoksa None)"""
+        self.checks += 1
+        state = self._cameras.get(camera_id)
+        if state is None or state["frame"].shape != frame.shape:
+            return None
+        self._cameras.move_to_end(camera_id)
+
+        if time.monotonic() - state["analysed_at"] > self.max_static_s:
+            self.expired += 1
+            return None
+
+        motion = float(np.mean(np.abs(frame - state["frame"]) > self.pixel_delta))
+        if motion >= self.threshold:
+            return None
+
+        self.hits += 1
+        return dict(state["result"], motion=round(motion, 4))
+
+    def region(self, camera_id: str, frame: np.ndarray, image_size: Tuple[int, int]) -> Optional[Tuple[int, int, int, int]]:
+        """Son analiz edilen kareye göre değişen bölgenin kutusu (görüntü pikselinde)"""
+        state = self._cameras.get(camera_id)
+        if state is None or state["frame"].shape != frame.shape:
+            return None
+
+        mask = np.abs(frame - state["frame"]) > self.pixel_delta
+        # A row/column needs two changed pixels, so isolated sensor noise does not stretch the box
+        rows = np.flatnonzero(mask.sum(axis=1) >= 2)
+        cols = np.flatnonzero(mask.sum(axis=0) >= 2)
+        if not rows.size or not cols.size:
+            return None
+
+        scale_x = image_size[0] / frame.shape[1]
+        scale_y = image_size[1] / frame.shape[0]
+        return (
+            int(cols[0] * scale_x),
+            int(rows[0] * scale_y),
+            min(image_size[0], int((cols[-1] + 1) * scale_x)),
+            min(image_size[1], int((rows[-1] + 1) * scale_y)),
+        )
+
+    def update(self, camera_id: str, frame: np.ndarray, result: Dict, seq: int = 0):
+        """Analiz edilen kareyi ve sonucunu kameranın referansı yap (daha eski bir kareyse yoksay)"""
+        state = self._cameras.get(camera_id)
+        if state is not None and seq < state["seq"]:
+            self.stale_updates += 1
+            return
+
+        self._cameras[camera_id] = {
+            "frame": frame,
+            "result": dict(result),
+            "analysed_at": time.monotonic(),
+            "seq": seq,
+        }
+        self._cameras.move_to_end(camera_id)
+        while len(self._cameras) > self.max_cameras:
+            self._cameras.popitem(last=False)
+
+    def stats(self) -> Dict:
+        """Kapı metrikleri"""
+        return {
+            "cameras": len(self._cameras),
+            "checks": self.checks,
+            "hits": self.hits,
+            "hit_rate": round(self.hits / self.checks, 4) if self.checks else 0,
+            "expired": self.expired,
+            "stale_updates": self.stale_updates,
+            "threshold": self.threshold,
+        }
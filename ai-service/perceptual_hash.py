@@ -0,0 +1,108 @@
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from PIL import Image
+
+HASH_BITS = 64
+
+
+def dhash(image: Image.Image, hash_size: int = 8) -> int:
+    """Görüntünün 64-bit fark hash'ini (dHash) hesaplar.
+
+    The image is reduced to a (hash_size + 1) x hash_size grayscale grid
+    and each bit records whether a pixel is brighter than its right-hand
+    neighbour, so re-encoding and sensor noise flip very few bits.
+    """
+    small = image.convert("L").resize((hash_size + 1, hash_size), Image.Resampling.BILINEAR)
+    pixels = np.asarray(small, dtype=np.int16)
+    bits = (pixels[:, 1:] > pixels[:, :-1]).flatten()
+    return int.from_bytes(np.packbits(bits).tobytes(), "big")
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """İki hash arasındaki farklı bit sayısı"""
+    return bin(a ^ b).count("1")
+
+
+def to_signed(phash: int) -> int:
+    """64-bit hash'i PostgreSQL BIGINT aralığına çevirir"""
+    return phash - (1 << HASH_BITS) if phash >= (1 << (HASH_BITS - 1)) else phash
+
+
+def to_unsigned(value: int) -> int:
+    """BIGINT değerini tekrar 64-bit hash'e çevirir"""
+    return value + (1 << HASH_BITS) if value < 0 else value
+
+
+class PerceptualIndex:
+    """Hamming mesafesi aramaları için bant tabanlı (multi-index) hash indeksi.
+
+    The 64 bits are split into ``threshold + 1`` bands. If two hashes
+    differ in at most ``threshold`` bits, at least one band is identical
+    (pigeonhole), so a lookup only compares against entries sharing a
+    band instead of scanning everything. Oldest entries are dropped once
+    ``max_entries`` is reached.
+    """
+
+    def __init__(self, threshold: int = 4, max_entries: int = 100000):
+        self.threshold = max(0, threshold)
+        self.max_entries = max_entries
+        n_bands = self.threshold + 1
+        width = HASH_BITS // n_bands
+        self._bands: List[Tuple[int, int]] = [
+            (i * width, HASH_BITS - i * width if i == n_bands - 1 else width)
+            for i in range(n_bands)
+        ]
+        self._tables: List[Dict[int, set]] = [{} for _ in self._bands]
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+
+        # Metrics
+        self.lookups = 0
+        self.matches = 0
+
+    def _keys(self, phash: int) -> List[int]:
+        return [(phash >> shift) & ((1 << width) - 1) for shift, width in self._bands]
+
+    def add(self, image_hash: str, phash: int):
+        """Görsel hash'ini perceptual hash'i ile indekse ekle"""
+        if image_hash in self._entries:
+            return
+
+        self._entries[image_hash] = phash
+        for table, key in zip(self._tables, self._keys(phash)):
+            table.setdefault(key, set()).add(image_hash)
+
+        while len(self._entries) > self.max_entries:
+            old_hash, old_phash = self._entries.popitem(last=False)
+            for table, key in zip(self._tables, self._keys(old_phash)):
+                bucket = table.get(key)
+                if bucket is not None:
+                    bucket.discard(old_hash)
+                    if not bucket:
+                        del table[key]
+
+    def find(self, phash: int) -> Optional[Tuple[str, int]]:
+        """Eşik içindeki en yakın kaydı (image_hash, mesafe) olarak döndür"""
+        self.lookups += 1
+        best = None
+
+        for table, key in zip(self._tables, self._keys(phash)):
+            for candidate in table.get(key, ()):
+                distance = hamming_distance(phash, self._entries[candidate])
+                if distance <= self.threshold and (best is None or distance < best[1]):
+                    best = (candidate, distance)
+
+        if best is not None:
+            self.matches += 1
+        return best
+
+    def stats(self) -> Dict:
+        """İndeks metrikleri"""
+        return {
+            "entries": len(self._entries),
+            "threshold": self.threshold,
+            "lookups": self.lookups,
+            "matches": self.matches,
+            "hit_rate": round(self.matches / self.lookups, 4) if self.lookups else 0,
+        }
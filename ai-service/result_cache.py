@@ -0,0 +1,71 @@
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+
+
+class ResultCache:
+    """Sınırlı boyutlu, süreli (LRU + TTL) bellek içi sonuç önbelleği.
+
+    Sits in front of the database hash lookup. The least recently used
+    entry is evicted once ``max_size`` is reached; entries older than
+    ``ttl_seconds`` are treated as misses (0 disables expiry).
+    """
+
+    def __init__(self, max_size: int = 10000, ttl_seconds: float = 3600):
+        self.max_size = max(0, max_size)
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Önbellekteki sonucu döndür (yoksa veya süresi dolduysa None)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        stored_at, value = entry
+        if self.ttl_seconds and time.monotonic() - stored_at > self.ttl_seconds:
+            del self._entries[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+
+        # Callers annotate responses (e.g. filename), never hand out the stored dict
+        return dict(value)
+
+    def put(self, key: str, value: Dict):
+        """Sonucu önbelleğe ekle, gerekirse en eski kaydı çıkar"""
+        if self.max_size == 0:
+            return
+
+        self._entries[key] = (time.monotonic(), dict(value))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def stats(self) -> Dict:
+        """Önbellek metrikleri"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+        }
@@ -0,0 +1,328 @@
+import asyncio
+import hashlib
+import os
+from datetime import datetime, timedelta
+from typing import AsyncIterator, Optional, List, Dict, Tuple
+import logging
+from abc import ABC, abstractmethod
+
+from result_cache import ResultCache
+from perceptual_hash import PerceptualIndex, dhash
+from write_behind import WriteBehindBuffer
+from latency_stats import TimeBucketedStats
+
+# In-process result cache in front of the hash lookup
+RESULT_CACHE_CONFIG = {
+    "max_size": int(os.getenv("RESULT_CACHE_SIZE", "10000")),
+    "ttl_seconds": float(os.getenv("RESULT_CACHE_TTL_SECONDS", "3600")),
+}
+
+# Perceptual-hash near-duplicate lookup
+PHASH_CONFIG = {
+    "enabled": os.getenv("PHASH_ENABLED", "true").lower() == "true",
+    "threshold": int(os.getenv("PHASH_THRESHOLD", "4")),
+    "max_entries": int(os.getenv("PHASH_INDEX_SIZE", "100000")),
+}
+
+# Write-behind buffer (opt-in): results are inserted in the background, in
+# batches, after the response has been sent. max_pending bounds how many
+# unflushed results a crash can lose. Only for deployments where this
+# service is the sole writer: another writer (the backend's FrameProcessor)
+# can insert the hash first, without phash or processing time, and the
+# later flush is then dropped on conflict.
+WRITE_BEHIND_CONFIG = {
+    "enabled": os.getenv("WRITE_BEHIND_ENABLED", "false").lower() == "true",
+    "batch_size": int(os.getenv("WRITE_BEHIND_BATCH_SIZE", "100")),
+    "flush_interval_ms": float(os.getenv("WRITE_BEHIND_FLUSH_MS", "500")),
+    "max_pending": int(os.getenv("WRITE_BEHIND_MAX_PENDING", "10000")),
+}
+
+# In-process time buckets (count, fall rate, latency percentiles) per granularity.
+# On start the buckets are rebuilt from the last warmup_hours of rows.
+TIMESERIES_CONFIG = {
+    "retention": {
+        "minute": int(os.getenv("STATS_MINUTE_BUCKETS", "120")),
+        "hour": int(os.getenv("STATS_HOUR_BUCKETS", "48")),
+        "day": int(os.getenv("STATS_DAY_BUCKETS", "30")),
+    },
+    "relative_accuracy": float(os.getenv("STATS_SKETCH_ACCURACY", "0.01")),
+    "warmup_hours": float(os.getenv("STATS_WARMUP_HOURS", "48")),
+}
+
+
+def hash_to_bytes(image_hash: str) -> Optional[bytes]:
+    """Hex SHA256 hash'ini 32 byte'a çevir (geçersizse None)"""
+    try:
+        raw = bytes.fromhex(image_hash)
+    except (TypeError, ValueError):
+        return None
+    return raw if len(raw) == 32 else None
+
+def parse_image_size(image_size: Optional[str]) -> Tuple[Optional[int], Optional[int]]:
+    """"640x480" biçimini (genişlik, yükseklik) olarak ayır"""
+    try:
+        width, height = (int(part) for part in image_size.split("x"))
+    except (AttributeError, ValueError):
+        return None, None
+    # SMALLINT columns
+    if not (0 < width <= 32767 and 0 < height <= 32767):
+        return None, None
+    return width, height
+
+def format_image_size(width: Optional[int], height: Optional[int]) -> Optional[str]:
+    """(genişlik, yükseklik) değerini "640x480" biçimine çevir"""
+    return f"{width}x{height}" if width and height else None
+
+
+class ResultStore(ABC):
+    """Tespit sonuçlarının kalıcı deposu için ortak katman.
+
+    Everything in front of the storage engine lives here: the result
+    cache, the perceptual-hash index, the write-behind buffer and the time
+    buckets. Backends only implement the storage hooks (_open, _close,
+    _fetch_results, _insert_results, _fetch_phashes, _iter_recent,
+    get_statistics and backend_stats), so the API behaves the same
+    whichever engine holds the rows.
+    """
+
+    backend = "base"
+
+    def __init__(self):
+        self.result_cache = ResultCache(**RESULT_CACHE_CONFIG)
+        self.phash_index = PerceptualIndex(
+            threshold=PHASH_CONFIG["threshold"],
+            max_entries=PHASH_CONFIG["max_entries"],
+        )
+        self.write_buffer = WriteBehindBuffer(
+            self._insert_results,
+            batch_size=WRITE_BEHIND_CONFIG["batch_size"],
+            flush_interval_ms=WRITE_BEHIND_CONFIG["flush_interval_ms"],
+            max_pending=WRITE_BEHIND_CONFIG["max_pending"],
+        ) if WRITE_BEHIND_CONFIG["enabled"] else None
+        self.timeseries = TimeBucketedStats(
+            TIMESERIES_CONFIG["retention"],
+            relative_accuracy=TIMESERIES_CONFIG["relative_accuracy"],
+        )
+        self._warmup_task = None
+
+    async def connect(self):
+        """Depoyu aç, indeksleri ve arka plan görevlerini başlat"""
+        try:
+            await self._open()
+            if PHASH_CONFIG["enabled"]:
+                await self.load_phash_index()
+            if self.write_buffer:
+                await self.write_buffer.start()
+            if TIMESERIES_CONFIG["warmup_hours"] > 0:
+                # Taken before connect() returns, i.e. before any result can
+                # be saved: rows from then on are recorded live, so the
+                # warm-up must stop here or it counts them twice
+                until = datetime.now()
+                self._warmup_task = asyncio.create_task(self.load_timeseries(until))
+            logging.info(f"✅ Result store connected ({self.backend})")
+        except Exception as e:
+            logging.error(f"❌ Result store connection failed ({self.backend}): {e}")
+            raise
+
+    async def disconnect(self):
+        """Bekleyen sonuçları yaz ve depoyu kapat"""
+        if self._warmup_task:
+            self._warmup_task.cancel()
+        if self.write_buffer:
+            await self.write_buffer.stop()
+        await self._close()
+
+    # Storage hooks
+
+    @abstractmethod
+    async def _open(self):
+        """Bağlantıyı aç ve şemayı hazırla"""
+
+    @abstractmethod
+    async def _close(self):
+        """Bağlantıyı kapat"""
+
+    @abstractmethod
+    async def _fetch_results(self, keys: List[bytes]) -> List[Dict]:
+        """32 byte'lık hash'lere ait satırları getir (hex hash, "WxH" boyut)"""
+
+    @abstractmethod
+    async def _insert_results(self, rows: List[Dict]) -> Dict[str, datetime]:
+        """Satırları yaz, eklenenlerin created_at'ini döndür"""
+
+    @abstractmethod
+    async def _fetch_phashes(self, limit: int) -> List[Tuple[str, int]]:
+        """En yeni limit kaydın (hex hash, işaretsiz phash) çiftleri, yeniden eskiye"""
+
+    @abstractmethod
+    def _iter_recent(self, start: datetime, until: datetime) -> AsyncIterator[Tuple[datetime, str, Optional[int]]]:
+        """start <= created_at < until aralığındaki (created_at, result, processing_time_ms) satırları"""
+
+    @abstractmethod
+    async def get_statistics(self) -> Dict:
+        """Genel istatistikleri getir"""
+
+    @abstractmethod
+    def backend_stats(self) -> Dict:
+        """Depolama motoru metrikleri"""
+
+    # Shared logic
+
+    def calculate_image_hash(self, image_bytes: bytes) -> str:
+        """Görsel için SHA256 hash hesapla"""
+        return hashlib.sha256(image_bytes).hexdigest()
+
+    def calculate_perceptual_hash(self, image) -> Optional[int]:
+        """Görsel için dHash hesapla (kapalıysa None)"""
+        return dhash(image) if PHASH_CONFIG["enabled"] else None
+
+    def _to_result(self, row) -> Dict:
+        """Kayıt satırını API yanıtına çevir"""
+        return {
+            "image_hash": row["image_hash"],
+            "result": row["result"],
+            "confidence": row["confidence"],
+            "created_at": row["created_at"].isoformat(),
+            "image_size": row["image_size"],
+            "processing_time_ms": row["processing_time_ms"],
+            "cached": True
+        }
+
+    async def check_existing_result(self, image_hash: str) -> Optional[Dict]:
+        """Varolan sonucu kontrol et"""
+        image_hash = image_hash.lower()
+        found = await self.check_existing_results([image_hash])
+        return found.get(image_hash)
+
+    async def check_existing_results(self, image_hashes: List[str]) -> Dict[str, Dict]:
+        """Birden fazla hash için varolan sonuçları tek sorguda getir"""
+        found = {}
+        missing = []
+        for image_hash in dict.fromkeys(image_hashes):
+            cached = self.result_cache.get(image_hash)
+            pending = self.write_buffer.get(image_hash) if self.write_buffer else None
+            if cached:
+                found[image_hash] = cached
+            elif pending:
+                found[image_hash] = self._to_result(pending)
+            else:
+                missing.append(image_hash)
+
+        if not missing:
+            return found
+
+        # Malformed hashes (e.g. from /result/{image_hash}) cannot be stored
+        keys = [raw for raw in map(hash_to_bytes, missing) if raw is not None]
+        if not keys:
+            return found
+
+        for row in await self._fetch_results(keys):
+            result = self._to_result(row)
+            self.result_cache.put(row["image_hash"], result)
+            found[row["image_hash"]] = result
+        return found
+
+    async def load_phash_index(self):
+        """En yeni kayıtların perceptual hash'lerini indekse yükle"""
+        rows = await self._fetch_phashes(self.phash_index.max_entries)
+
+        # Oldest first so the newest rows are the last to be evicted
+        for image_hash, phash in reversed(rows):
+            self.phash_index.add(image_hash, phash)
+        logging.info(f"🧩 Loaded {len(rows)} perceptual hashes")
+
+    async def load_timeseries(self, until: Optional[datetime] = None):
+        """until'den önceki son kayıtları zaman kovalarına yükle"""
+        until = until or datetime.now()
+        try:
+            loaded = 0
+            async for created_at, result, processing_time_ms in self._iter_recent(
+                until - timedelta(hours=TIMESERIES_CONFIG["warmup_hours"]), until
+            ):
+                self.timeseries.record(created_at, result, processing_time_ms)
+                loaded += 1
+            logging.info(f"📈 Loaded {loaded} results into time buckets")
+        except Exception as e:
+            logging.error(f"❌ Time bucket warm-up failed: {e}")
+
+    async def find_near_duplicate(self, image_hash: str, phash: Optional[int]) -> Optional[Dict]:
+        """Perceptual hash'i eşik içinde olan önceki bir sonucu bul"""
+        found = await self.find_near_duplicates({image_hash: phash})
+        return found.get(image_hash)
+
+    async def find_near_duplicates(self, phashes: Dict[str, Optional[int]]) -> Dict[str, Dict]:
+        """Birden fazla görsel için yakın kopyaları bul, eşleşenleri tek sorguda getir"""
+        matches = {}
+        for image_hash, phash in phashes.items():
+            match = self.phash_index.find(phash) if phash is not None else None
+            if match is not None:
+                matches[image_hash] = match
+        if not matches:
+            return {}
+
+        existing = await self.check_existing_results([matched_hash for matched_hash, _ in matches.values()])
+        found = {}
+        for image_hash, (matched_hash, distance) in matches.items():
+            if matched_hash not in existing:
+                continue
+            # Not cached under image_hash: no row is stored for it, so only the
+            # frame it matched can be looked up (/result/{hash}) later
+            found[image_hash] = dict(
+                existing[matched_hash],
+                image_hash=image_hash,
+                matched_hash=matched_hash,
+                hash_distance=distance,
+                cached="near",
+            )
+        return found
+
+    async def save_result(self, image_hash: str, result: str, confidence: float = None,
+                         image_size: str = None, processing_time_ms: int = None,
+                         phash: int = None) -> bool:
+        """Sonucu veritabanına kaydet"""
+        return await self.save_results([{
+            "image_hash": image_hash,
+            "result": result,
+            "confidence": confidence,
+            "image_size": image_size,
+            "processing_time_ms": processing_time_ms,
+            "phash": phash,
+        }])
+
+    async def save_results(self, rows: List[Dict]) -> bool:
+        """Birden fazla sonucu kaydet (write-behind açıksa kuyruğa ekle)"""
+        if not rows:
+            return True
+
+        # Stamped here so a buffered row is stored with the time it was served with
+        created_at = datetime.now()
+        rows = [dict(row, created_at=created_at) for row in rows]
+
+        if self.write_buffer:
+            # The response does not wait for the store: the result is served
+            # from memory until the background flush has written it
+            for row in rows:
+                self.write_buffer.add(row["image_hash"], row)
+                self._remember(row)
+            return True
+
+        try:
+            inserted = await self._insert_results(rows)
+        except Exception as e:
+            logging.error(f"Database save error: {e}")
+            return False
+
+        # On conflict the stored row wins; the next lookup will cache it
+        for row in rows:
+            if row["image_hash"] in inserted:
+                self._remember(dict(row, created_at=inserted[row["image_hash"]]))
+            elif row.get("phash") is not None:
+                self.phash_index.add(row["image_hash"], row["phash"])
+        return True
+
+    def _remember(self, row: Dict):
+        """Kaydedilen sonucu önbelleğe, perceptual indekse ve zaman kovalarına ekle"""
+        self.result_cache.put(row["image_hash"], self._to_result(row))
+        self.timeseries.record(row["created_at"], row["result"], row.get("processing_time_ms"))
+        if row.get("phash") is not None:
+            self.phash_index.add(row["image_hash"], row["phash"])
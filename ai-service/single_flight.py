@@ -0,0 +1,58 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+
+class SingleFlight:
+    """Aynı anahtar için eşzamanlı çağrıları tek bir işe indirger.
+
+    The first caller for a key starts the work as a task; callers that
+    arrive while it is still running await the same task instead of
+    repeating it. The task is shielded, so a caller that disconnects
+    does not cancel the work for the others.
+    """
+
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+
+        # Metrics
+        self.executed = 0
+        self.coalesced = 0
+
+    def join(self, key: str) -> Optional[asyncio.Task]:
+        """Anahtar için çalışan iş varsa ona katıl (yoksa None)"""
+        task = self._in_flight.get(key)
+        if task is not None:
+            self.coalesced += 1
+        return task
+
+    def start(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[asyncio.Task, bool]:
+        """Anahtar için çalışan işe katıl ya da fn ile yenisini başlat"""
+        task = self.join(key)
+        if task is not None:
+            return task, True
+
+        task = asyncio.ensure_future(fn())
+        self._in_flight[key] = task
+        task.add_done_callback(lambda t: self._done(key, t))
+        self.executed += 1
+        return task, False
+
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """fn'i anahtar başına bir kez çalıştır; (sonuç, paylaşıldı mı) döndür"""
+        task, shared = self.start(key, fn)
+        return await asyncio.shield(task), shared
+
+    def _done(self, key: str, task: asyncio.Task):
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved even if every waiter went away
+        if not task.cancelled():
+            task.exception()
+
+    def stats(self) -> Dict:
+        """Tekilleştirme metrikleri"""
+        return {
+            "in_flight": len(self._in_flight),
+            "executed": self.executed,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,264 @@
+import asyncio
+import os
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Tuple
+import logging
+
+from perceptual_hash import to_signed, to_unsigned
+from result_store import ResultStore, format_image_size, parse_image_size
+
+# Embedded result store. WAL lets the reader connection run lookups while
+# the writer commits; synchronous=NORMAL only risks the last commits on
+# power loss, never corruption.
+SQLITE_CONFIG = {
+    "path": os.getenv("SQLITE_PATH", "fall_detection.db"),
+    "synchronous": os.getenv("SQLITE_SYNCHRONOUS", "NORMAL").upper(),
+    "busy_timeout_ms": int(os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")),
+    "cache_size_kb": int(os.getenv("SQLITE_CACHE_SIZE_KB", "65536")),
+}
+
+# Same columns as the Postgres table; the 32-byte hash is the primary key of a
+# WITHOUT ROWID table, so lookups and duplicate checks are one B-tree probe.
+# created_at is an ISO string, which sorts like the timestamp.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS fall_detections (
+    image_hash BLOB PRIMARY KEY CHECK (length(image_hash) = 32),
+    result TEXT NOT NULL,
+    confidence REAL,
+    created_at TEXT NOT NULL,
+    image_width INTEGER,
+    image_height INTEGER,
+    processing_time_ms INTEGER,
+    phash INTEGER
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_created_at ON fall_detections(created_at);
+
+CREATE TABLE IF NOT EXISTS fall_detection_daily_stats (
+    day TEXT PRIMARY KEY,
+    total_processed INTEGER NOT NULL DEFAULT 0,
+    fall_detected INTEGER NOT NULL DEFAULT 0,
+    no_fall INTEGER NOT NULL DEFAULT 0,
+    processing_time_sum INTEGER NOT NULL DEFAULT 0,
+    processing_time_count INTEGER NOT NULL DEFAULT 0
+);
+"""
+
+INSERT_QUERY = """
+INSERT INTO fall_detections
+    (image_hash, result, confidence, created_at, image_width, image_height, processing_time_ms, phash)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (image_hash) DO NOTHING
+"""
+
+ROLLUP_UPSERT = """
+INSERT INTO fall_detection_daily_stats AS s
+    (day, total_processed, fall_detected, no_fall, processing_time_sum, processing_time_count)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (day) DO UPDATE SET
+    total_processed = s.total_processed + excluded.total_processed,
+    fall_detected = s.fall_detected + excluded.fall_detected,
+    no_fall = s.no_fall + excluded.no_fall,
+    processing_time_sum = s.processing_time_sum + excluded.processing_time_sum,
+    processing_time_count = s.processing_time_count + excluded.processing_time_count
+"""
+
+STATISTICS_QUERY = """
+SELECT
+    COALESCE(SUM(total_processed), 0),
+    COALESCE(SUM(fall_detected), 0),
+    COALESCE(SUM(no_fall), 0),
+    CAST(SUM(processing_time_sum) AS REAL) / NULLIF(SUM(processing_time_count), 0),
+    COUNT(*)
+FROM fall_detection_daily_stats
+"""
+
+# SQLite's default limit on bound parameters per statement is 999
+LOOKUP_CHUNK = 500
+
+
+class SQLiteResultStore(ResultStore):
+    """Gömülü SQLite (WAL) sonuç deposu.
+
+    Meant for single-node / edge deployments where running Postgres is not
+    worth it. sqlite3 calls block, so each connection is owned by its own
+    single-thread executor: one writer that commits the write-behind
+    batches and one reader for lookups, which WAL keeps from waiting on
+    the writer.
+    """
+
+    backend = "sqlite"
+
+    def __init__(self, path: str = None):
+        super().__init__()
+        self.path = path or SQLITE_CONFIG["path"]
+        self._reader = None
+        self._writer = None
+        self._read_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-read")
+        self._write_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-write")
+
+        # Metrics
+        self.lookups = 0
+        self.rows_inserted = 0
+
+    async def _run(self, executor, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute(f"PRAGMA busy_timeout = {SQLITE_CONFIG['busy_timeout_ms']}")
+        conn.execute(f"PRAGMA synchronous = {SQLITE_CONFIG['synchronous']}")
+        conn.execute(f"PRAGMA cache_size = -{SQLITE_CONFIG['cache_size_kb']}")
+        return conn
+
+    def _open_sync(self):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._writer = self._connect()
+        self._writer.execute("PRAGMA journal_mode = WAL")
+        self._writer.executescript(SCHEMA)
+        self._reader = self._connect()
+
+    async def _open(self):
+        """Veritabanı dosyasını WAL kipinde aç ve tabloları oluştur"""
+        await self._run(self._write_executor, self._open_sync)
+        logging.info(f"🗄️ SQLite result store at {self.path}")
+
+    async def _close(self):
+        """Bağlantıları kapat"""
+        for conn, executor in ((self._reader, self._read_executor), (self._writer, self._write_executor)):
+            if conn is not None:
+                await self._run(executor, conn.close)
+            executor.shutdown(wait=True)
+        self._reader = self._writer = None
+
+    def _fetch_sync(self, keys: List[bytes]) -> List[Dict]:
+        rows = []
+        for i in range(0, len(keys), LOOKUP_CHUNK):
+            chunk = keys[i:i + LOOKUP_CHUNK]
+            records = self._reader.execute(
+                "SELECT image_hash, result, confidence, created_at, image_width, image_height, processing_time_ms "
+                f"FROM fall_detections WHERE image_hash IN ({','.join('?' * len(chunk))})",
+                chunk,
+            ).fetchall()
+            for image_hash, result, confidence, created_at, width, height, processing_time_ms in records:
+                rows.append({
+                    "image_hash": image_hash.hex(),
+                    "result": result,
+                    "confidence": confidence,
+                    "created_at": datetime.fromisoformat(created_at),
+                    "image_size": format_image_size(width, height),
+                    "processing_time_ms": processing_time_ms,
+                })
+        return rows
+
+    async def _fetch_results(self, keys: List[bytes]) -> List[Dict]:
+        """Hash'lere ait kayıtları birincil anahtar üzerinden getir"""
+        self.lookups += 1
+        return await self._run(self._read_executor, self._fetch_sync, keys)
+
+    def _insert_sync(self, rows: List[Dict]) -> Dict[str, datetime]:
+        now = datetime.now()
+        inserted = {}
+        days = defaultdict(lambda: [0, 0, 0, 0, 0])
+        conn = self._writer
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for row in rows:
+                width, height = parse_image_size(row.get("image_size"))
+                created_at = row.get("created_at") or now
+                cursor = conn.execute(INSERT_QUERY, (
+                    bytes.fromhex(row["image_hash"]),
+                    row["result"],
+                    row.get("confidence"),
+                    created_at.isoformat(sep=" "),
+                    width,
+                    height,
+                    row.get("processing_time_ms"),
+                    to_signed(row["phash"]) if row.get("phash") is not None else None,
+                ))
+                if cursor.rowcount != 1:
+                    continue  # Already stored
+                inserted[row["image_hash"]] = created_at
+
+                # Rollup updated in the same transaction, like the Postgres insert
+                day = days[created_at.date().isoformat()]
+                day[0] += 1
+                day[1] += row["result"] == "Yes"
+                day[2] += row["result"] == "No"
+                if row.get("processing_time_ms") is not None:
+                    day[3] += row["processing_time_ms"]
+                    day[4] += 1
+            conn.executemany(ROLLUP_UPSERT, [(day, *totals) for day, totals in days.items()])
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        self.rows_inserted += len(inserted)
+        return inserted
+
+    async def _insert_results(self, rows: List[Dict]) -> Dict[str, datetime]:
+        """Satırları tek transaction'da yaz, eklenenlerin created_at'ini döndür"""
+        return await self._run(self._write_executor, self._insert_sync, rows)
+
+    def _fetch_phashes_sync(self, limit: int) -> List[Tuple[str, int]]:
+        records = self._reader.execute(
+            "SELECT image_hash, phash FROM fall_detections WHERE phash IS NOT NULL "
+            "ORDER BY created_at DESC LIMIT ?",
+            (limit,),
+        ).fetchall()
+        return [(image_hash.hex(), to_unsigned(phash)) for image_hash, phash in records]
+
+    async def _fetch_phashes(self, limit: int) -> List[Tuple[str, int]]:
+        """En yeni kayıtların perceptual hash'lerini getir"""
+        return await self._run(self._read_executor, self._fetch_phashes_sync, limit)
+
+    async def _iter_recent(self, start: datetime, until: datetime):
+        """Aralıktaki kayıtları parça parça oku"""
+        cursor = await self._run(
+            self._read_executor,
+            self._reader.execute,
+            "SELECT created_at, result, processing_time_ms FROM fall_detections "
+            "WHERE created_at >= ? AND created_at < ?",
+            (start.isoformat(sep=" "), until.isoformat(sep=" ")),
+        )
+        while True:
+            records = await self._run(self._read_executor, cursor.fetchmany, 10000)
+            if not records:
+                break
+            for created_at, result, processing_time_ms in records:
+                yield datetime.fromisoformat(created_at), result, processing_time_ms
+
+    def _statistics_sync(self) -> Dict:
+        total, falls, no_falls, avg_time, days = self._reader.execute(STATISTICS_QUERY).fetchone()
+        return {
+            "total_processed": total,
+            "fall_detected": falls,
+            "no_fall": no_falls,
+            "avg_processing_time_ms": round(avg_time, 2) if avg_time else 0,
+            "days_active": days
+        }
+
+    async def get_statistics(self) -> Dict:
+        """Genel istatistikleri günlük özet tablosundan getir"""
+        return await self._run(self._read_executor, self._statistics_sync)
+
+    def backend_stats(self) -> Dict:
+        """Depolama motoru metrikleri"""
+        size = 0
+        for suffix in ("", "-wal"):
+            try:
+                size += os.path.getsize(self.path + suffix)
+            except OSError:
+                pass
+        return {
+            "backend": self.backend,
+            "path": self.path,
+            "size_bytes": size,
+            "lookups": self.lookups,
+            "rows_inserted": self.rows_inserted,
+        }
@@ -4,7 +4,9 @@ Fall Detection API Test Script
 FastAPI servisini test etmek için kullanılır
 """
 
+import asyncio
 import requests
+import io
 import json
 import time
 import os
@@ -14,6 +16,11 @@ from pathlib import Path
 API_BASE_URL = "http://localhost:8000"
 TEST_IMAGES_DIR = "/mnt/c/Users/duggy/OneDrive/Belgeler/Github/FallDetection/test-images"
 
+# Duration of the fake inference in the in-process responsiveness test, and
+# how long /health may take while it runs
+FAKE_INFERENCE_S = 1.0
+HEALTH_BUDGET_S = 0.05
+
 def test_health_check():
     """Health check endpoint test"""
     print("🔍 Testing health check...")
@@ -113,6 +120,101 @@ def test_batch_images(image_paths):
         print(f"❌ Batch test error: {e}")
         return False
 
+def _fake_inference_image():
+    """Sahte inference testi için küçük bir JPEG üretir"""
+    from PIL import Image
+
+    buffer = io.BytesIO()
+    Image.new("RGB", (64, 64), (128, 128, 128)).save(buffer, format="JPEG")
+    return buffer.getvalue()
+
+def test_health_during_inference():
+    """Model meşgulken /health'in bloklanmadığını süreç içinde test et (sahte, uzun inference)"""
+    print("\n⏱️ Testing /health during a fake long inference (in-process)...")
+    
+    try:
+        import httpx
+        import main
+        from model_service import ModelService
+    except ImportError as e:
+        print(f"❌ Service dependencies missing: {e}")
+        return False
+    
+    def slow_detect_batch(self, images, cascade=None, regions=None):
+        # Blocks the inference thread the way generate() does
+        time.sleep(FAKE_INFERENCE_S)
+        return [{"result": "No", "confidence": 1.0, "fall_probability": 0.0, "votes": None} for _ in images]
+    
+    async def no_result(*args, **kwargs):
+        return None
+    
+    async def saved(*args, **kwargs):
+        return True
+    
+    async def no_statistics():
+        return {}
+    
+    async def scenario():
+        service = ModelService()
+        # No weights are loaded: _detect_batch is the fake above
+        service.model = service.processor = object()
+        service.is_initialized = True
+        await service.scheduler.start()
+        main.model_service = service
+        try:
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                files = {"file": ("busy.jpg", _fake_inference_image(), "image/jpeg")}
+                inference = asyncio.create_task(client.post("/detect-fall/", files=files))
+                await asyncio.sleep(FAKE_INFERENCE_S / 5)  # Let the request reach the model
+                
+                health_start = time.perf_counter()
+                health = await client.get("/health")
+                health_elapsed = time.perf_counter() - health_start
+                answered_while_busy = not inference.done()
+                detection = await inference
+        finally:
+            main.model_service = None
+            await service.scheduler.stop()
+            service.executor.shutdown()
+        return health, health_elapsed, answered_while_busy, detection
+    
+    # Patched in-process only; no server, database or model weights involved
+    store = main.db_manager
+    patches = {
+        "check_existing_result": no_result,
+        "find_near_duplicate": no_result,
+        "save_result": saved,
+        "save_results": saved,
+        "get_statistics": no_statistics,
+    }
+    original_detect_batch = ModelService._detect_batch
+    ModelService._detect_batch = slow_detect_batch
+    for name, fake in patches.items():
+        setattr(store, name, fake)
+    try:
+        health, health_elapsed, answered_while_busy, detection = asyncio.run(scenario())
+    except Exception as e:
+        print(f"❌ Health latency test error: {e}")
+        return False
+    finally:
+        ModelService._detect_batch = original_detect_batch
+        for name in patches:
+            delattr(store, name)
+    
+    if health.status_code != 200 or detection.status_code != 200:
+        print(f"❌ Unexpected status: /health {health.status_code}, /detect-fall/ {detection.status_code}")
+        return False
+    if not answered_while_busy:
+        print("❌ /health was blocked by inference")
+        return False
+    if health_elapsed >= HEALTH_BUDGET_S:
+        print(f"❌ /health took {health_elapsed * 1000:.1f}ms during inference "
+              f"(budget {HEALTH_BUDGET_S * 1000:.0f}ms)")
+        return False
+    print(f"✅ /health answered in {health_elapsed * 1000:.1f}ms while the model was busy!")
+    return True
+
 def test_statistics():
     """İstatistik endpoint test"""
     print("\n📊 Testing statistics...")
@@ -183,12 +285,17 @@ def main():
         if test_batch_images(test_images[:3]):  # Test with 3 images
             tests_passed += 1
     
-    # 4. Statistics Test
+    # 4. Responsiveness Test (health while the model is busy, in-process)
+    total_tests += 1
+    if test_health_during_inference():
+        tests_passed += 1
+    
+    # 5. Statistics Test
     total_tests += 1
     if test_statistics():
         tests_passed += 1
     
-    # 5. Cache Test (same image again)
+    # 6. Cache Test (same image again)
     if test_images:
         print(f"\n🔄 Testing cache with same image...")
         total_tests += 1
@@ -0,0 +1,125 @@
+import asyncio
+import hashlib
+import io
+from typing import BinaryIO, Dict, Tuple
+
+from fastapi import UploadFile
+from fastapi.responses import JSONResponse
+
+# Room for a multipart part's boundary and headers on top of its file bytes
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadTooLargeError(ValueError):
+    """Yükleme izin verilen boyutu aşıyor"""
+
+
+def _hash_file(fp: BinaryIO, max_bytes: int, chunk_bytes: int) -> str:
+    """Dosyayı parça parça okuyup SHA256'sını hesapla, boyut sınırını uygula"""
+    fp.seek(0)
+    digest = hashlib.sha256()
+    length = 0
+    while True:
+        chunk = fp.read(chunk_bytes)
+        if not chunk:
+            break
+        length += len(chunk)
+        if length > max_bytes:
+            raise UploadTooLargeError(f"Upload is larger than {max_bytes} bytes")
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+async def read_upload(file: UploadFile, max_bytes: int, chunk_bytes: int = 64 * 1024) -> Tuple[BinaryIO, str]:
+    """Yüklemeyi parça parça hash'le; (görsel dosyası, SHA256 hex) döndür.
+
+    The multipart parser has already streamed the body into a spooled
+    temporary file (in memory up to 1 MB, on disk beyond that). Instead
+    of reading it back into one bytes object, the hash is computed over
+    fixed-size chunks on a worker thread and the spooled file itself is
+    handed to the decoder, so no request holds a full copy of its upload
+    in memory. Uploads over max_bytes are refused while hashing, or
+    before reading at all when the parser already knows the size.
+    """
+    if file.size is not None and file.size > max_bytes:
+        raise UploadTooLargeError(f"Upload is {file.size} bytes, limit is {max_bytes}")
+
+    image_hash = await asyncio.to_thread(_hash_file, file.file, max_bytes, chunk_bytes)
+    return file.file, image_hash
+
+
+def take_upload(file: UploadFile) -> BinaryIO:
+    """Yüklemenin dosyasını istekten devral; kapatmak artık çağıranın işi.
+
+    The request closes its UploadFiles when it finishes or its client
+    goes away, which would pull the file out from under work that outlives
+    the request, such as a single-flight task other requests are waiting
+    on. The spooled file is handed over as is, without a copy, and an
+    empty one is left for the request to close.
+    """
+    fp = file.file
+    file.file = io.BytesIO()
+    return fp
+
+
+class UploadLimitMiddleware:
+    """İstek gövdesini alınırken boyut sınırını uygular (ASGI middleware).
+
+    The multipart parser spools the whole body to memory or disk before
+    the endpoint runs, so a check in the endpoint only fires after an
+    oversized upload has been received in full. This middleware refuses
+    a request to a limited path whose Content-Length is over the limit
+    before reading any of it, and counts the bytes of the body as they
+    arrive (chunked uploads have no Content-Length): once the count
+    passes the limit the parse is aborted and the client gets a 413.
+    """
+
+    def __init__(self, app, limits: Dict[str, int]):
+        self.app = app
+        self.limits = limits
+
+    async def __call__(self, scope, receive, send):
+        limit = self.limits.get(scope["path"]) if scope["type"] == "http" else None
+        if limit is None:
+            await self.app(scope, receive, send)
+            return
+
+        content_length = dict(scope["headers"]).get(b"content-length", b"")
+        if content_length.isdigit() and int(content_length) > limit:
+            await self._reject(scope, receive, send, limit)
+            return
+
+        received = 0
+        exceeded = False
+        response_started = False
+
+        async def limited_receive():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise UploadTooLargeError(f"Request body is larger than {limit} bytes")
+            return message
+
+        async def guarded_send(message):
+            nonlocal response_started
+            # The app's own answer to the aborted parse is replaced by the 413
+            if exceeded:
+                return
+            response_started = True
+            await send(message)
+
+        try:
+            await self.app(scope, limited_receive, guarded_send)
+        except Exception:
+            # Whatever the aborted parse turned into, the answer is the 413
+            if not exceeded:
+                raise
+        if exceeded and not response_started:
+            await self._reject(scope, receive, send, limit)
+
+    async def _reject(self, scope, receive, send, limit: int):
+        response = JSONResponse({"detail": f"Request body is larger than {limit} bytes"}, status_code=413)
+        await response(scope, receive, send)
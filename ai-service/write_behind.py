@@ -0,0 +1,147 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+
+class WriteBehindBuffer:
+    """Sonuçları bellekte biriktirip veritabanına toplu halde yazar.
+
+    ``add`` only records the row and returns, so callers never wait on
+    the database. A background task hands up to ``batch_size`` rows to
+    ``flush_rows`` whenever that many are pending or ``flush_interval_ms``
+    has passed (0 flushes on every add). Rows that fail to flush stay queued and are retried on the
+    next tick. At most ``max_pending`` rows are held; beyond that the
+    oldest are dropped, which bounds what a crash or a long outage can
+    lose. ``stop`` flushes whatever is left.
+    """
+
+    def __init__(
+        self,
+        flush_rows: Callable[[List[Dict]], Awaitable[Any]],
+        batch_size: int = 100,
+        flush_interval_ms: float = 500.0,
+        max_pending: int = 10000,
+    ):
+        self.flush_rows = flush_rows
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = max(0.0, flush_interval_ms) / 1000.0
+        self.max_pending = max(self.batch_size, max_pending)
+        self._pending: "OrderedDict[str, Dict]" = OrderedDict()
+        self._wake: Optional[asyncio.Event] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._flush_lock: Optional[asyncio.Lock] = None
+
+        # Metrics
+        self.rows_added = 0
+        self.rows_flushed = 0
+        self.rows_dropped = 0
+        self.flushes = 0
+        self.flush_failures = 0
+        self.flush_time_ms = 0.0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+
+    async def start(self):
+        """Arka plan yazma görevini başlat"""
+        if self._worker is None:
+            self._wake = asyncio.Event()
+            self._flush_lock = asyncio.Lock()
+            self._worker = asyncio.create_task(self._run())
+
+    async def stop(self):
+        """Görevi durdur ve bekleyen satırları yaz"""
+        if self._worker is None:
+            return
+
+        self._worker.cancel()
+        try:
+            await self._worker
+        except asyncio.CancelledError:
+            pass
+        self._worker = None
+
+        await self.flush()
+        if self._pending:
+            logging.error(f"💾 {len(self._pending)} unflushed results lost on shutdown")
+
+    def add(self, key: str, row: Dict):
+        """Satırı yazma kuyruğuna ekle (beklemeden döner)"""
+        self._pending[key] = row
+        self._pending.move_to_end(key)
+        self.rows_added += 1
+
+        while len(self._pending) > self.max_pending:
+            self._pending.popitem(last=False)
+            self.rows_dropped += 1
+            if self.rows_dropped % 1000 == 1:
+                logging.warning(f"💾 Write-behind buffer full, dropped {self.rows_dropped} results so far")
+
+        if self._wake is not None and (not self.flush_interval or len(self._pending) >= self.batch_size):
+            self._wake.set()
+
+    def get(self, key: str) -> Optional[Dict]:
+        """Henüz yazılmamış satırı döndür (yoksa None)"""
+        return self._pending.get(key)
+
+    async def flush(self) -> bool:
+        """Bekleyen tüm satırları batch'ler halinde yaz"""
+        async with self._flush_lock:
+            while self._pending:
+                batch = list(self._pending.items())[:self.batch_size]
+
+                start_time = time.time()
+                try:
+                    await self.flush_rows([row for _, row in batch])
+                except Exception as e:
+                    # Rows stay queued and are retried on the next tick
+                    self.flush_failures += 1
+                    logging.error(f"💾 Write-behind flush of {len(batch)} rows failed: {e}")
+                    return False
+
+                elapsed = (time.time() - start_time) * 1000
+                self.flushes += 1
+                self.flush_time_ms += elapsed
+                self.last_flush_ms = elapsed
+                self.max_flush_ms = max(self.max_flush_ms, elapsed)
+                self.rows_flushed += len(batch)
+
+                for key, row in batch:
+                    # A newer row for the same key was added during the flush
+                    if self._pending.get(key) is row:
+                        del self._pending[key]
+            return True
+
+    async def _run(self):
+        while True:
+            try:
+                # Without an interval only add() wakes the task
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval or None)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            # Shielded so stop() cannot interrupt a batch half-way
+            if not await asyncio.shield(self.flush()):
+                # Back off instead of retrying on every add while the database is down
+                await asyncio.sleep(self.flush_interval or 1.0)
+                if not self.flush_interval:
+                    # Nothing else retries the rows left queued
+                    self._wake.set()
+
+    def stats(self) -> Dict:
+        """Yazma kuyruğu metrikleri"""
+        return {
+            "queue_depth": len(self._pending),
+            "max_pending": self.max_pending,
+            "batch_size": self.batch_size,
+            "flush_interval_ms": self.flush_interval * 1000.0,
+            "rows_added": self.rows_added,
+            "rows_flushed": self.rows_flushed,
+            "rows_dropped": self.rows_dropped,
+            "flushes": self.flushes,
+            "flush_failures": self.flush_failures,
+            "avg_flush_ms": round(self.flush_time_ms / self.flushes, 2) if self.flushes else 0,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+            "max_flush_ms": round(self.max_flush_ms, 2),
+        }
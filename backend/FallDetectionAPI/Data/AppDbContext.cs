@@ -22,10 +22,14 @@ public class AppDbContext : DbContext
             entity.HasKey(e => e.Id);
             
             // Property mappings
+            // Hash is hex in the API, 32 raw bytes (bytea) in the table
             entity.Property(e => e.ImageHash)
                 .HasColumnName("image_hash")
                 .IsRequired()
-                .HasMaxLength(64);
+                .HasColumnType("bytea")
+                .HasConversion(
+                    hex => Convert.FromHexString(hex),
+                    bytes => Convert.ToHexString(bytes).ToLowerInvariant());
                 
             entity.Property(e => e.Result)
                 .IsRequired()
@@ -36,18 +40,18 @@ public class AppDbContext : DbContext
                 .HasDefaultValueSql("CURRENT_TIMESTAMP")
                 .HasColumnType("timestamp without time zone");
                 
-            entity.Property(e => e.ImageSize)
-                .HasColumnName("image_size")
-                .HasMaxLength(20);
+            entity.Property(e => e.ImageWidth)
+                .HasColumnName("image_width");
+                
+            entity.Property(e => e.ImageHeight)
+                .HasColumnName("image_height");
                 
             entity.Property(e => e.ProcessingTimeMs)
                 .HasColumnName("processing_time_ms");
             
             // Indexes
-            entity.HasIndex(e => e.ImageHash)
-                .IsUnique()
-                .HasDatabaseName("idx_image_hash");
-                
+            // image_hash is looked up through idx_image_hash_prefix (an expression
+            // index managed by the AI service); uniqueness is enforced by a trigger
             entity.HasIndex(e => e.CreatedAt)
                 .HasDatabaseName("idx_created_at");
         });
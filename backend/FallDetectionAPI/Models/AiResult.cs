@@ -1,3 +1,4 @@
+using System.Text.Json;
 using System.Text.Json.Serialization;
 
 namespace FallDetectionAPI.Models;
@@ -19,6 +20,27 @@ public class AiResult
     [JsonPropertyName("processing_time_ms")]
     public int? ProcessingTimeMs { get; set; }
     
+    // AI servisi true/false ya da "near" gibi bir cache türü döndürebilir
     [JsonPropertyName("cached")]
+    [JsonConverter(typeof(CachedFlagConverter))]
     public bool Cached { get; set; }
 }
+
+public class CachedFlagConverter : JsonConverter<bool>
+{
+    public override bool Read(ref Utf8JsonReader reader, Type typeToConvert, JsonSerializerOptions options)
+    {
+        return reader.TokenType switch
+        {
+            JsonTokenType.True => true,
+            JsonTokenType.False => false,
+            JsonTokenType.String => !string.IsNullOrEmpty(reader.GetString()),
+            _ => false
+        };
+    }
+
+    public override void Write(Utf8JsonWriter writer, bool value, JsonSerializerOptions options)
+    {
+        writer.WriteBooleanValue(value);
+    }
+}
@@ -5,7 +5,7 @@ namespace FallDetectionAPI.Models;
 
 public class FallDetection
 {
-    public int Id { get; set; }
+    public long Id { get; set; }
     
     [Column("image_hash")]
     [JsonPropertyName("image_hash")]
@@ -21,9 +21,17 @@ public class FallDetection
     [JsonPropertyName("created_at")]
     public DateTime CreatedAt { get; set; }
     
-    [Column("image_size")]
+    [Column("image_width")]
+    [JsonIgnore]
+    public short? ImageWidth { get; set; }
+    
+    [Column("image_height")]
+    [JsonIgnore]
+    public short? ImageHeight { get; set; }
+    
+    [NotMapped]
     [JsonPropertyName("image_size")]
-    public string? ImageSize { get; set; }
+    public string? ImageSize => ImageWidth.HasValue && ImageHeight.HasValue ? $"{ImageWidth}x{ImageHeight}" : null;
     
     [Column("processing_time_ms")]
     [JsonPropertyName("processing_time_ms")]
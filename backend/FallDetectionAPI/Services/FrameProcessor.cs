@@ -182,5 +182,10 @@ public class FrameProcessor : BackgroundService
             // Duplicate hash - ignore and continue (AI service already processed this image)
             _logger.LogWarning("Duplicate image hash detected, skipping {Count} results (AI service cache hit)", fallDetections.Count);
         }
+        catch (DbUpdateConcurrencyException)
+        {
+            // Partitioned table: the dedupe trigger skips rows whose hash is already stored
+            _logger.LogWarning("Duplicate image hash detected, skipping {Count} results (AI service cache hit)", fallDetections.Count);
+        }
     }
 }